@@ -6,6 +6,9 @@ from PIL import Image
 class AIProvider(ABC):
     """Abstract base class for AI providers"""
     
+    # The detect_* methods raise when the provider call fails (rather than
+    # answering "nothing found"), so analysis can retry them
+
     @abstractmethod
     async def detect_nsfw(self, image_path: str) -> bool:
         """Detect if image contains NSFW content"""
@@ -9,7 +9,10 @@ import mimetypes
 import logging
 
 from .base import AIProvider
+from .rate_limiter import gemini_rate_limiter
 from app.core.config import settings
+from app.services.rendition_service import RenditionService
+from app.services.background_extension_service import BackgroundExtensionService
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +24,11 @@ class GeminiProvider(AIProvider):
         self.model = genai.GenerativeModel(settings.GEMINI_ANALYSIS_MODEL)
         self.text_model = genai.GenerativeModel(settings.GEMINI_TEXT_MODEL)
     
+    def _generate_content(self, model, contents, **kwargs):
+        """Call the model, waiting for a slot under the global Gemini rate limit"""
+        gemini_rate_limiter.acquire()
+        return model.generate_content(contents, **kwargs)
+    
     def _get_response_text(self, response) -> str:
         """Helper method to safely extract text from Gemini response (works for both 1.5 and 2.5)"""
         try:
@@ -67,7 +75,7 @@ class GeminiProvider(AIProvider):
             img = Image.open(image_path)
             
             # Use synchronous method instead of async
-            response = self.model.generate_content([
+            response = self._generate_content(self.model, [
                 "Analyze this image for NSFW or inappropriate content. Respond with only 'YES' if NSFW/inappropriate or 'NO' if safe. Do not include any other text.",
                 img
             ])
@@ -77,8 +85,8 @@ class GeminiProvider(AIProvider):
             return "YES" in result or "TRUE" in result
             
         except Exception as e:
-            print(f"NSFW detection failed: {e}")
-            return False
+            logger.error(f"NSFW detection failed: {e}")
+            raise
     
     async def detect_faces(self, image_path: str) -> List[Dict[str, Any]]:
         """Detect faces in image"""
@@ -96,7 +104,7 @@ class GeminiProvider(AIProvider):
             If no faces are found, return: {"faces": []}
             """
             
-            response = self.model.generate_content([prompt, img])
+            response = self._generate_content(self.model, [prompt, img])
             
             print(f"Raw face detection response: {self._get_response_text(response)}")
             
@@ -104,8 +112,8 @@ class GeminiProvider(AIProvider):
             return result.get("faces", [])
                 
         except Exception as e:
-            print(f"Face detection failed: {e}")
-            return []
+            logger.error(f"Face detection failed: {e}")
+            raise
     
     async def detect_objects(self, image_path: str) -> List[Dict[str, Any]]:
         """Detect objects/products in image"""
@@ -125,7 +133,7 @@ class GeminiProvider(AIProvider):
             If no clear objects are visible, return: {"objects": []}
             """
             
-            response = self.model.generate_content([prompt, img])
+            response = self._generate_content(self.model, [prompt, img])
             
             print(f"Raw object detection response: {self._get_response_text(response)}")
             
@@ -133,36 +141,13 @@ class GeminiProvider(AIProvider):
             return result.get("objects", [])
                 
         except Exception as e:
-            print(f"Object detection failed: {e}")
-            return []
+            logger.error(f"Object detection failed: {e}")
+            raise
     
     async def extend_background(self, image_path: str, target_width: int, target_height: int) -> str:
-        """Extend image background - simplified implementation"""
+        """Extend image background with the local background extension engine"""
         try:
-            with Image.open(image_path) as img:
-                current_width, current_height = img.size
-                
-                # Don't extend if target is smaller
-                if target_width <= current_width and target_height <= current_height:
-                    return image_path
-                
-                # Create new image with target dimensions
-                new_img = Image.new('RGB', (target_width, target_height), (255, 255, 255))
-                
-                # Calculate position to center original image
-                x = max(0, (target_width - current_width) // 2)
-                y = max(0, (target_height - current_height) // 2)
-                
-                # Paste original image
-                new_img.paste(img, (x, y))
-                
-                # Save extended image
-                base_name, ext = os.path.splitext(image_path)
-                output_path = f"{base_name}_extended{ext}"
-                new_img.save(output_path)
-                
-                return output_path
-                
+            return BackgroundExtensionService.extend_file(image_path, target_width, target_height)
         except Exception as e:
             print(f"Background extension failed: {e}")
             return image_path
@@ -180,7 +165,7 @@ class GeminiProvider(AIProvider):
             - Return only the text, no quotes or additional formatting
             """
             
-            response = self.text_model.generate_content(full_prompt)
+            response = self._generate_content(self.text_model, full_prompt)
             
             # Clean the response using the safe text extractor
             result = self._get_response_text(response).strip()
@@ -218,19 +203,20 @@ Maintain the original style and lighting."""
             contents = [final_prompt, source_image]
 
             logger.info(f"Sending request to Gemini Image Editor for image {image_path} with target size {target_width}x{target_height} and prompt: '{prompt[:80] if prompt else 'None'}...'")
-            response = image_edit_model.generate_content(contents, stream=True)
+            response = self._generate_content(image_edit_model, contents, stream=True)
 
             for chunk in response:
                 if chunk.candidates and chunk.candidates[0].content and chunk.candidates[0].content.parts:
                     part = chunk.candidates[0].content.parts[0]
                     if part.inline_data and part.inline_data.data:
-                        base, orig_ext = os.path.splitext(image_path)
+                        orig_ext = os.path.splitext(image_path)[1]
                         # Use the mime type from the response to get the correct extension
                         file_extension = mimetypes.guess_extension(part.inline_data.mime_type) or orig_ext
-                        output_path = f"{base}_gemini_edited{file_extension}"
-                        
-                        with open(output_path, "wb") as f:
-                            f.write(part.inline_data.data)
+                        output_path = RenditionService.build_rendition_path(
+                            image_path, "gemini_edited", target_width, target_height,
+                            ext=file_extension, prompt=prompt, model=settings.GEMINI_IMAGE_EDITOR_MODEL
+                        )
+                        RenditionService.atomic_write_bytes(output_path, part.inline_data.data)
                         
                         logger.info(f"Successfully generated image with Gemini and saved to {output_path}")
                         return output_path
@@ -254,18 +240,19 @@ Maintain the original style and lighting."""
             contents = [prompt, source_image]
 
             logger.info(f"Sending request to Gemini Image Editor for image {image_path} with prompt: '{prompt[:80]}...'")
-            response = image_edit_model.generate_content(contents, stream=True)
+            response = self._generate_content(image_edit_model, contents, stream=True)
 
             for chunk in response:
                 if chunk.candidates and chunk.candidates[0].content and chunk.candidates[0].content.parts:
                     part = chunk.candidates[0].content.parts[0]
                     if part.inline_data and part.inline_data.data:
-                        base, orig_ext = os.path.splitext(image_path)
+                        orig_ext = os.path.splitext(image_path)[1]
                         file_extension = mimetypes.guess_extension(part.inline_data.mime_type) or orig_ext
-                        output_path = f"{base}_prompt_edited{file_extension}"
-                        
-                        with open(output_path, "wb") as f:
-                            f.write(part.inline_data.data)
+                        output_path = RenditionService.build_rendition_path(
+                            image_path, "prompt_edited",
+                            ext=file_extension, prompt=prompt, model=settings.GEMINI_IMAGE_EDITOR_MODEL
+                        )
+                        RenditionService.atomic_write_bytes(output_path, part.inline_data.data)
                         
                         logger.info(f"Successfully edited image with prompt and saved to {output_path}")
                         return output_path
@@ -288,7 +275,7 @@ Detected elements: {elements_str}
 Example output:
 ["Change the {elements[0]} to a different color", "Add a futuristic city background", "Make the lighting more dramatic"]"""
 
-            response = self.text_model.generate_content(prompt)
+            response = self._generate_content(self.text_model, prompt)
             response_text = self._get_response_text(response)
             
             # The response might be a markdown code block
@@ -0,0 +1,44 @@
+import logging
+import time
+import redis
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Global (cross-worker) fixed-window request limiter backed by Redis"""
+
+    def __init__(self, name: str, requests_per_minute: int):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+
+    def acquire(self) -> None:
+        """Block until a request slot is available in the current one-minute window"""
+        if self.requests_per_minute <= 0:
+            return
+
+        while True:
+            window = int(time.time() // 60)
+            key = f"ratelimit:{self.name}:{window}"
+            try:
+                client = get_redis_client()
+                pipe = client.pipeline()
+                pipe.incr(key)
+                pipe.expire(key, 120)
+                count, _ = pipe.execute()
+            except redis.RedisError as e:
+                logger.warning(f"Rate limiter '{self.name}' unavailable, not throttling: {e}")
+                return
+
+            if count <= self.requests_per_minute:
+                return
+
+            wait = 60 - (time.time() % 60) + 0.05
+            logger.info(f"Rate limit for '{self.name}' reached ({self.requests_per_minute}/min); waiting {wait:.1f}s")
+            time.sleep(wait)
+
+
+gemini_rate_limiter = RateLimiter("gemini", settings.GEMINI_REQUESTS_PER_MINUTE)
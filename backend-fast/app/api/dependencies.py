@@ -1,9 +1,13 @@
+from typing import Any, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.security import verify_token
 from app.models.user import User
+from app.services.idempotency_service import (
+    IdempotencyService, IdempotencyKeyReused, IdempotencyRequestInProgress
+)
 
 security = HTTPBearer()
 
@@ -29,3 +33,19 @@ def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
             detail="Admin access required"
         )
     return current_user
+
+
+def begin_idempotent_request(scope: str, user: User, idempotency_key: Optional[str], payload: Any) -> Optional[dict]:
+    """Claim an Idempotency-Key; returns the stored response to replay, if any"""
+    try:
+        return IdempotencyService.begin(scope, user.id, idempotency_key, payload)
+    except IdempotencyKeyReused as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except IdempotencyRequestInProgress as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
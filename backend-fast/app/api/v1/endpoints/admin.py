@@ -13,13 +13,19 @@ from app.schemas.admin import (
     TextStyleSetCreate, TextStyleSetUpdate, TextStyleSetResponse,
     AdaptationRule, AIBehaviorRule, UploadModerationRule, ManualEditingRule
 )
+from app.schemas.webhook import (
+    WebhookEndpointCreate, WebhookEndpointUpdate,
+    WebhookEndpointResponse, WebhookEndpointCreatedResponse
+)
 from app.services.admin_service import AdminService
+from app.services.webhook_service import WebhookService
+from app.tasks.webhook_tasks import deliver_webhook
 
 router = APIRouter()
 
 
 @router.get("/stats")
-async def get_admin_stats(
+def get_admin_stats(
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
 ):
@@ -38,7 +44,7 @@ async def get_admin_stats(
 
 # Platform Management
 @router.get("/platforms", response_model=List[PlatformResponse])
-async def list_platforms(
+def list_platforms(
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
 ):
@@ -56,7 +62,7 @@ async def list_platforms(
 
 
 @router.post("/platforms", response_model=PlatformResponse)
-async def create_platform(
+def create_platform(
     platform_data: PlatformCreate,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -78,7 +84,7 @@ async def create_platform(
 
 
 @router.put("/platforms/{platform_id}", response_model=PlatformResponse)
-async def update_platform(
+def update_platform(
     platform_id: str,
     platform_data: PlatformUpdate,
     db: Session = Depends(get_db),
@@ -108,7 +114,7 @@ async def update_platform(
 
 
 @router.delete("/platforms/{platform_id}", status_code=204)
-async def delete_platform(
+def delete_platform(
     platform_id: str,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -133,7 +139,7 @@ async def delete_platform(
 
 # Format Management
 @router.get("/formats", response_model=List[AssetFormatResponse])
-async def list_formats(
+def list_formats(
     type: Optional[str] = None,
     category: Optional[str] = None,
     db: Session = Depends(get_db),
@@ -157,7 +163,7 @@ async def list_formats(
 
 
 @router.post("/formats", response_model=AssetFormatResponse)
-async def create_format(
+def create_format(
     format_data: AssetFormatCreate,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -183,7 +189,7 @@ async def create_format(
 
 
 @router.put("/formats/{format_id}", response_model=AssetFormatResponse)
-async def update_format(
+def update_format(
     format_id: str,
     format_data: AssetFormatUpdate,
     db: Session = Depends(get_db),
@@ -218,7 +224,7 @@ async def update_format(
 
 
 @router.delete("/formats/{format_id}", status_code=204)
-async def delete_format(
+def delete_format(
     format_id: str,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -243,7 +249,7 @@ async def delete_format(
 
 # Text Style Set Management
 @router.get("/text-style-sets", response_model=List[TextStyleSetResponse])
-async def list_text_style_sets(
+def list_text_style_sets(
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
 ):
@@ -261,7 +267,7 @@ async def list_text_style_sets(
 
 
 @router.post("/text-style-sets", response_model=TextStyleSetResponse)
-async def create_text_style_set(
+def create_text_style_set(
     style_data: TextStyleSetCreate,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -283,7 +289,7 @@ async def create_text_style_set(
 
 
 @router.put("/text-style-sets/{set_id}", response_model=TextStyleSetResponse)
-async def update_text_style_set(
+def update_text_style_set(
     set_id: str,
     style_data: TextStyleSetUpdate,
     db: Session = Depends(get_db),
@@ -314,7 +320,7 @@ async def update_text_style_set(
 
 
 @router.delete("/text-style-sets/{set_id}", status_code=204)
-async def delete_text_style_set(
+def delete_text_style_set(
     set_id: str,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -339,7 +345,7 @@ async def delete_text_style_set(
 
 # Rules Management
 @router.get("/rules/adaptation", response_model=AdaptationRule)
-async def get_adaptation_rules(
+def get_adaptation_rules(
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
 ):
@@ -348,7 +354,7 @@ async def get_adaptation_rules(
 
 
 @router.put("/rules/adaptation", response_model=AdaptationRule)
-async def update_adaptation_rules(
+def update_adaptation_rules(
     rules: AdaptationRule,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -375,7 +381,7 @@ async def update_adaptation_rules(
 
 
 @router.get("/rules/ai-behavior", response_model=AIBehaviorRule)
-async def get_ai_behavior_rules(
+def get_ai_behavior_rules(
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
 ):
@@ -384,7 +390,7 @@ async def get_ai_behavior_rules(
 
 
 @router.put("/rules/ai-behavior", response_model=AIBehaviorRule)
-async def update_ai_behavior_rules(
+def update_ai_behavior_rules(
     rules: AIBehaviorRule,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -411,7 +417,7 @@ async def update_ai_behavior_rules(
 
 
 @router.get("/rules/upload-moderation", response_model=UploadModerationRule)
-async def get_upload_moderation_rules(
+def get_upload_moderation_rules(
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
 ):
@@ -420,7 +426,7 @@ async def get_upload_moderation_rules(
 
 
 @router.put("/rules/upload-moderation", response_model=UploadModerationRule)
-async def update_upload_moderation_rules(
+def update_upload_moderation_rules(
     rules: UploadModerationRule,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -443,7 +449,7 @@ async def update_upload_moderation_rules(
 
 
 @router.get("/rules/manual-editing", response_model=ManualEditingRule)
-async def get_manual_editing_rules(
+def get_manual_editing_rules(
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
 ):
@@ -452,7 +458,7 @@ async def get_manual_editing_rules(
 
 
 @router.put("/rules/manual-editing", response_model=ManualEditingRule)
-async def update_manual_editing_rules(
+def update_manual_editing_rules(
     rules: ManualEditingRule,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -472,3 +478,105 @@ async def update_manual_editing_rules(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error updating manual editing rules: {str(e)}"
         )
+
+
+# Webhooks
+def _webhook_response(endpoint) -> WebhookEndpointResponse:
+    return WebhookEndpointResponse(
+        id=str(endpoint.id),
+        url=endpoint.url,
+        events=endpoint.events,
+        is_active=endpoint.is_active,
+        created_at=endpoint.created_at
+    )
+
+
+@router.get("/webhooks", response_model=List[WebhookEndpointResponse])
+def list_webhooks(
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(get_admin_user)
+):
+    """List the webhook endpoints of the admin's organization"""
+    return [_webhook_response(endpoint) for endpoint in WebhookService.get_endpoints(db, admin_user)]
+
+
+@router.post("/webhooks", response_model=WebhookEndpointCreatedResponse)
+def create_webhook(
+    endpoint_data: WebhookEndpointCreate,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(get_admin_user)
+):
+    """Register a webhook endpoint; the signing secret is only returned here"""
+    try:
+        endpoint = WebhookService.create_endpoint(db, endpoint_data, admin_user)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return WebhookEndpointCreatedResponse(
+        **_webhook_response(endpoint).dict(),
+        secret=endpoint.secret
+    )
+
+
+@router.put("/webhooks/{endpoint_id}", response_model=WebhookEndpointResponse)
+def update_webhook(
+    endpoint_id: str,
+    endpoint_data: WebhookEndpointUpdate,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(get_admin_user)
+):
+    """Update a webhook endpoint"""
+    endpoint = WebhookService.get_endpoint_by_id(db, endpoint_id, admin_user)
+    if not endpoint:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Webhook endpoint not found"
+        )
+    
+    try:
+        endpoint = WebhookService.update_endpoint(db, endpoint, endpoint_data.dict(exclude_unset=True))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return _webhook_response(endpoint)
+
+
+@router.delete("/webhooks/{endpoint_id}", status_code=204)
+def delete_webhook(
+    endpoint_id: str,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(get_admin_user)
+):
+    """Delete a webhook endpoint"""
+    endpoint = WebhookService.get_endpoint_by_id(db, endpoint_id, admin_user)
+    if not endpoint:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Webhook endpoint not found"
+        )
+    
+    WebhookService.delete_endpoint(db, endpoint)
+    return None
+
+
+@router.post("/webhooks/{endpoint_id}/test")
+def test_webhook(
+    endpoint_id: str,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(get_admin_user)
+):
+    """Queue a signed 'ping' delivery to a webhook endpoint"""
+    endpoint = WebhookService.get_endpoint_by_id(db, endpoint_id, admin_user)
+    if not endpoint:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Webhook endpoint not found"
+        )
+    
+    payload = WebhookService.build_payload("ping", admin_user.organization_id, {"endpointId": str(endpoint.id)})
+    task = deliver_webhook.delay(str(endpoint.id), payload)
+    return {"status": "queued", "taskId": task.id, "deliveryId": payload["id"]}
@@ -12,7 +12,7 @@ from typing import List
 router = APIRouter()
 
 @router.get("/user-growth")
-async def get_user_growth(
+def get_user_growth(
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
 ):
@@ -30,7 +30,7 @@ async def get_user_growth(
     return [{"date": str(date), "count": count} for date, count in user_growth]
 
 @router.get("/project-status")
-async def get_project_status_distribution(
+def get_project_status_distribution(
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
 ):
@@ -47,7 +47,7 @@ async def get_project_status_distribution(
     return [{"status": status.value, "count": count} for status, count in status_distribution]
 
 @router.get("/generation-by-format")
-async def get_generation_by_format(
+def get_generation_by_format(
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
 ):
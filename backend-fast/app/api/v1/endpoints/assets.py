@@ -12,7 +12,7 @@ from app.services.generation_service import GenerationService
 router = APIRouter()
 
 @router.get("/{original_asset_id}/generated", response_model=List[GeneratedAssetResponse])
-async def get_generated_assets_for_original(
+def get_generated_assets_for_original(
     original_asset_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -34,7 +34,9 @@ async def get_generated_assets_for_original(
             detail="You do not have permission to access this asset."
         )
 
-    generated_assets = db.query(GeneratedAsset).filter(
+    generated_assets = db.query(GeneratedAsset).options(
+        *GenerationService.generated_asset_load_options()
+    ).filter(
         GeneratedAsset.original_asset_id == original_asset_id
     ).order_by(GeneratedAsset.created_at.desc()).all()
 
@@ -45,14 +47,14 @@ async def get_generated_assets_for_original(
 
 
 @router.get("/{asset_id}/prompt-suggestions", response_model=List[str])
-async def get_prompt_suggestions(
+def get_prompt_suggestions(
     asset_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Generate dynamic prompt suggestions for editing an asset."""
     try:
-        suggestions = await GenerationService.get_prompt_suggestions(db, asset_id, current_user)
+        suggestions = GenerationService.get_prompt_suggestions(db, asset_id, current_user)
         return suggestions
     except ValueError as e:
         raise HTTPException(
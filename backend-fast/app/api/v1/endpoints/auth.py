@@ -30,7 +30,7 @@ security = HTTPBearer()
 
 
 @router.post("/login", response_model=LoginResponse)
-async def login(
+def login(
     login_data: LoginRequest,
     db: Session = Depends(get_db)
 ):
@@ -54,7 +54,7 @@ async def login(
     )
 
 @router.post("/refresh", response_model=RefreshTokenResponse)
-async def refresh_token(
+def refresh_token(
     request: RefreshTokenRequest,
     db: Session = Depends(get_db)
 ):
@@ -72,13 +72,13 @@ async def refresh_token(
 
 
 @router.post("/logout", status_code=204)
-async def logout(current_user: User = Depends(get_current_user)):
+def logout(current_user: User = Depends(get_current_user)):
     """User logout endpoint - JWT is stateless, so this is mainly for client-side cleanup."""
     return None
 
 
 @router.post("/password-reset-request", status_code=202)
-async def password_reset_request(
+def password_reset_request(
     reset_data: PasswordResetRequest,
     db: Session = Depends(get_db)
 ):
@@ -90,7 +90,7 @@ async def password_reset_request(
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information."""
     return UserResponse(
         id=str(current_user.id),
@@ -102,7 +102,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 
 @router.put("/me/preferences", response_model=UserResponse)
-async def update_user_preferences(
+def update_user_preferences(
     preferences_update: UserPreferencesUpdate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -12,7 +12,7 @@ router = APIRouter()
 
 
 @router.get("", response_model=Dict[str, List[FormatResponse]])
-async def get_formats(
+def get_formats(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Dict, List
-from app.core.database import get_db
-from app.api.dependencies import get_current_user
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db
+from app.api.dependencies import get_current_user, begin_idempotent_request
+from app.api.responses import ranged_file_response
 from app.models.user import User
+from app.models.generation_job import GenerationJob, JobStatus
 from app.models.generated_asset import GeneratedAsset
 from app.schemas.generation import (
     GenerationRequest,
@@ -12,45 +15,75 @@ from app.schemas.generation import (
     GenerationStatusResponse,
     GeneratedAssetResponse,
     ManualEdits,
+    BulkEditRequest,
+    EditBatchResponse,
     DownloadRequest,
     DownloadResponse,
-    PromptEditRequest
+    ExportResponse,
+    PromptEditRequest,
+    TaskStatusResponse
 )
 from app.services.generation_service import GenerationService
+from app.services.celery_service import CeleryService
+from app.services.progress_service import ProgressService
+from app.services.idempotency_service import IdempotencyService
+from app.services.export_service import ExportService
+from app.services.edit_render_service import EditRenderService
+from app.services.overlay_service import OverlayService
+from app.services.edit_batch_service import EditBatchService
 from app.tasks.generation_tasks import process_generation_job
-import tempfile
-import zipfile
-import os
-import shutil
-from starlette.background import BackgroundTask
+from app.tasks.export_tasks import process_export_job
+from app.tasks.edit_tasks import process_edit_batch
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+JOB_TERMINAL_STATUSES = (JobStatus.COMPLETED.value, JobStatus.FAILED.value, JobStatus.CANCELLED.value)
+
 
 @router.post("", response_model=GenerationResponse)
-async def start_generation(
+def start_generation(
     request: GenerationRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Start a new generation job"""
+    """
+    Start a new generation job. An identical request that is still pending or
+    processing returns the existing job instead of queueing the work again.
+    """
+    payload = request.dict()
+    replay = begin_idempotent_request("generate", current_user, idempotency_key, payload)
+    if replay is not None:
+        return GenerationResponse(**replay)
+    
     try:
-        # Create generation job
-        job = GenerationService.create_generation_job(db, request, current_user)
+        # Create generation job (or reuse the identical one in flight)
+        job, created = GenerationService.create_generation_job(db, request, current_user)
         
-        # Queue background task
-        process_generation_job.delay(str(job.id), request.dict())
+        if created:
+            # Queue background task on the bulk lane
+            try:
+                task = process_generation_job.delay(str(job.id), payload)
+            except Exception:
+                GenerationService.fail_unqueued_job(db, job)
+                raise
+            GenerationService.set_job_task_id(db, job, task.id)
         
-        return GenerationResponse(jobId=str(job.id))
+        response = GenerationResponse(jobId=str(job.id))
+        IdempotencyService.complete("generate", current_user.id, idempotency_key, payload, response.dict())
+        return response
         
     except ValueError as e:
+        IdempotencyService.release("generate", current_user.id, idempotency_key)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
     except Exception as e:
+        IdempotencyService.release("generate", current_user.id, idempotency_key)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error starting generation: {str(e)}"
@@ -58,21 +91,31 @@ async def start_generation(
 
 
 @router.post("/prompt-edit", status_code=status.HTTP_202_ACCEPTED)
-async def prompt_edit(
+def prompt_edit(
     request: PromptEditRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Accepts a prompt to edit a single asset."""
+    payload = request.dict()
+    replay = begin_idempotent_request("prompt-edit", current_user, idempotency_key, payload)
+    if replay is not None:
+        return replay
+    
     try:
         task_id = GenerationService.dispatch_prompt_edit_task(db, request, current_user)
-        return {"taskId": task_id}
+        response = {"taskId": task_id}
+        IdempotencyService.complete("prompt-edit", current_user.id, idempotency_key, payload, response)
+        return response
     except ValueError as e:
+        IdempotencyService.release("prompt-edit", current_user.id, idempotency_key)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
     except Exception as e:
+        IdempotencyService.release("prompt-edit", current_user.id, idempotency_key)
         logger.error(f"Error dispatching prompt edit task: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -80,8 +123,26 @@ async def prompt_edit(
         )
 
 
+@router.get("/prompt-edit/{task_id}", response_model=TaskStatusResponse)
+def get_prompt_edit_status(
+    task_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the state and interactive-queue position of a prompt edit task"""
+    task_status = CeleryService.get_task_status(task_id)
+    queue_position = None
+    if task_status["status"] == "PENDING":
+        queue_position = CeleryService.get_queue_position("generation_interactive", task_id)
+    
+    return TaskStatusResponse(
+        taskId=task_id,
+        status=task_status["status"],
+        queuePosition=queue_position
+    )
+
+
 @router.get("/{job_id}/status", response_model=GenerationStatusResponse)
-async def get_generation_status(
+def get_generation_status(
     job_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -94,6 +155,74 @@ async def get_generation_status(
             detail="Generation job not found"
         )
     
+    return GenerationStatusResponse(
+        status=job.status,
+        progress=GenerationService.get_live_progress(job),
+        queuePosition=GenerationService.get_queue_position(job)
+    )
+
+
+def _job_status_event(job_id: str) -> Optional[Dict[str, Any]]:
+    """Job status read in a short-lived session, for idle SSE streams to re-check"""
+    db = SessionLocal()
+    try:
+        job = db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
+        if not job:
+            return None
+        return {"event": "progress", "kind": "job", "id": job_id, "status": job.status.value, "progress": job.progress or 0}
+    finally:
+        db.close()
+
+
+@router.get("/{job_id}/events")
+def stream_generation_events(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream live job progress and per-unit completion events (Server-Sent Events)"""
+    job = GenerationService.get_job_by_id(db, job_id, current_user)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Generation job not found"
+        )
+    
+    job_id = str(job.id)
+    initial = {
+        "event": "progress",
+        "kind": "job",
+        "id": job_id,
+        "status": job.status.value,
+        "progress": job.progress or 0,
+        "queuePosition": GenerationService.get_queue_position(job)
+    }
+    # The stream can stay open for long: give the connection back to the pool now
+    db.close()
+    return StreamingResponse(
+        ProgressService.stream(
+            "job", job_id, initial, JOB_TERMINAL_STATUSES, refresh=lambda: _job_status_event(job_id)
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/{job_id}/cancel", response_model=GenerationStatusResponse)
+def cancel_generation(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Request cooperative cancellation of a generation job"""
+    job = GenerationService.get_job_by_id(db, job_id, current_user)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Generation job not found"
+        )
+    
+    job = GenerationService.cancel_job(db, job)
     return GenerationStatusResponse(
         status=job.status,
         progress=job.progress
@@ -101,7 +230,7 @@ async def get_generation_status(
 
 
 @router.get("/{job_id}/results", response_model=Dict[str, List[GeneratedAssetResponse]])
-async def get_generation_results(
+def get_generation_results(
     job_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -114,7 +243,9 @@ async def get_generation_results(
             detail="Generation job not found"
         )
     
-    if job.status != "completed":
+    # Progressive jobs expose their drafts (and refined renders) while still running
+    in_progress = job.status in (JobStatus.PENDING, JobStatus.PROCESSING) and GenerationService.has_results(db, job)
+    if job.status != "completed" and not in_progress:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Generation job is not completed yet"
@@ -124,13 +255,15 @@ async def get_generation_results(
 
 
 @router.get("/generated-assets/{asset_id}", response_model=GeneratedAssetResponse)
-async def get_generated_asset(
+def get_generated_asset(
     asset_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a single generated asset"""
-    asset = db.query(GeneratedAsset).filter(GeneratedAsset.id == asset_id).first()
+    asset = db.query(GeneratedAsset).options(
+        *GenerationService.generated_asset_load_options()
+    ).filter(GeneratedAsset.id == asset_id).first()
     if not asset:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -148,7 +281,7 @@ async def get_generated_asset(
 
 
 @router.put("/generated-assets/{asset_id}", response_model=GeneratedAssetResponse)
-async def update_generated_asset(
+def update_generated_asset(
     asset_id: str,
     edits: ManualEdits,
     db: Session = Depends(get_db),
@@ -172,11 +305,16 @@ async def update_generated_asset(
     try:
         # Apply manual edits
         updated_asset = GenerationService.apply_manual_edits(
-            db, asset, edits.dict(exclude_unset=True)
+            db, asset, edits.dict(exclude_unset=True), current_user.organization_id
         )
         
         return GenerationService.convert_to_response(updated_asset)
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -184,143 +322,297 @@ async def update_generated_asset(
         )
 
 
-@router.post("/download")
-async def create_download(
-    request: DownloadRequest,
+@router.post("/generated-assets/{asset_id}/preview")
+def preview_generated_asset_edits(
+    asset_id: str,
+    edits: ManualEdits,
+    size: Optional[int] = None,
+    format: str = "jpeg",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Creates a zip file of selected assets and returns it directly."""
-    logger.info(f"Download request: {request}")
-    
-    # Query assets
-    assets = db.query(GeneratedAsset).filter(
-        GeneratedAsset.id.in_(request.assetIds)
-    ).all()
+    """
+    Live preview of proposed edits: applies them to a low-resolution working
+    copy and returns a small JPEG or WebP. Nothing is stored. A sync handler,
+    so FastAPI runs the Pillow work in its threadpool, off the event loop.
+    """
+    if format not in ("jpeg", "webp"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Preview format must be jpeg or webp"
+        )
+    owner = db.query(GeneratedAsset.storage_path, GenerationJob.user_id).join(
+        GenerationJob, GeneratedAsset.job_id == GenerationJob.id
+    ).filter(GeneratedAsset.id == asset_id).first()
+    if not owner:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Generated asset not found"
+        )
+    storage_path, user_id = owner
+    if user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
     
-    if not assets:
+    try:
+        operations = OverlayService.resolve_styles(
+            db, EditRenderService.normalize_operations(edits.dict(exclude_unset=True)), current_user.organization_id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    content = EditRenderService.render_live_preview(
+        storage_path, operations, size or settings.EDIT_LIVE_PREVIEW_EDGE, format
+    )
+    return Response(content=content, media_type=f"image/{format}", headers={"Cache-Control": "no-store"})
+
+
+@router.post("/edit-batches", response_model=EditBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_edit_batch(
+    request: BulkEditRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Apply one edit stack to many generated assets: the listed ones, or every
+    output of a job. Ownership is checked up front; the edits are applied by
+    a worker and the returned batch reports aggregated progress.
+    """
+    if bool(request.assetIds) == bool(request.jobId):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either assetIds or jobId"
+        )
+    rows = GenerationService.get_generated_asset_owners(db, request.assetIds, request.jobId)
+    if not rows:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No assets found"
         )
+    if {owner_id for _, owner_id in rows} != {current_user.id}:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to one or more assets"
+        )
+    if len(rows) > settings.EDIT_BATCH_MAX_ASSETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A bulk edit is limited to {settings.EDIT_BATCH_MAX_ASSETS} assets"
+        )
     
-    logger.info(f"Found {len(assets)} assets")
+    try:
+        batch = EditBatchService.create_batch(
+            db, current_user, [asset_id for asset_id, _ in rows],
+            request.edits.dict(exclude_unset=True), job_id=request.jobId
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    task = process_edit_batch.delay(str(batch.id))
+    EditBatchService.set_task_id(db, batch, task.id)
+    return EditBatchService.to_response(batch)
+
+
+@router.get("/edit-batches/{batch_id}", response_model=EditBatchResponse)
+def get_edit_batch(
+    batch_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the progress of a bulk edit, with the assets that could not be edited"""
+    batch = EditBatchService.get_batch(db, batch_id, current_user)
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Edit batch not found"
+        )
+    return EditBatchService.to_response(batch)
+
+
+@router.get("/generated-assets/{asset_id}/render")
+def render_generated_asset(
+    asset_id: str,
+    resolution: str = "preview",
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a generated asset with its edit stack applied, at 'preview' (editor)
+    or 'full' resolution. Renders are made on first request and cached.
+    """
+    if resolution not in EditRenderService.RESOLUTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Resolution must be one of {', '.join(EditRenderService.RESOLUTIONS)}"
+        )
+    asset = db.query(GeneratedAsset).filter(GeneratedAsset.id == asset_id).first()
+    if not asset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Generated asset not found"
+        )
+    if asset.job.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
     
-    # Verify user owns all assets
-    for asset in assets:
-        if asset.job.user_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied to one or more assets"
-            )
+    operations = EditRenderService.get_operations(asset.manual_edits)
+    rendered = EditRenderService.render(asset.storage_path, operations, resolution)
+    return FileResponse(os.path.join(settings.UPLOAD_DIR, rendered))
+
+
+def _load_owned_assets(db: Session, asset_ids, current_user: User, with_source: bool = False) -> List[GeneratedAsset]:
+    """Load the selected generated assets, checking the user owns all of them"""
+    rows = GenerationService.get_generated_assets_with_owner(db, asset_ids, with_source)
+    
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No assets found"
+        )
     
-    # Create temporary directory
-    temp_dir = tempfile.mkdtemp()
-    logger.info(f"Created temp directory: {temp_dir}")
+    logger.info(f"Found {len(rows)} assets")
     
+    # Verify user owns all assets
+    if {owner_id for _, owner_id in rows} != {current_user.id}:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to one or more assets"
+        )
+    return [asset for asset, _ in rows]
+
+
+def _build_export_options(request: DownloadRequest) -> Dict[str, str]:
+    """Validate the format, quality and grouping of a download request"""
     try:
-        zip_filename = f"AssetForge_Assets_{len(assets)}_items.zip"
-        zip_path = os.path.join(temp_dir, zip_filename)
-        
-        # Track files added to zip for debugging
-        files_added = []
-        files_missing = []
-        
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for i, asset in enumerate(assets):
-                # Get the absolute path to the file
-                file_on_disk = os.path.abspath(os.path.join("uploads", asset.storage_path))
-                
-                logger.info(f"Processing asset {i+1}: {str(asset.id)}")  # Convert UUID to string
-                logger.info(f"Storage path: {asset.storage_path}")
-                logger.info(f"Full file path: {file_on_disk}")
-                logger.info(f"File exists: {os.path.exists(file_on_disk)}")
-                
-                if os.path.exists(file_on_disk):
-                    # Get file size for debugging
-                    file_size = os.path.getsize(file_on_disk)
-                    logger.info(f"File size: {file_size} bytes")
-                    
-                    # Create a descriptive name for the file inside the zip
-                    try:
-                        platform_name = asset.asset_format.platform.name if asset.asset_format and asset.asset_format.platform else "Unknown_Platform"
-                        format_name = asset.asset_format.name if asset.asset_format else "untitled"
-                    except AttributeError:
-                        platform_name = "Unknown_Platform"
-                        format_name = "untitled"
-                    
-                    # Clean filename to avoid path issues
-                    platform_name = "".join(c for c in platform_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                    format_name = "".join(c for c in format_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                    
-                    file_type = asset.file_type or "unknown"
-                    if '/' in file_type:
-                        file_extension = file_type.split('/')[-1]
-                    else:
-                        file_extension = file_type
-                    asset_id_short = str(asset.id)[:8]  # Convert UUID to string first
-                    zip_internal_path = f"{platform_name}/{format_name}_{asset_id_short}.{file_extension}"
-                    
-                    # Add file to zip
-                    zip_file.write(file_on_disk, zip_internal_path)
-                    files_added.append({
-                        "asset_id": str(asset.id),  # Convert UUID to string
-                        "original_path": file_on_disk,
-                        "zip_path": zip_internal_path,
-                        "size": file_size
-                    })
-                    logger.info(f"Added to zip: {zip_internal_path}")
-                else:
-                    files_missing.append({
-                        "asset_id": str(asset.id),  # Convert UUID to string
-                        "expected_path": file_on_disk
-                    })
-                    logger.warning(f"File not found: {file_on_disk}")
-        
-        # Check if zip file was created successfully
-        if not os.path.exists(zip_path):
-            raise Exception("Zip file was not created")
-        
-        zip_size = os.path.getsize(zip_path)
-        logger.info(f"Zip file created successfully: {zip_path}")
-        logger.info(f"Zip file size: {zip_size} bytes")
-        logger.info(f"Files added: {len(files_added)}")
-        logger.info(f"Files missing: {len(files_missing)}")
-        
-        if zip_size == 0:
-            raise Exception("Zip file is empty")
-        
-        if len(files_added) == 0:
-            raise Exception("No files were added to the zip")
-        
-        # Return the zip file with proper cleanup
-        def cleanup_temp_dir():
-            try:
-                shutil.rmtree(temp_dir)
-                logger.info(f"Cleaned up temp directory: {temp_dir}")
-            except Exception as e:
-                logger.error(f"Error cleaning up temp directory: {e}")
-        
-        return FileResponse(
-            path=zip_path,
-            media_type='application/zip',
-            filename=zip_filename,
-            headers={
-                "Content-Disposition": f"attachment; filename=\"{zip_filename}\"",
-                "Content-Length": str(zip_size)
-            },
-            background=BackgroundTask(cleanup_temp_dir)
+        return ExportService.build_options(request)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
-        
-    except Exception as e:
-        # Clean up temp directory on error
+
+
+@router.post("/download")
+def create_download(
+    request: DownloadRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Streams a zip file of selected assets, built on the fly, in the requested
+    format, quality and grouping.
+    """
+    logger.info(f"Download request: {request}")
+    options = _build_export_options(request)
+    assets = _load_owned_assets(db, request.assetIds, current_user, with_source=options["grouping"] == "batch")
+    
+    entries, _ = ExportService.build_entries(assets, options)
+    if not entries:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No asset files found for download"
+        )
+    logger.info(f"Streaming {len(entries)} files ({len(assets) - len(entries)} missing)")
+    
+    zip_filename = f"AssetForge_Assets_{len(assets)}_items.zip"
+    # Entries are plain paths, bytes and EditedSources: a slow download must not hold a pooled connection
+    db.close()
+    # A sync generator: Starlette iterates it in the threadpool, so file reads stay off the event loop
+    return StreamingResponse(
+        ExportService.stream_archive(entries, options),
+        media_type='application/zip',
+        headers={"Content-Disposition": f"attachment; filename=\"{zip_filename}\""}
+    )
+
+
+@router.post("/exports", response_model=ExportResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_export(
+    request: DownloadRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Start an asynchronous export of the selected assets. The archive is built
+    by a worker; an identical selection that was already exported is served
+    from storage right away.
+    """
+    _build_export_options(request)
+    assets = _load_owned_assets(db, request.assetIds, current_user)
+    job, created = ExportService.create_export(db, current_user, assets, request)
+    if created and job.status == JobStatus.PENDING:
         try:
-            shutil.rmtree(temp_dir)
-        except:
-            pass
-        
-        logger.error(f"Error creating download: {str(e)}")
+            task = process_export_job.delay(str(job.id))
+        except Exception as e:
+            logger.error(f"Could not queue export {job.id}: {e}")
+            ExportService.fail_unqueued_export(db, job, e)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Could not queue the export, please try again"
+            )
+        ExportService.set_task_id(db, job, task.id)
+    return ExportService.to_response(job)
+
+
+@router.get("/exports/{export_id}", response_model=ExportResponse)
+def get_export_status(
+    export_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the status of an export; `downloadUrl` is set once the archive is ready"""
+    job = ExportService.get_export(db, export_id, current_user)
+    if not job:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error creating download: {str(e)}"
-        )
\ No newline at end of file
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export not found"
+        )
+    return ExportService.to_response(job)
+
+
+@router.get("/exports/{export_id}/download")
+def download_export(
+    export_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None, alias="If-Range"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Download the archive of a completed export. Supports HTTP Range to resume."""
+    job = ExportService.get_export(db, export_id, current_user)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export not found"
+        )
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export is {job.status.value}"
+        )
+    if not ExportService.archive_exists(job):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Export archive has expired, please export again"
+        )
+    
+    archive_path = ExportService.full_path(job.storage_path)
+    filename = f"AssetForge_Export_{len(job.asset_ids)}_items.zip"
+    etag = job.cache_key
+    # A slow (or resumed) download must not hold a pooled connection
+    db.close()
+    return ranged_file_response(
+        archive_path,
+        filename=filename,
+        media_type="application/zip",
+        range_header=range_header,
+        if_range=if_range,
+        etag=etag
+    )
@@ -14,7 +14,7 @@ router = APIRouter()
 
 
 @router.get("/celery/workers", response_model=Dict[str, Any])
-async def get_worker_stats(admin_user: User = Depends(get_admin_user)):
+def get_worker_stats(admin_user: User = Depends(get_admin_user)):
     """Get Celery worker statistics (admin only)"""
     try:
         stats = CeleryService.get_worker_stats()
@@ -34,7 +34,7 @@ async def get_worker_stats(admin_user: User = Depends(get_admin_user)):
 
 
 @router.get("/celery/task/{task_id}", response_model=Dict[str, Any])
-async def get_task_status(
+def get_task_status(
     task_id: str,
     admin_user: User = Depends(get_admin_user)
 ):
@@ -49,13 +49,14 @@ async def get_task_status(
 
 
 @router.post("/celery/task/{task_id}/cancel", response_model=Dict[str, Any])
-async def cancel_task(
+def cancel_task(
     task_id: str,
+    terminate: bool = False,
     admin_user: User = Depends(get_admin_user)
 ):
-    """Cancel a running Celery task (admin only)"""
+    """Cancel a Celery task (admin only); running tasks are only killed with terminate=true"""
     try:
-        success = CeleryService.cancel_task(task_id)
+        success = CeleryService.cancel_task(task_id, terminate=terminate)
         return {
             "task_id": task_id,
             "cancelled": success,
@@ -69,13 +70,13 @@ async def cancel_task(
 
 
 @router.post("/maintenance/cleanup", response_model=Dict[str, Any])
-async def trigger_maintenance(admin_user: User = Depends(get_admin_user)):
+def trigger_maintenance(admin_user: User = Depends(get_admin_user)):
     """Trigger maintenance tasks (admin only)"""
     try:
         CeleryService.schedule_maintenance_tasks()
         return {
             "message": "Maintenance tasks scheduled successfully",
-            "tasks": ["cleanup_failed_jobs", "cleanup_orphaned_files", "health_check"]
+            "tasks": ["cleanup_failed_jobs", "cleanup_orphaned_files", "cleanup_expired_exports", "health_check"]
         }
     except Exception as e:
         raise HTTPException(
@@ -83,8 +84,20 @@ async def trigger_maintenance(admin_user: User = Depends(get_admin_user)):
             detail=f"Error scheduling maintenance: {str(e)}"
         )
 
+@router.get("/event-loop", response_model=Dict[str, Any])
+def get_event_loop_stats(admin_user: User = Depends(get_admin_user)):
+    """
+    Event-loop lag and blocking events of this API process, with the route and
+    a stack sample of each block (admin only). Requires LOOP_MONITOR_ENABLED.
+    """
+    if not settings.LOOP_MONITOR_ENABLED:
+        return {"enabled": False}
+    from app.core.loop_monitor import loop_monitor
+    return loop_monitor.snapshot()
+
+
 @router.get("/health-check")
-async def get_system_health(
+def get_system_health(
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
 ):
@@ -17,7 +17,7 @@ router = APIRouter()
 
 
 @router.get("/rules/ai-behavior", response_model=AIBehaviorRule)
-async def get_user_ai_behavior_rules(
+def get_user_ai_behavior_rules(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -26,7 +26,7 @@ async def get_user_ai_behavior_rules(
 
 
 @router.get("/rules/adaptation", response_model=AdaptationRule)
-async def get_user_adaptation_rules(
+def get_user_adaptation_rules(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -35,7 +35,7 @@ async def get_user_adaptation_rules(
 
 
 @router.get("/rules/upload-moderation", response_model=UploadModerationRule)
-async def get_user_upload_moderation_rules(
+def get_user_upload_moderation_rules(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -44,7 +44,7 @@ async def get_user_upload_moderation_rules(
 
 
 @router.get("/text-style-sets", response_model=List[TextStyleSetResponse])
-async def get_user_text_style_sets(
+def get_user_text_style_sets(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -1,10 +1,11 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
-from app.core.database import get_db
-from app.api.dependencies import get_current_user
+from app.core.database import SessionLocal, get_db
+from app.api.dependencies import get_current_user, begin_idempotent_request
 from app.models.user import User
 from app.models.project import Project, ProjectStatus
 from app.models.asset import Asset
@@ -19,15 +20,26 @@ from app.schemas.project import (
 )
 from app.services.project_service import ProjectService
 from app.services.file_service import FileService
+from app.services.progress_service import ProgressService
+from app.services.idempotency_service import IdempotencyService
 from app.tasks.asset_processing import process_uploaded_assets
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Statuses after which no more analysis progress is published
+PROJECT_TERMINAL_STATUSES = (
+    ProjectStatus.READY_FOR_REVIEW.value,
+    ProjectStatus.GENERATING.value,
+    ProjectStatus.COMPLETED.value,
+    ProjectStatus.FAILED.value,
+    ProjectStatus.CANCELLED.value
+)
+
 
 @router.get("", response_model=ProjectListResponse)
-async def get_projects(
+def get_projects(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     limit: int = 10,
@@ -59,13 +71,18 @@ async def get_projects(
 
 
 @router.post("/upload", response_model=ProjectUploadResponse)
-async def upload_project_assets(
+def upload_project_assets(
     projectName: str = Form(...),
     files: List[UploadFile] = File(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Create project and upload assets"""
+    """
+    Create project and upload assets. A sync handler: saving the files,
+    reading their metadata with Pillow and the database writes all run in the
+    API threadpool instead of blocking the event loop.
+    """
     if not files:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -76,17 +93,26 @@ async def upload_project_assets(
     for file in files:
         FileService.validate_file(file)
     
-    # Create project
-    from app.schemas.project import ProjectCreate
-    project_data = ProjectCreate(name=projectName)
-    project = ProjectService.create_project(db, project_data, current_user)
+    # A retried upload with the same key returns the project created the first time
+    payload = {
+        "projectName": projectName,
+        "files": [(file.filename, file.content_type, getattr(file, "size", None)) for file in files]
+    }
+    replay = begin_idempotent_request("upload", current_user, idempotency_key, payload)
+    if replay is not None:
+        return ProjectUploadResponse(**replay)
     
+    from app.schemas.project import ProjectCreate
+    assets_created = []
     try:
+        # Create project
+        project_data = ProjectCreate(name=projectName)
+        project = ProjectService.create_project(db, project_data, current_user)
+        
         # Save files and create asset records
-        assets_created = []
         for file in files:
             # Save file
-            storage_path, file_size, checksum = await FileService.save_file(
+            storage_path, file_size, checksum = FileService.save_file(
                 file, str(project.id)
             )
             
@@ -114,9 +140,12 @@ async def upload_project_assets(
         # Queue background task for AI processing
         process_uploaded_assets.delay(str(project.id))
         
-        return ProjectUploadResponse(projectId=str(project.id))
+        response = ProjectUploadResponse(projectId=str(project.id))
+        IdempotencyService.complete("upload", current_user.id, idempotency_key, payload, response.dict())
+        return response
         
     except Exception as e:
+        IdempotencyService.release("upload", current_user.id, idempotency_key)
         # Rollback and cleanup files on error
         db.rollback()
         for asset in assets_created:
@@ -128,7 +157,7 @@ async def upload_project_assets(
         )
 
 @router.get("/recent-activity", response_model=List[Activity])
-async def get_recent_activity(
+def get_recent_activity(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     limit: int = 5
@@ -155,7 +184,7 @@ async def get_recent_activity(
     return activities
 
 @router.get("/{project_id}/status", response_model=ProjectStatusResponse)
-async def get_project_status(
+def get_project_status(
     project_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -176,8 +205,81 @@ async def get_project_status(
     )
 
 
+def _project_status_event(project_id: str) -> Optional[Dict[str, Any]]:
+    """Project status read in a short-lived session, for idle SSE streams to re-check"""
+    db = SessionLocal()
+    try:
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            return None
+        return {
+            "event": "progress",
+            "kind": "project",
+            "id": project_id,
+            "status": project.status.value,
+            "progress": ProjectService.calculate_processing_progress(project)
+        }
+    finally:
+        db.close()
+
+
+@router.get("/{project_id}/events")
+def stream_project_events(
+    project_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream live analysis progress and per-asset completion events (Server-Sent Events)"""
+    project = ProjectService.get_project_by_id(db, project_id, current_user)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    project_id = str(project.id)
+    initial = {
+        "event": "progress",
+        "kind": "project",
+        "id": project_id,
+        "status": project.status.value,
+        "progress": ProjectService.calculate_processing_progress(project)
+    }
+    # The stream can stay open for long: give the connection back to the pool now
+    db.close()
+    return StreamingResponse(
+        ProgressService.stream(
+            "project", project_id, initial, PROJECT_TERMINAL_STATUSES,
+            refresh=lambda: _project_status_event(project_id)
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/{project_id}/cancel", response_model=ProjectStatusResponse)
+def cancel_project(
+    project_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Request cooperative cancellation of a project's analysis and generation jobs"""
+    project = ProjectService.get_project_by_id(db, project_id, current_user)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    project = ProjectService.cancel_project(db, project)
+    return ProjectStatusResponse(
+        status=project.status,
+        progress=ProjectService.calculate_processing_progress(project)
+    )
+
+
 @router.get("/{project_id}/preview", response_model=List[AssetPreview])
-async def get_project_preview(
+def get_project_preview(
     project_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -228,7 +330,7 @@ async def get_project_preview(
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(
+def get_project(
     project_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -246,7 +348,7 @@ async def get_project(
 
 
 @router.delete("/{project_id}", status_code=204)
-async def delete_project(
+def delete_project(
     project_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -259,6 +361,9 @@ async def delete_project(
             detail="Project not found"
         )
     
+    # Stop any in-flight analysis or generation before removing the project
+    ProjectService.cancel_project(db, project)
+    
     # Delete associated files
     assets = ProjectService.get_project_assets(db, project)
     for asset in assets:
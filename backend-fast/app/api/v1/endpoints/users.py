@@ -19,7 +19,7 @@ router = APIRouter()
 
 
 @router.get("/me/preferences", response_model=UserResponse)
-async def get_user_preferences(current_user: User = Depends(get_current_user)):
+def get_user_preferences(current_user: User = Depends(get_current_user)):
     """Get current user preferences - alternative endpoint for UI compatibility"""
     return UserResponse(
         id=str(current_user.id),
@@ -31,7 +31,7 @@ async def get_user_preferences(current_user: User = Depends(get_current_user)):
 
 
 @router.get("/me/editing-rules", response_model=ManualEditingRule)
-async def get_my_editing_rules(
+def get_my_editing_rules(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -40,7 +40,7 @@ async def get_my_editing_rules(
 
 
 @router.put("/me/preferences", response_model=UserResponse)
-async def update_user_preferences_alt(
+def update_user_preferences_alt(
     preferences_update: dict,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -64,7 +64,7 @@ async def update_user_preferences_alt(
 
 
 @router.post("/", response_model=UserSchema)
-async def create_user(
+def create_user(
     user_data: UserCreate,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -107,7 +107,7 @@ async def create_user(
 
 
 @router.get("/", response_model=List[UserSchema])
-async def list_users(
+def list_users(
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user),
     skip: int = 0,
@@ -119,7 +119,7 @@ async def list_users(
 
 
 @router.get("/{user_id}", response_model=UserSchema)
-async def get_user(
+def get_user(
     user_id: str,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -135,7 +135,7 @@ async def get_user(
 
 
 @router.put("/{user_id}", response_model=UserSchema)
-async def update_user(
+def update_user(
     user_id: str,
     user_update: UserUpdate,
     db: Session = Depends(get_db),
@@ -163,7 +163,7 @@ async def update_user(
 
 
 @router.put("/{user_id}/deactivate", status_code=204)
-async def deactivate_user(
+def deactivate_user(
     user_id: str,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -181,7 +181,7 @@ async def deactivate_user(
     return None
 
 @router.put("/{user_id}/activate", status_code=204)
-async def activate_user(
+def activate_user(
     user_id: str,
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_admin_user)
@@ -200,7 +200,7 @@ async def activate_user(
 
 
 @router.post("/register", response_model=UserSchema)
-async def register_user(
+def register_user(
     user_data: UserCreate,
     db: Session = Depends(get_db)
 ):
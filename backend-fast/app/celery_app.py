@@ -9,7 +9,7 @@ celery_app = Celery(
     "ai_creat",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=["app.tasks.asset_processing", "app.tasks.generation_tasks", "app.tasks.maintenance"]
+    include=["app.tasks.asset_processing", "app.tasks.generation_tasks", "app.tasks.maintenance", "app.tasks.webhook_tasks", "app.tasks.export_tasks", "app.tasks.edit_tasks"]
 )
 
 celery_app.conf.update(
@@ -29,6 +29,14 @@ celery_app.conf.update(
                 'x-dead-letter-routing-key': 'dead_letter'
             }
         ),
+        Queue(
+            'generation_interactive',
+            routing_key='generation_interactive',
+            queue_arguments={
+                'x-dead-letter-exchange': 'dead_letter_exchange',
+                'x-dead-letter-routing-key': 'dead_letter'
+            }
+        ),
         Queue(
             'generation',
             routing_key='generation',
@@ -38,16 +46,32 @@ celery_app.conf.update(
             }
         ),
         Queue('maintenance', routing_key='maintenance'),
+        Queue('webhooks', routing_key='webhooks'),
+        Queue('exports', routing_key='exports'),
+        Queue('edits', routing_key='edits'),
         Queue('dead_letter', exchange=dead_letter_exchange, routing_key='dead_letter')
     ),
     
     # Task routing
     task_routes={
         'app.tasks.asset_processing.process_uploaded_assets': {'queue': 'asset_processing'},
-        'app.tasks.generation_tasks.process_generation_job': {'queue': 'generation'},
-        'app.tasks.generation_tasks.process_prompt_edit_job': {'queue': 'generation'},
+        # Interactive lane: one-off prompt edits a user is waiting on
+        'app.tasks.generation_tasks.process_prompt_edit_job': {'queue': 'generation_interactive', 'priority': 0},
+        # Bulk lane: batch generation jobs
+        'app.tasks.generation_tasks.process_generation_job': {'queue': 'generation', 'priority': 6},
         'app.tasks.maintenance.*': {'queue': 'maintenance'},
+        'app.tasks.webhook_tasks.*': {'queue': 'webhooks'},
+        'app.tasks.export_tasks.*': {'queue': 'exports'},
+        'app.tasks.edit_tasks.*': {'queue': 'edits'},
+    },
+    
+    # Message priorities (Redis: 0 is consumed first). Workers listening on
+    # several queues drain them in the order given on the command line.
+    broker_transport_options={
+        'priority_steps': list(range(10)),
+        'queue_order_strategy': 'priority',
     },
+    task_default_priority=5,
     
     # Worker configuration
     worker_prefetch_multiplier=1,
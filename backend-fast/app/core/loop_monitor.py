@@ -0,0 +1,240 @@
+"""
+Event-loop blocking detector for the API process (opt-in, LOOP_MONITOR_ENABLED).
+
+A probe task on the event loop sleeps for LOOP_MONITOR_INTERVAL and measures
+how late it wakes up: that lag is how long other work kept the loop busy. A
+watchdog thread watches the probe's heartbeat; when it stalls for longer than
+LOOP_MONITOR_BLOCK_THRESHOLD, the watchdog samples the loop thread's stack
+(sys._current_frames) and the route of the request task that is running, so
+the blocking call can be found. Lag and block durations are kept as
+histograms and exposed on /monitoring/event-loop.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+import anyio
+import anyio.to_thread
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Cumulative histogram of durations in milliseconds (Prometheus-style buckets)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.count += 1
+        self.sum += value_ms
+        self.max = max(self.max, value_ms)
+        for i, bound in enumerate(self.buckets):
+            if value_ms <= bound:
+                self.counts[i] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sumMs": round(self.sum, 1),
+            "maxMs": round(self.max, 1),
+            "buckets": {**{str(bound): n for bound, n in zip(self.buckets, self.counts)}, "+Inf": self.count},
+        }
+
+
+class LoopMonitor:
+    """Measures event-loop lag and records what blocked the loop"""
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        max_events: int = 100,
+        stack_depth: int = 20
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+        self.lag = Histogram()
+        self.blocks = Histogram()
+        self.blocks_by_route: Counter = Counter()
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._requests: Dict[asyncio.Task, Scope] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._limiter: Optional[anyio.CapacityLimiter] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = 0.0
+        self._stall: Optional[Dict[str, Any]] = None  # Event sampled during the current stall
+        self._probe_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._probe_task is not None and not self._probe_task.done()
+
+    def start(self) -> None:
+        """Start the probe and the watchdog; call from the event loop (app lifespan)"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        # Only reachable from the loop; kept to report threadpool usage from any thread
+        self._limiter = anyio.to_thread.current_default_thread_limiter()
+        self._heartbeat = time.monotonic()
+        self._stopping.clear()
+        self._probe_task = self._loop.create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+        logger.info(
+            f"Event-loop monitor started (interval {self.interval * 1000:.0f}ms, "
+            f"threshold {self.threshold * 1000:.0f}ms)"
+        )
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._probe_task:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        if self._watchdog:
+            self._watchdog.join(timeout=self.interval * 2)
+            self._watchdog = None
+
+    def track_request(self, task: asyncio.Task, scope: Scope) -> None:
+        self._requests[task] = scope
+
+    def untrack_request(self, task: asyncio.Task) -> None:
+        self._requests.pop(task, None)
+
+    async def _probe(self) -> None:
+        while True:
+            started = time.monotonic()
+            self._heartbeat = started
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - started - self.interval)
+            self._record_lag(lag)
+
+    def _record_lag(self, lag: float) -> None:
+        lag_ms = lag * 1000
+        with self._lock:
+            self.lag.observe(lag_ms)
+            event, self._stall = self._stall, None
+            if lag < self.threshold:
+                return
+            if event is None:
+                # Too short for the watchdog to catch it in the act
+                event = {"timestamp": time.time(), "route": None, "stack": None}
+                self.events.append(event)
+            event["durationMs"] = round(lag_ms, 1)
+            self.blocks.observe(lag_ms)
+            self.blocks_by_route[event["route"] or "unknown"] += 1
+        logger.warning(f"Event loop blocked for {lag_ms:.0f}ms (route: {event['route'] or 'unknown'})")
+
+    def _watch(self) -> None:
+        """Watchdog thread: sample the loop thread's stack while the heartbeat is stalled"""
+        sampled_heartbeat = None
+        while not self._stopping.wait(self.interval / 2):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self.interval
+            if stalled < self.threshold or heartbeat == sampled_heartbeat:
+                continue
+            sampled_heartbeat = heartbeat
+            event = {
+                "timestamp": time.time(),
+                "route": self._current_route(),
+                "stack": self._sample_stack(),
+                "durationMs": None,  # Set once the loop runs again
+            }
+            with self._lock:
+                if self._heartbeat == heartbeat:
+                    self._stall = event
+                    self.events.append(event)
+
+    def _sample_stack(self) -> Optional[List[str]]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        return [line.rstrip() for line in traceback.format_stack(frame)[-self.stack_depth:]]
+
+    def _current_route(self) -> Optional[str]:
+        """Route of the request task running on the loop (read from the watchdog thread)"""
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            return None
+        scope = self._requests.get(task) if task else None
+        if scope is None:
+            return None
+        route = scope.get("route")
+        return f"{scope.get('method')} {getattr(route, 'path', None) or scope.get('path')}"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters, histograms and the most recent blocking events"""
+        limiter = self._limiter
+        with self._lock:
+            return {
+                "enabled": True,
+                "running": self.running,
+                "intervalMs": self.interval * 1000,
+                "thresholdMs": self.threshold * 1000,
+                "lag": self.lag.snapshot(),
+                "blocks": self.blocks.snapshot(),
+                "blocksByRoute": dict(self.blocks_by_route.most_common()),
+                "inFlightRequests": len(self._requests),
+                "threadpool": {
+                    "size": limiter.total_tokens,
+                    "busy": limiter.borrowed_tokens,
+                } if limiter else None,
+                "recentBlocks": list(reversed(self.events)),
+            }
+
+
+class LoopMonitorMiddleware:
+    """
+    Pure ASGI middleware: remembers which task serves which request, so the
+    watchdog can name the route that blocked the loop. (It must not be a
+    BaseHTTPMiddleware, which runs the app in a separate task.)
+    """
+
+    def __init__(self, app: ASGIApp, monitor: LoopMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        self.monitor.track_request(task, scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.untrack_request(task)
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL,
+    threshold=settings.LOOP_MONITOR_BLOCK_THRESHOLD,
+    max_events=settings.LOOP_MONITOR_MAX_EVENTS,
+    stack_depth=settings.LOOP_MONITOR_STACK_DEPTH
+)
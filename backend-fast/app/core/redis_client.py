@@ -0,0 +1,9 @@
+from functools import lru_cache
+import redis
+from .config import settings
+
+
+@lru_cache()
+def get_redis_client() -> redis.Redis:
+    """Shared Redis client for flags, caches and pub/sub (connections are pooled per process)"""
+    return redis.from_url(settings.REDIS_URL, socket_connect_timeout=2, socket_timeout=5)
@@ -9,6 +9,9 @@ from .asset_format import AssetFormat
 from .generated_asset import GeneratedAsset
 from .text_style_set import TextStyleSet
 from .app_setting import AppSetting
+from .webhook_endpoint import WebhookEndpoint
+from .export_job import ExportJob
+from .edit_batch import EditBatch
 from sqlalchemy.orm import relationship
 
 # Define relationships that might not be explicitly defined in the models
@@ -27,5 +30,8 @@ __all__ = [
     "AssetFormat",
     "GeneratedAsset",
     "TextStyleSet",
-    "AppSetting"
+    "AppSetting",
+    "WebhookEndpoint",
+    "ExportJob",
+    "EditBatch"
 ]
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+import uuid
+from app.core.database import Base
+from app.models.generation_job import JobStatus
+
+
+class EditBatch(Base):
+    __tablename__ = "edit_batches"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("generation_jobs.id", ondelete="SET NULL"))  # When a whole job was edited
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.PENDING)
+    progress = Column(Integer, default=0)
+    task_id = Column(String(255))  # Celery task applying the edits
+    asset_ids = Column(JSONB, nullable=False)  # Generated asset ids to edit
+    edits = Column(JSONB, nullable=False)  # ManualEdits payload with its validated, style-resolved operations
+    completed_count = Column(Integer, default=0)
+    failed_count = Column(Integer, default=0)
+    errors = Column(JSONB, default=dict)  # {asset_id: error message}
+    error_message = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True))
+
+    # Relationships
+    user = relationship("User")
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, BigInteger, Text, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+import uuid
+from app.core.database import Base
+from app.models.generation_job import JobStatus
+
+
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.PENDING)
+    progress = Column(Integer, default=0)
+    task_id = Column(String(255))  # Celery task building the archive
+    # Hash of the sorted asset selection and export options; names the cached archive
+    cache_key = Column(String(64), nullable=False, index=True)
+    asset_ids = Column(JSONB, nullable=False)  # Sorted list of generated asset ids
+    options = Column(JSONB, nullable=False)  # {"format": "jpeg", "quality": "high", "grouping": "batch"}
+    storage_path = Column(String)  # Archive path relative to the upload directory, once built
+    file_size = Column(BigInteger)
+    error_message = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True))
+
+    # Relationships
+    user = relationship("User")
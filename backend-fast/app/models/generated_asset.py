@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -13,15 +13,21 @@ class GeneratedAsset(Base):
     job_id = Column(UUID(as_uuid=True), ForeignKey("generation_jobs.id", ondelete="CASCADE"), nullable=False)
     original_asset_id = Column(UUID(as_uuid=True), ForeignKey("assets.id", ondelete="CASCADE"), nullable=False)
     asset_format_id = Column(UUID(as_uuid=True), ForeignKey("asset_formats.id", ondelete="SET NULL"))
+    # Identifies the unit of work within a job: "<asset>:<format or custom>:<width>x<height>"
+    unit_key = Column(String(255))
     storage_path = Column(String, nullable=False)
     file_type = Column(String(10), nullable=False)
     dimensions = Column(JSONB, nullable=False)  # {"width": 1080, "height": 1080}
     is_nsfw = Column(Boolean, default=False)
+    # Local draft shown while the AI-refined render is still pending (progressive generation)
+    is_draft = Column(Boolean, default=False)
     # JSONB to store current state of manual edits
     # Example: {"crop": {"x":0,"y":0,"w":1080,"h":1080}, "saturation": 1.1, "textOverlays": [...]}
     manual_edits = Column(JSONB)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (UniqueConstraint('job_id', 'unit_key', name='_job_unit_uc'),)
+
     # Relationships
     job = relationship("GenerationJob", back_populates="generated_assets")
     original_asset = relationship("Asset", back_populates="generated_assets")
@@ -12,6 +12,7 @@ class JobStatus(str, enum.Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class GenerationJob(Base):
@@ -22,6 +23,9 @@ class GenerationJob(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.PENDING)
     progress = Column(Integer, default=0)
+    task_id = Column(String(255))  # Celery task processing this job
+    # Hash of the request content (project, formats, sizes, prompt) used to spot duplicate submissions
+    request_fingerprint = Column(String(64), index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -21,3 +21,4 @@ class Organization(Base):
     repurposing_platforms = relationship("RepurposingPlatform", back_populates="organization")
     text_style_sets = relationship("TextStyleSet", back_populates="organization")
     app_settings = relationship("AppSetting", back_populates="organization")
+    webhook_endpoints = relationship("WebhookEndpoint", back_populates="organization")
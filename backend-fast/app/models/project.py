@@ -14,6 +14,7 @@ class ProjectStatus(str, enum.Enum):
     GENERATING = "generating"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class Project(Base):
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+import uuid
+from app.core.database import Base
+
+
+class WebhookEndpoint(Base):
+    __tablename__ = "webhook_endpoints"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
+    url = Column(String(2048), nullable=False)
+    # Shared secret used to sign every delivery (HMAC-SHA256)
+    secret = Column(String(255), nullable=False)
+    # Subscribed event names, e.g. ["generation.completed", "generation.failed"]
+    events = Column(JSONB, nullable=False)
+    is_active = Column(Boolean, default=True)
+    created_by_admin_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    organization = relationship("Organization", back_populates="webhook_endpoints")
+    created_by_admin = relationship("User")
@@ -8,6 +8,7 @@ class JobStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class CustomResize(BaseModel):
@@ -20,6 +21,7 @@ class GenerationRequest(BaseModel):
     formatIds: List[UUID4]
     customResizes: Optional[List[CustomResize]] = []
     prompt: Optional[str] = None
+    progressive: bool = False  # Return local drafts first, then replace them with AI-refined renders
 
 
 class GenerationResponse(BaseModel):
@@ -41,6 +43,13 @@ class PromptEditResponse(BaseModel):
 class GenerationStatusResponse(BaseModel):
     status: JobStatus
     progress: int
+    queuePosition: Optional[int] = None
+
+
+class TaskStatusResponse(BaseModel):
+    taskId: str
+    status: str
+    queuePosition: Optional[int] = None
 
 
 class TextOverlay(BaseModel):
@@ -56,13 +65,39 @@ class LogoOverlay(BaseModel):
     size: float  # Size as percentage of canvas width
 
 
+class EditOperation(BaseModel):
+    type: str  # crop, saturation, brightness, contrast, rotate, flip, text, logo
+    params: Dict[str, Any] = {}
+
+
 class ManualEdits(BaseModel):
+    # Ordered edit stack, always applied to the unedited render. When omitted,
+    # it is built from the crop and saturation fields below.
+    operations: Optional[List[EditOperation]] = None
     crop: Optional[Dict[str, float]] = None  # {"x": 0, "y": 0, "width": 1, "height": 1}
     saturation: Optional[float] = None  # 0.0 to 2.0
     textOverlays: Optional[List[TextOverlay]] = []
     logoOverlay: Optional[LogoOverlay] = None
 
 
+class BulkEditRequest(BaseModel):
+    # Either the generated assets to edit, or a generation job to edit every output of
+    assetIds: Optional[List[str]] = None
+    jobId: Optional[str] = None
+    edits: ManualEdits
+
+
+class EditBatchResponse(BaseModel):
+    batchId: str
+    status: JobStatus
+    progress: int
+    assetCount: int
+    completedCount: int
+    failedCount: int
+    errors: Dict[str, str] = {}  # Asset id -> why it could not be edited
+    error: Optional[str] = None
+
+
 class GeneratedAssetResponse(BaseModel):
     id: str
     originalAssetId: str
@@ -72,6 +107,7 @@ class GeneratedAssetResponse(BaseModel):
     formatName: str
     dimensions: Dict[str, int]
     isNsfw: bool
+    isDraft: bool = False
     manualEdits: Optional[Dict[str, Any]] = None
 
     class Config:
@@ -87,3 +123,13 @@ class DownloadRequest(BaseModel):
 
 class DownloadResponse(BaseModel):
     downloadUrl: str
+
+
+class ExportResponse(BaseModel):
+    exportId: str
+    status: JobStatus
+    progress: int
+    assetCount: int
+    fileSize: Optional[int] = None
+    downloadUrl: Optional[str] = None  # Set once the archive is ready; supports HTTP Range
+    error: Optional[str] = None
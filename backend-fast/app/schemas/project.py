@@ -11,6 +11,7 @@ class ProjectStatus(str, Enum):
     GENERATING = "generating"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class ProjectCreate(BaseModel):
@@ -0,0 +1,30 @@
+from pydantic import BaseModel, HttpUrl
+from typing import List, Optional
+from datetime import datetime
+
+
+class WebhookEndpointCreate(BaseModel):
+    url: HttpUrl
+    events: List[str]
+    secret: Optional[str] = None  # Generated when omitted
+
+
+class WebhookEndpointUpdate(BaseModel):
+    url: Optional[HttpUrl] = None
+    events: Optional[List[str]] = None
+    is_active: Optional[bool] = None
+
+
+class WebhookEndpointResponse(BaseModel):
+    id: str
+    url: str
+    events: List[str]
+    is_active: bool
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class WebhookEndpointCreatedResponse(WebhookEndpointResponse):
+    secret: str  # Only returned once, on creation
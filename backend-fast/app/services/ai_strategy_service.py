@@ -1,8 +1,9 @@
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from app.ai.factory import get_ai_provider
 from app.models.app_setting import AppSetting
 from app.models.user import User
+from app.services.rendition_service import RenditionService
 from sqlalchemy.orm import Session
 import os
 
@@ -38,6 +39,38 @@ class AIStrategyService:
         
         return "crop"
     
+    @staticmethod
+    def get_focal_point(
+        ai_metadata: Dict[str, Any],
+        focal_strategy: str = "face-centric"
+    ) -> Optional[Tuple[float, float]]:
+        """Get the focal point (as percentages of the image size) for the given strategy, if any."""
+        if focal_strategy == "face-centric":
+            faces = ai_metadata.get("faces", [])
+            if faces:
+                logger.info(f"Found {len(faces)} faces. Finding the largest one.")
+                primary_face = max(faces, key=lambda f: f.get("width", 0) * f.get("height", 0))
+                # Center of the face is x + width/2
+                focal_x = primary_face.get("x", 50) + (primary_face.get("width", 0) / 2)
+                focal_y = primary_face.get("y", 50) + (primary_face.get("height", 0) / 2)
+                logger.info(f"Identified primary face as focal point at ({focal_x:.2f}%, {focal_y:.2f}%)")
+                return focal_x, focal_y
+            logger.warning("Face-centric strategy chosen, but no faces found in metadata.")
+
+        elif focal_strategy == "product-centric":
+            objects = ai_metadata.get("objects", [])
+            if objects:
+                logger.info(f"Found {len(objects)} objects. Finding the most confident one.")
+                primary_object = max(objects, key=lambda o: o.get("confidence", 0))
+                # Center of the object is x + width/2
+                focal_x = primary_object.get("x", 50) + (primary_object.get("width", 0) / 2)
+                focal_y = primary_object.get("y", 50) + (primary_object.get("height", 0) / 2)
+                logger.info(f"Identified primary object '{primary_object.get('label')}' as focal point at ({focal_x:.2f}%, {focal_y:.2f}%)")
+                return focal_x, focal_y
+            logger.warning("Product-centric strategy chosen, but no objects found in metadata.")
+
+        return None
+
     @staticmethod
     def apply_smart_crop(
         image_path: str,
@@ -49,35 +82,11 @@ class AIStrategyService:
         """Apply smart cropping based on focal point strategy using pre-existing AI metadata."""
         try:
             logger.info(f"Attempting smart crop with strategy: '{focal_strategy}'")
-            if focal_strategy == "face-centric":
-                faces = ai_metadata.get("faces", [])
-                if faces:
-                    logger.info(f"Found {len(faces)} faces. Finding the largest one.")
-                    primary_face = max(faces, key=lambda f: f.get("width", 0) * f.get("height", 0))
-                    # Center of the face is x + width/2
-                    focal_x = primary_face.get("x", 50) + (primary_face.get("width", 0) / 2)
-                    focal_y = primary_face.get("y", 50) + (primary_face.get("height", 0) / 2)
-                    logger.info(f"Identified primary face as focal point at ({focal_x:.2f}%, {focal_y:.2f}%)")
-                    return AIStrategyService._crop_around_point(
-                        image_path, target_width, target_height, focal_x, focal_y
-                    )
-                else:
-                    logger.warning("Face-centric strategy chosen, but no faces found in metadata.")
-            
-            elif focal_strategy == "product-centric":
-                objects = ai_metadata.get("objects", [])
-                if objects:
-                    logger.info(f"Found {len(objects)} objects. Finding the most confident one.")
-                    primary_object = max(objects, key=lambda o: o.get("confidence", 0))
-                    # Center of the object is x + width/2
-                    focal_x = primary_object.get("x", 50) + (primary_object.get("width", 0) / 2)
-                    focal_y = primary_object.get("y", 50) + (primary_object.get("height", 0) / 2)
-                    logger.info(f"Identified primary object '{primary_object.get('label')}' as focal point at ({focal_x:.2f}%, {focal_y:.2f}%)")
-                    return AIStrategyService._crop_around_point(
-                        image_path, target_width, target_height, focal_x, focal_y
-                    )
-                else:
-                    logger.warning("Product-centric strategy chosen, but no objects found in metadata.")
+            focal_point = AIStrategyService.get_focal_point(ai_metadata, focal_strategy)
+            if focal_point:
+                return AIStrategyService._crop_around_point(
+                    image_path, target_width, target_height, focal_point[0], focal_point[1]
+                )
             
             # Fallback to center crop if no focal point is found or strategy is different
             logger.warning("No focal point found for smart crop. Falling back to center crop.")
@@ -98,6 +107,14 @@ class AIStrategyService:
         """Crop image around a specific focal point"""
         from PIL import Image
         
+        output_path = RenditionService.build_rendition_path(
+            image_path, "smart_crop", target_width, target_height,
+            focal_x=round(focal_x, 2), focal_y=round(focal_y, 2)
+        )
+        if os.path.exists(output_path):
+            logger.info(f"Reusing existing smart-cropped rendition '{output_path}'")
+            return output_path
+
         try:
             with Image.open(image_path) as img:
                 img_width, img_height = img.size
@@ -138,14 +155,12 @@ class AIStrategyService:
                 
                 logger.info(f"Final crop coordinates (L,T,R,B): ({left}, {top}, {right}, {bottom})")
 
-                # Crop and resize
-                cropped = img.crop((left, top, right, bottom))
+                # Crop (at reduced decode size where possible) and resize
+                cropped = RenditionService.crop_reduced(img, (left, top, right, bottom), target_width, target_height)
                 resized = cropped.resize((target_width, target_height), Image.Resampling.LANCZOS)
                 
                 # Save result
-                base, ext = os.path.splitext(image_path)
-                output_path = f"{base}_smart_crop{ext}"
-                resized.save(output_path)
+                RenditionService.atomic_save(resized, output_path)
                 logger.info(f"Saved smart-cropped image to '{output_path}'")
                 
                 return output_path
@@ -160,6 +175,11 @@ class AIStrategyService:
         from PIL import Image
         
         logger.info(f"Performing center crop for target {target_width}x{target_height}")
+        output_path = RenditionService.build_rendition_path(image_path, "center_crop", target_width, target_height)
+        if os.path.exists(output_path):
+            logger.info(f"Reusing existing center-cropped rendition '{output_path}'")
+            return output_path
+
         try:
             with Image.open(image_path) as img:
                 img_width, img_height = img.size
@@ -172,20 +192,19 @@ class AIStrategyService:
                     # Image is wider, crop width
                     new_width = int(img_height * target_ratio)
                     left = (img_width - new_width) // 2
-                    cropped = img.crop((left, 0, left + new_width, img_height))
+                    crop_box = (left, 0, left + new_width, img_height)
                 else:
                     # Image is taller, crop height
                     new_height = int(img_width / target_ratio)
                     top = (img_height - new_height) // 2
-                    cropped = img.crop((0, top, img_width, top + new_height))
+                    crop_box = (0, top, img_width, top + new_height)
+                cropped = RenditionService.crop_reduced(img, crop_box, target_width, target_height)
                 
                 # Resize to target dimensions
                 resized = cropped.resize((target_width, target_height), Image.Resampling.LANCZOS)
                 
                 # Save result
-                base, ext = os.path.splitext(image_path)
-                output_path = f"{base}_center_crop{ext}"
-                resized.save(output_path)
+                RenditionService.atomic_save(resized, output_path)
                 logger.info(f"Saved center-cropped image to '{output_path}'")
                 
                 return output_path
@@ -0,0 +1,158 @@
+import logging
+import os
+from typing import Tuple
+import numpy as np
+from PIL import Image, ImageFilter
+
+from app.core.config import settings
+from app.services.rendition_service import RenditionService
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundExtensionService:
+    """Fast local (CPU) background extension used by the 'extend' adaptation strategy"""
+
+    METHODS = ("edge_blur", "mirror", "gradient")
+
+    @staticmethod
+    def extend(image: Image.Image, target_width: int, target_height: int, method: str = None) -> Image.Image:
+        """
+        Fit the image inside the target size and fill the remaining bands.
+
+        Methods:
+            edge_blur - replicate the border pixels outwards, blurring more with distance
+            mirror    - mirror the image into the bands and feather it into a soft blur
+            gradient  - fade from the border pixels to the dominant border color of each side
+        """
+        method = method or settings.LOCAL_EXTEND_METHOD
+        if method not in BackgroundExtensionService.METHODS:
+            logger.warning(f"Unknown extend method '{method}', using 'edge_blur'")
+            method = "edge_blur"
+
+        source = image.convert("RGB")
+        scale = min(target_width / source.width, target_height / source.height)
+        fitted_size = (max(1, round(source.width * scale)), max(1, round(source.height * scale)))
+        if fitted_size != source.size:
+            source = source.resize(fitted_size, Image.Resampling.LANCZOS)
+
+        left = (target_width - source.width) // 2
+        top = (target_height - source.height) // 2
+        pad = (
+            (top, target_height - source.height - top),
+            (left, target_width - source.width - left),
+            (0, 0)
+        )
+        if not any(pad[0]) and not any(pad[1]):
+            return source
+
+        src = np.asarray(source)
+        box = (left, top, left + source.width, top + source.height)
+        distance = BackgroundExtensionService._distance_map(target_width, target_height, box)
+
+        if method == "mirror":
+            canvas = BackgroundExtensionService._mirror_feather(src, pad, distance)
+        elif method == "gradient":
+            canvas = BackgroundExtensionService._border_gradient(src, pad, box, target_width, target_height)
+        else:
+            canvas = BackgroundExtensionService._edge_blur(src, pad, distance)
+
+        # Keep the original pixels untouched
+        canvas.paste(source, (left, top))
+        return canvas
+
+    @staticmethod
+    def extend_file(source_path: str, target_width: int, target_height: int, method: str = None) -> str:
+        """Extend an image file to the target size and return the rendition path"""
+        method = method or settings.LOCAL_EXTEND_METHOD
+        output_path = RenditionService.build_rendition_path(
+            source_path, "extended", target_width, target_height, method=method
+        )
+        if os.path.exists(output_path):
+            logger.info(f"Reusing existing extended rendition '{output_path}'")
+            return output_path
+
+        with Image.open(source_path) as img:
+            extended = BackgroundExtensionService.extend(img, target_width, target_height, method)
+        RenditionService.atomic_save(extended, output_path)
+        logger.info(f"Saved extended image ({method}) to '{output_path}'")
+        return output_path
+
+    @staticmethod
+    def _distance_map(width: int, height: int, box: Tuple[int, int, int, int]) -> np.ndarray:
+        """Per-pixel distance (in pixels) from the source rectangle, 0 inside it"""
+        left, top, right, bottom = box
+        xs = np.arange(width, dtype=np.float32)
+        ys = np.arange(height, dtype=np.float32)
+        dx = np.maximum(np.maximum(left - xs, xs - (right - 1)), 0)
+        dy = np.maximum(np.maximum(top - ys, ys - (bottom - 1)), 0)
+        return np.maximum(dx[np.newaxis, :], dy[:, np.newaxis])
+
+    @staticmethod
+    def _blur(image: Image.Image, radius: float) -> Image.Image:
+        """Gaussian blur computed at reduced resolution (blur is low-frequency anyway)"""
+        factor = max(1, int(radius // 2))
+        if factor == 1:
+            return image.filter(ImageFilter.GaussianBlur(radius))
+        small = image.resize((max(1, image.width // factor), max(1, image.height // factor)), Image.Resampling.BOX)
+        small = small.filter(ImageFilter.GaussianBlur(radius / factor))
+        return small.resize(image.size, Image.Resampling.BILINEAR)
+
+    @staticmethod
+    def _blend_by_distance(
+        near: Image.Image, far: Image.Image, distance: np.ndarray, reach: float
+    ) -> Image.Image:
+        """Blend from `near` at the source edge to `far` at `reach` pixels away"""
+        weight = np.minimum(distance * (255.0 / max(reach, 1.0)), 255).astype(np.uint8)
+        return Image.composite(far, near, Image.fromarray(weight, "L"))
+
+    @staticmethod
+    def _edge_blur(src: np.ndarray, pad, distance: np.ndarray) -> Image.Image:
+        """Edge-replicate with progressive blur"""
+        canvas = Image.fromarray(np.pad(src, pad, mode="edge"), "RGB")
+        reach = float(distance.max())
+        light = BackgroundExtensionService._blur(canvas, max(2.0, reach * 0.05))
+        heavy = BackgroundExtensionService._blur(canvas, max(4.0, reach * 0.25))
+        near = BackgroundExtensionService._blend_by_distance(canvas, light, distance, reach * 0.1)
+        return BackgroundExtensionService._blend_by_distance(near, heavy, distance, reach * 0.6)
+
+    @staticmethod
+    def _mirror_feather(src: np.ndarray, pad, distance: np.ndarray) -> Image.Image:
+        """Mirror the content into the bands and feather it into a soft blur"""
+        canvas = Image.fromarray(np.pad(src, pad, mode="symmetric"), "RGB")
+        reach = float(distance.max())
+        soft = BackgroundExtensionService._blur(canvas, max(4.0, reach * 0.2))
+        # A touch of blur right at the seam hides the mirror line
+        seam = canvas.filter(ImageFilter.BoxBlur(2))
+        near = BackgroundExtensionService._blend_by_distance(seam, canvas, distance, 6.0)
+        return BackgroundExtensionService._blend_by_distance(near, soft, distance, reach * 0.4)
+
+    @staticmethod
+    def _border_gradient(src: np.ndarray, pad, box, width: int, height: int) -> Image.Image:
+        """Fade from the edge pixels to the dominant border color of each side"""
+        left, top, right, bottom = box
+        strip = max(1, min(src.shape[0], src.shape[1]) // 20)
+        border = np.concatenate([
+            src[:strip].reshape(-1, 3), src[-strip:].reshape(-1, 3),
+            src[:, :strip].reshape(-1, 3), src[:, -strip:].reshape(-1, 3)
+        ])
+        dominant = tuple(int(c) for c in np.median(border, axis=0))
+
+        # Smooth the replicated edge colors so the fill carries no streaks
+        canvas = BackgroundExtensionService._blur(Image.fromarray(np.pad(src, pad, mode="edge"), "RGB"), 6.0)
+
+        xs = np.arange(width, dtype=np.float32)
+        ys = np.arange(height, dtype=np.float32)
+        tx = np.zeros(width, dtype=np.float32)
+        if left > 0:
+            tx = np.where(xs < left, (left - xs) / left, tx)
+        if width - right > 0:
+            tx = np.where(xs >= right, (xs - right + 1) / (width - right), tx)
+        ty = np.zeros(height, dtype=np.float32)
+        if top > 0:
+            ty = np.where(ys < top, (top - ys) / top, ty)
+        if height - bottom > 0:
+            ty = np.where(ys >= bottom, (ys - bottom + 1) / (height - bottom), ty)
+
+        weight = (np.maximum(tx[np.newaxis, :], ty[:, np.newaxis]) * 255).astype(np.uint8)
+        return Image.composite(Image.new("RGB", (width, height), dominant), canvas, Image.fromarray(weight, "L"))
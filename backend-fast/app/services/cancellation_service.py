@@ -0,0 +1,56 @@
+import logging
+import redis
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class TaskCancelled(Exception):
+    """Raised inside a worker when a cooperative cancellation has been requested"""
+    pass
+
+
+class CancellationService:
+    """Service for cooperative cancellation flags shared between the API and workers"""
+
+    @staticmethod
+    def _key(kind: str, object_id: str) -> str:
+        return f"cancel:{kind}:{object_id}"
+
+    @staticmethod
+    def request_cancellation(kind: str, object_id: str) -> bool:
+        """Set the cancellation flag for a job or project"""
+        try:
+            get_redis_client().set(
+                CancellationService._key(kind, object_id), 1, ex=settings.CANCELLATION_FLAG_TTL
+            )
+            logger.info(f"Cancellation requested for {kind} {object_id}")
+            return True
+        except redis.RedisError as e:
+            logger.error(f"Could not set cancellation flag for {kind} {object_id}: {e}")
+            return False
+
+    @staticmethod
+    def is_cancelled(kind: str, object_id: str) -> bool:
+        """Check the cancellation flag; an unreachable Redis never cancels work"""
+        try:
+            return bool(get_redis_client().exists(CancellationService._key(kind, object_id)))
+        except redis.RedisError as e:
+            logger.warning(f"Could not read cancellation flag for {kind} {object_id}: {e}")
+            return False
+
+    @staticmethod
+    def raise_if_cancelled(kind: str, object_id: str) -> None:
+        """Raise TaskCancelled if cancellation was requested for the job or project"""
+        if CancellationService.is_cancelled(kind, object_id):
+            raise TaskCancelled(f"{kind} {object_id} was cancelled")
+
+    @staticmethod
+    def clear(kind: str, object_id: str) -> None:
+        """Remove the cancellation flag once the worker has stopped"""
+        try:
+            get_redis_client().delete(CancellationService._key(kind, object_id))
+        except redis.RedisError as e:
+            logger.warning(f"Could not clear cancellation flag for {kind} {object_id}: {e}")
@@ -1,6 +1,9 @@
+import json
 import logging
+import redis
 from celery.result import AsyncResult
 from app.celery_app import celery_app
+from app.core.config import settings
 from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
@@ -23,15 +26,47 @@ class CeleryService:
         }
     
     @staticmethod
-    def cancel_task(task_id: str) -> bool:
-        """Cancel a running task"""
+    def cancel_task(task_id: str, terminate: bool = False) -> bool:
+        """
+        Revoke a task. Queued tasks are dropped; running tasks are only killed
+        when `terminate` is set - prefer the cooperative job/project cancel APIs.
+        """
         try:
-            celery_app.control.revoke(task_id, terminate=True)
+            celery_app.control.revoke(task_id, terminate=terminate)
             return True
         except Exception as e:
             print(f"Error canceling task {task_id}: {e}")
             return False
     
+    @staticmethod
+    def get_queue_position(queue_name: str, task_id: str) -> Optional[int]:
+        """
+        Get the 1-based position of a queued task in a Redis-backed queue.
+
+        Messages are consumed from the highest priority list first, and from the
+        right end of each list. Returns None if the task is no longer queued.
+        """
+        try:
+            client = redis.from_url(settings.CELERY_BROKER_URL)
+            transport_options = celery_app.conf.broker_transport_options or {}
+            priority_steps = transport_options.get('priority_steps', [0, 3, 6, 9])
+            ahead = 0
+            for priority in priority_steps:
+                key = queue_name if not priority else f"{queue_name}\x06\x16{priority}"
+                messages = client.lrange(key, -settings.QUEUE_POSITION_SCAN_LIMIT, -1)
+                # Oldest message (next to be consumed) is at the right end
+                for raw in reversed(messages):
+                    ahead += 1
+                    try:
+                        if json.loads(raw).get('headers', {}).get('id') == task_id:
+                            return ahead
+                    except (ValueError, AttributeError):
+                        continue
+            return None
+        except Exception as e:
+            logger.warning(f"Error getting queue position for task {task_id}: {e}")
+            return None
+    
     @staticmethod
     def get_active_tasks() -> Dict[str, Any]:
         """Get list of active tasks"""
@@ -66,9 +101,10 @@ class CeleryService:
     @staticmethod
     def schedule_maintenance_tasks():
         """Schedule periodic maintenance tasks"""
-        from app.tasks.maintenance import cleanup_failed_jobs, cleanup_orphaned_files, health_check
+        from app.tasks.maintenance import cleanup_failed_jobs, cleanup_orphaned_files, cleanup_expired_exports, health_check
         
         # Schedule cleanup tasks
         cleanup_failed_jobs.apply_async(countdown=60)  # Run in 1 minute
         cleanup_orphaned_files.apply_async(countdown=300)  # Run in 5 minutes
+        cleanup_expired_exports.apply_async(countdown=300)  # Run in 5 minutes
         health_check.apply_async(countdown=10)  # Run in 10 seconds
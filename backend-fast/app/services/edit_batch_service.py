@@ -0,0 +1,151 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.edit_batch import EditBatch
+from app.models.generated_asset import GeneratedAsset
+from app.models.generation_job import JobStatus
+from app.models.user import User
+from app.schemas.generation import EditBatchResponse
+from app.services.edit_render_service import EditRenderService
+from app.services.generation_service import GenerationService
+from app.services.overlay_service import OverlayService
+
+logger = logging.getLogger(__name__)
+
+
+class EditBatchService:
+    """
+    Bulk manual edits: one edit stack applied to many generated assets.
+
+    The stack is validated (and its text styles resolved) once when the batch
+    is created; a worker then renders the assets in a thread pool and commits
+    each result as it completes, so progress and per-asset failures can be
+    read from the batch at any time.
+    """
+
+    @staticmethod
+    def create_batch(
+        db: Session, user: User, asset_ids: List[Any], edits: Dict[str, Any], job_id: Any = None
+    ) -> EditBatch:
+        """Create a pending batch; raises ValueError for invalid edits"""
+        operations = OverlayService.resolve_styles(
+            db, EditRenderService.normalize_operations(edits), user.organization_id
+        )
+        batch = EditBatch(
+            user_id=user.id,
+            job_id=job_id,
+            asset_ids=sorted(str(asset_id) for asset_id in asset_ids),
+            edits={**edits, "operations": operations},
+            errors={}
+        )
+        db.add(batch)
+        db.commit()
+        db.refresh(batch)
+        return batch
+
+    @staticmethod
+    def get_batch(db: Session, batch_id: str, user: User) -> Optional[EditBatch]:
+        """Get an edit batch of the user"""
+        return db.query(EditBatch).filter(
+            EditBatch.id == batch_id,
+            EditBatch.user_id == user.id
+        ).first()
+
+    @staticmethod
+    def set_task_id(db: Session, batch: EditBatch, task_id: str) -> EditBatch:
+        batch.task_id = task_id
+        db.commit()
+        return batch
+
+    @staticmethod
+    def apply_batch(
+        db: Session,
+        batch: EditBatch,
+        on_asset: Optional[Callable[[EditBatch, str, Optional[str]], None]] = None
+    ) -> EditBatch:
+        """
+        Apply the batch's edit stack to all of its assets. Pillow work runs in
+        up to EDIT_BATCH_WORKERS threads; results are written to the database
+        here, one asset at a time. A failing asset is recorded in `errors`
+        without stopping the others; `on_asset(batch, asset_id, error)` is
+        called after each one.
+        """
+        # Plain ids and paths: every commit below expires loaded instances, which
+        # would otherwise be reloaded one SELECT per asset
+        paths = {
+            str(asset_id): storage_path
+            for asset_id, storage_path in db.query(GeneratedAsset.id, GeneratedAsset.storage_path).filter(
+                GeneratedAsset.id.in_(batch.asset_ids)
+            ).all()
+        }
+        errors: Dict[str, str] = {
+            asset_id: "Generated asset not found" for asset_id in set(batch.asset_ids) - set(paths)
+        }
+        completed = 0
+        total = len(batch.asset_ids)
+        batch_id = batch.id
+        edits = batch.edits
+        operations = edits["operations"]
+
+        def record(asset_id: str, error: Optional[str]) -> None:
+            batch.completed_count = completed
+            batch.failed_count = len(errors)
+            batch.errors = dict(errors)
+            batch.progress = int((completed + len(errors)) / total * 100) if total else 100
+            db.commit()
+            if on_asset:
+                on_asset(batch, asset_id, error)
+
+        if paths:
+            max_workers = max(1, min(settings.EDIT_BATCH_WORKERS, len(paths)))
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="edit-batch")
+            try:
+                futures = {
+                    executor.submit(GenerationService.render_manual_edits, storage_path, edits, operations): asset_id
+                    for asset_id, storage_path in paths.items()
+                }
+                for future in as_completed(futures):
+                    asset_id = futures[future]
+                    try:
+                        manual_edits, dimensions = future.result()
+                        db.query(GeneratedAsset).filter(GeneratedAsset.id == asset_id).update(
+                            {"manual_edits": manual_edits, "dimensions": dimensions}, synchronize_session=False
+                        )
+                        completed += 1
+                        error = None
+                    except Exception as e:
+                        logger.warning(f"Bulk edit {batch_id}: asset {asset_id} failed: {e}")
+                        error = errors[asset_id] = str(e)
+                    record(asset_id, error)
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        batch.completed_count = completed
+        batch.failed_count = len(errors)
+        batch.errors = dict(errors)
+        batch.status = JobStatus.COMPLETED if completed or not total else JobStatus.FAILED
+        if batch.status == JobStatus.FAILED:
+            batch.error_message = "No asset could be edited"
+        batch.progress = 100
+        batch.completed_at = datetime.now(timezone.utc)
+        db.commit()
+        logger.info(f"Bulk edit {batch_id}: {completed} edited, {len(errors)} failed")
+        return batch
+
+    @staticmethod
+    def to_response(batch: EditBatch) -> EditBatchResponse:
+        """Convert an edit batch to its API response"""
+        return EditBatchResponse(
+            batchId=str(batch.id),
+            status=batch.status,
+            progress=batch.progress or 0,
+            assetCount=len(batch.asset_ids or []),
+            completedCount=batch.completed_count or 0,
+            failedCount=batch.failed_count or 0,
+            errors=batch.errors or {},
+            error=batch.error_message
+        )
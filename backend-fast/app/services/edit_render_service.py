@@ -0,0 +1,306 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from PIL import Image, ImageEnhance, ImageOps
+
+from app.core.config import settings
+from app.services.overlay_service import OverlayService
+from app.services.rendition_service import RenditionService
+
+logger = logging.getLogger(__name__)
+
+# Decoded live-preview working copies, keyed by (storage path, max edge)
+_live_cache: "OrderedDict[Tuple[str, int], Image.Image]" = OrderedDict()
+_live_cache_lock = threading.Lock()
+
+
+class EditedSource(NamedTuple):
+    """A stored render plus the edit stack to apply to it (rendered at full resolution on demand)"""
+    storage_path: str
+    stack: str  # Canonical JSON of the operation list
+
+
+class EditRenderService:
+    """
+    Non-destructive manual edits.
+
+    Edits are stored as an ordered list of operations and always rendered from
+    the unedited generated image, so changing a slider never compounds on
+    already-edited pixels. Renders are lazy and cached per (asset file, stack
+    hash, resolution): 'preview' renders come from a small working copy for
+    the editor, 'full' renders are made on download or export.
+
+    Operations (coordinates are relative, so a stack renders the same at any
+    resolution):
+        crop       {"x", "y", "width", "height"} in 0..1
+        saturation {"value"} 1.0 = unchanged
+        brightness {"value"} 1.0 = unchanged
+        contrast   {"value"} 1.0 = unchanged
+        rotate     {"degrees"} 90, 180 or 270 (clockwise)
+        flip       {"direction"} horizontal or vertical
+        text       {"content", "position", "textStyleSetId", "styleType", "style"}
+        logo       {"logoUrl", "position", "size"} size in % of the width
+    """
+
+    RESOLUTIONS = ("preview", "full")
+
+    @staticmethod
+    def normalize_operations(edits: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Build the validated operation list of a ManualEdits payload. An explicit
+        `operations` list is used as given; otherwise the legacy `crop` and
+        `saturation` fields are turned into operations. `textOverlays` and
+        `logoOverlay` are appended last, so they are drawn on top of the
+        adjusted image. Raises ValueError.
+        """
+        edits = edits or {}
+        if edits.get("operations") is not None:
+            operations = [
+                {"type": op["type"], "params": dict(op.get("params") or {})} for op in edits["operations"]
+            ]
+        else:
+            operations = []
+            if edits.get("crop"):
+                operations.append({"type": "crop", "params": dict(edits["crop"])})
+            if edits.get("saturation") is not None and edits["saturation"] != 1.0:
+                operations.append({"type": "saturation", "params": {"value": edits["saturation"]}})
+        for overlay in edits.get("textOverlays") or []:
+            operations.append(OverlayService.text_operation(overlay))
+        if edits.get("logoOverlay"):
+            operations.append(OverlayService.logo_operation(edits["logoOverlay"]))
+
+        for op in operations:
+            EditRenderService._validate(op)
+        return operations
+
+    @staticmethod
+    def _validate(op: Dict[str, Any]) -> None:
+        op_type, params = op["type"], op["params"]
+        if op_type == "crop":
+            try:
+                x, y, w, h = (float(params[k]) for k in ("x", "y", "width", "height"))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("crop needs numeric x, y, width and height")
+            if w <= 0 or h <= 0 or x < 0 or y < 0 or x + w > 1.0001 or y + h > 1.0001:
+                raise ValueError("crop must lie within the image (relative 0..1 coordinates)")
+        elif op_type in ("saturation", "brightness", "contrast"):
+            value = params.get("value")
+            if not isinstance(value, (int, float)) or not 0 <= value <= settings.EDIT_MAX_ENHANCE_FACTOR:
+                raise ValueError(f"{op_type} value must be between 0 and {settings.EDIT_MAX_ENHANCE_FACTOR}")
+        elif op_type == "rotate":
+            if params.get("degrees") not in (90, 180, 270):
+                raise ValueError("rotate supports 90, 180 or 270 degrees")
+        elif op_type == "flip":
+            if params.get("direction") not in ("horizontal", "vertical"):
+                raise ValueError("flip direction must be horizontal or vertical")
+        elif op_type in ("text", "logo"):
+            OverlayService.validate(op)
+        else:
+            raise ValueError(f"Unknown edit operation '{op_type}'")
+
+    @staticmethod
+    def get_operations(manual_edits: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Stored operation list of an asset. Edits saved before edit stacks existed
+        were baked into the file and have no `operations` key: nothing to render.
+        """
+        if not manual_edits:
+            return []
+        return manual_edits.get("operations") or []
+
+    @staticmethod
+    def canonical_stack(operations: List[Dict[str, Any]]) -> str:
+        return json.dumps(operations, sort_keys=True, separators=(",", ":"))
+
+    @staticmethod
+    def stack_hash(operations: List[Dict[str, Any]]) -> str:
+        return hashlib.sha1(EditRenderService.canonical_stack(operations).encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def output_size(width: int, height: int, operations: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Size of the full-resolution render, computed without decoding anything"""
+        for op in operations:
+            if op["type"] == "crop":
+                p = op["params"]
+                left, top, right, bottom = EditRenderService._crop_box(width, height, p)
+                width, height = right - left, bottom - top
+            elif op["type"] == "rotate" and op["params"]["degrees"] in (90, 270):
+                width, height = height, width
+        return width, height
+
+    @staticmethod
+    def _crop_box(width: int, height: int, params: Dict[str, Any]) -> Tuple[int, int, int, int]:
+        left = int(round(float(params["x"]) * width))
+        top = int(round(float(params["y"]) * height))
+        right = min(width, int(round((float(params["x"]) + float(params["width"])) * width)))
+        bottom = min(height, int(round((float(params["y"]) + float(params["height"])) * height)))
+        return left, top, max(right, left + 1), max(bottom, top + 1)
+
+    @staticmethod
+    def apply_operations(image: Image.Image, operations: List[Dict[str, Any]]) -> Image.Image:
+        """Apply an operation list to an image (any resolution)"""
+        for op in operations:
+            op_type, params = op["type"], op["params"]
+            if op_type == "crop":
+                image = image.crop(EditRenderService._crop_box(image.width, image.height, params))
+            elif op_type == "saturation":
+                image = ImageEnhance.Color(image).enhance(params["value"])
+            elif op_type == "brightness":
+                image = ImageEnhance.Brightness(image).enhance(params["value"])
+            elif op_type == "contrast":
+                image = ImageEnhance.Contrast(image).enhance(params["value"])
+            elif op_type == "rotate":
+                image = image.transpose({
+                    90: Image.Transpose.ROTATE_270, 180: Image.Transpose.ROTATE_180, 270: Image.Transpose.ROTATE_90
+                }[params["degrees"]])
+            elif op_type == "flip":
+                image = ImageOps.mirror(image) if params["direction"] == "horizontal" else ImageOps.flip(image)
+            elif op_type == "text":
+                image = OverlayService.draw_text(image, params)
+            elif op_type == "logo":
+                image = OverlayService.paste_logo(image, params)
+        return image
+
+    @staticmethod
+    def working_copy_path(storage_path: str) -> str:
+        """Low-resolution working copy of a stored render (relative path)"""
+        return RenditionService.build_rendition_path(
+            storage_path, "working", max_edge=settings.EDIT_PREVIEW_MAX_EDGE
+        )
+
+    @staticmethod
+    def get_working_copy(storage_path: str) -> str:
+        """
+        Return the full path of the working copy, creating it once. JPEGs are
+        decoded at reduced scale, so even very large sources are cheap to shrink.
+        """
+        output_path = os.path.join(settings.UPLOAD_DIR, EditRenderService.working_copy_path(storage_path))
+        if os.path.exists(output_path):
+            return output_path
+
+        max_edge = settings.EDIT_PREVIEW_MAX_EDGE
+        with Image.open(os.path.join(settings.UPLOAD_DIR, storage_path)) as img:
+            if settings.RENDER_REDUCED_DECODE and img.format == "JPEG":
+                img.draft(img.mode, (max_edge, max_edge))
+            working = img.copy()
+        working.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        RenditionService.atomic_save(working, output_path)
+        return output_path
+
+    @staticmethod
+    def get_live_image(storage_path: str, max_edge: int) -> Image.Image:
+        """
+        Decoded working copy scaled to `max_edge`, kept in memory (LRU) so live
+        previews skip decoding entirely. Operations never modify their input, so
+        the cached image is shared as-is.
+        """
+        key = (storage_path, max_edge)
+        with _live_cache_lock:
+            image = _live_cache.get(key)
+            if image is not None:
+                _live_cache.move_to_end(key)
+                return image
+
+        with Image.open(EditRenderService.get_working_copy(storage_path)) as img:
+            image = img.convert("RGBA" if "A" in img.getbands() or img.mode == "P" else "RGB")
+        if max(image.size) > max_edge:
+            image.thumbnail((max_edge, max_edge), Image.Resampling.BILINEAR)
+
+        with _live_cache_lock:
+            _live_cache[key] = image
+            while len(_live_cache) > settings.EDIT_LIVE_CACHE_SIZE:
+                _live_cache.popitem(last=False)
+        return image
+
+    @staticmethod
+    def render_live_preview(
+        storage_path: str, operations: List[Dict[str, Any]], max_edge: int, image_format: str = "jpeg"
+    ) -> bytes:
+        """
+        Apply a proposed edit stack to the in-memory working copy and return the
+        encoded image. Nothing is written: this is for interactive editing.
+        """
+        max_edge = max(64, min(max_edge, settings.EDIT_PREVIEW_MAX_EDGE))
+        image = EditRenderService.apply_operations(EditRenderService.get_live_image(storage_path, max_edge), operations)
+        buffer = io.BytesIO()
+        if image_format == "webp":
+            image.save(buffer, format="WEBP", quality=settings.EDIT_PREVIEW_QUALITY, method=0)
+        else:
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            image.save(buffer, format="JPEG", quality=settings.EDIT_PREVIEW_QUALITY)
+        return buffer.getvalue()
+
+    @staticmethod
+    def render_path(storage_path: str, operations: List[Dict[str, Any]], resolution: str) -> str:
+        """Deterministic (relative) path of a render of `storage_path` with an edit stack"""
+        ext = ".jpg" if resolution == "preview" else None
+        return RenditionService.build_rendition_path(
+            storage_path, "edited", ext=ext,
+            stack=EditRenderService.stack_hash(operations), resolution=resolution
+        )
+
+    @staticmethod
+    def is_current_render(relative_path: str, storage_path: str, manual_edits: Optional[Dict[str, Any]]) -> bool:
+        """
+        Whether a cached file is a render of the asset's current edit stack
+        (or derived from one, e.g. a transcode of the full render). Renders of
+        earlier stacks are never read again.
+        """
+        operations = EditRenderService.get_operations(manual_edits)
+        if not operations:
+            return False
+        return any(
+            relative_path.startswith(os.path.splitext(EditRenderService.render_path(storage_path, operations, resolution))[0])
+            for resolution in EditRenderService.RESOLUTIONS
+        )
+
+    @staticmethod
+    def render(storage_path: str, operations: List[Dict[str, Any]], resolution: str = "preview") -> str:
+        """
+        Render `storage_path` with an edit stack at 'preview' or 'full'
+        resolution and return the relative path of the cached render.
+        """
+        if resolution not in EditRenderService.RESOLUTIONS:
+            raise ValueError(f"Unknown render resolution '{resolution}'")
+        if not operations:
+            return storage_path
+
+        relative_path = EditRenderService.render_path(storage_path, operations, resolution)
+        output_path = os.path.join(settings.UPLOAD_DIR, relative_path)
+        if os.path.exists(output_path):
+            return relative_path
+
+        if resolution == "preview":
+            source = EditRenderService.get_working_copy(storage_path)
+        else:
+            source = os.path.join(settings.UPLOAD_DIR, storage_path)
+        with Image.open(source) as img:
+            img.load()
+            if img.mode not in ("RGB", "RGBA", "L"):
+                img = img.convert("RGBA")
+            rendered = EditRenderService.apply_operations(img, operations)
+
+        if resolution == "preview":
+            if rendered.mode not in ("RGB", "L"):
+                rendered = rendered.convert("RGB")
+            RenditionService.atomic_save(rendered, output_path, quality=settings.EDIT_PREVIEW_QUALITY)
+        elif RenditionService._image_format_for(output_path) == "JPEG":
+            RenditionService.atomic_save(
+                rendered.convert("RGB"), output_path, quality=settings.EDIT_FULL_JPEG_QUALITY, subsampling=0
+            )
+        else:
+            RenditionService.atomic_save(rendered, output_path)
+        logger.info(f"Rendered {resolution} edit of '{storage_path}' ({len(operations)} operation(s))")
+        return relative_path
+
+    @staticmethod
+    def resolve(source: EditedSource) -> str:
+        """Full path of the full-resolution render of an EditedSource"""
+        relative_path = EditRenderService.render(source.storage_path, json.loads(source.stack), "full")
+        return os.path.abspath(os.path.join(settings.UPLOAD_DIR, relative_path))
@@ -0,0 +1,314 @@
+import hashlib
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.export_job import ExportJob
+from app.models.generated_asset import GeneratedAsset
+from app.models.generation_job import JobStatus
+from app.models.user import User
+from app.schemas.generation import DownloadRequest, ExportResponse
+from app.services.edit_render_service import EditRenderService
+from app.services.generation_service import GenerationService
+from app.services.progress_service import ProgressService
+from app.services.transcode_service import TranscodeService
+from app.services.zip_stream_service import ZipStreamService
+
+logger = logging.getLogger(__name__)
+
+
+class ExportService:
+    """
+    Asynchronous exports: a worker writes the ZIP archive of a selection to
+    storage and clients download it (resumably) once it is ready.
+
+    Archives are content-addressed by the sorted selection and the export
+    options, so exporting the same selection again is served from the
+    existing archive without rebuilding it.
+    """
+
+    GROUPINGS = ("individual", "batch", "category")
+
+    @staticmethod
+    def build_options(request: DownloadRequest) -> Dict[str, str]:
+        """Validated export options that change the archive content; raises ValueError"""
+        grouping = (request.grouping or "individual").lower()
+        if grouping not in ExportService.GROUPINGS:
+            raise ValueError(f"Unsupported download grouping '{grouping}'")
+        return {
+            "format": TranscodeService.normalize_format(request.format),
+            "quality": TranscodeService.normalize_quality(request.quality),
+            "grouping": grouping
+        }
+
+    @staticmethod
+    def _clean_name(name: str) -> str:
+        """Keep archive folder and file names free of path characters"""
+        return "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).rstrip()
+
+    @staticmethod
+    def build_entry_name(asset: GeneratedAsset, grouping: str, extension: str) -> str:
+        """
+        Name of a generated asset inside an archive:
+            individual - '<platform>/<format>_<id>.<ext>'
+            batch      - '<source image>/<platform>_<format>_<id>.<ext>' (all sizes of a source together)
+            category   - '<category>/<platform>_<format>_<id>.<ext>' (Mobile, Web, ... or the platform)
+        """
+        asset_format = asset.asset_format
+        platform_name = asset_format.platform.name if asset_format and asset_format.platform else "Unknown_Platform"
+        format_name = asset_format.name if asset_format else "untitled"
+        platform_name = ExportService._clean_name(platform_name)
+        format_name = ExportService._clean_name(format_name)
+        file_name = f"{format_name}_{str(asset.id)[:8]}{extension}"
+
+        if grouping == "batch":
+            source = asset.original_asset
+            stem = os.path.splitext(source.original_filename)[0] if source and source.original_filename else "source"
+            folder = f"{ExportService._clean_name(stem)}_{str(asset.original_asset_id)[:8]}"
+            return f"{folder}/{platform_name}_{file_name}"
+        if grouping == "category":
+            category = (asset_format.category if asset_format else None) or (
+                platform_name if asset_format and asset_format.platform else "Custom"
+            )
+            return f"{ExportService._clean_name(category)}/{platform_name}_{file_name}"
+        return f"{platform_name}/{file_name}"
+
+    @staticmethod
+    def build_entries(
+        assets: List[GeneratedAsset], options: Dict[str, str]
+    ) -> Tuple[List[Tuple[str, Any]], List[Dict[str, Any]]]:
+        """
+        Resolve the archive entries of a selection: ([(entry name, file path or
+        bytes)], manifest). Assets whose file is missing are logged and left
+        out; a manifest.json entry is added when DOWNLOAD_INCLUDE_MANIFEST is set.
+        """
+        entries = []
+        manifest = []
+        for asset in assets:
+            file_on_disk = os.path.abspath(os.path.join(settings.UPLOAD_DIR, asset.storage_path))
+            if not os.path.exists(file_on_disk):
+                logger.warning(f"Download: file not found for asset {asset.id}: {file_on_disk}")
+                continue
+            if options["format"] == TranscodeService.ORIGINAL:
+                extension = f".{(asset.file_type or 'unknown').split('/')[-1]}"
+            else:
+                extension = TranscodeService.extension_for(options["format"], file_on_disk)
+            name = ExportService.build_entry_name(asset, options["grouping"], extension)
+            entries.append((name, GenerationService.get_download_source(asset, file_on_disk)))
+            manifest.append({
+                "assetId": str(asset.id),
+                "originalAssetId": str(asset.original_asset_id),
+                "path": name,
+                "formatName": asset.asset_format.name if asset.asset_format else "Custom",
+                "dimensions": asset.dimensions
+            })
+        if entries and settings.DOWNLOAD_INCLUDE_MANIFEST:
+            entries.append(("manifest.json", json.dumps({"assets": manifest, "options": options}, indent=2).encode("utf-8")))
+        return entries, manifest
+
+    @staticmethod
+    def stream_archive(
+        entries: List[Tuple[str, Any]],
+        options: Dict[str, str],
+        on_progress: Optional[Callable[[int], None]] = None
+    ) -> Iterator[bytes]:
+        """
+        Stream the ZIP of `entries`, transcoding them to the requested format in
+        parallel. `on_progress` gets the percentage of entries written so far.
+        """
+        transcoded = TranscodeService.transcode_entries(entries, options["format"], options["quality"])
+
+        def tracked():
+            for done, entry in enumerate(transcoded, start=1):
+                yield entry
+                if on_progress:
+                    on_progress(done * 100 // len(entries))
+
+        return ZipStreamService.stream(tracked())
+
+    @staticmethod
+    def build_cache_key(assets: List[GeneratedAsset], options: Dict[str, Any]) -> str:
+        """
+        Hash of the sorted selection and options. The storage path and edit
+        stack of each asset are included, so an edited selection gets a new archive.
+        """
+        payload = {
+            "assets": sorted(
+                [str(asset.id), asset.storage_path, EditRenderService.get_operations(asset.manual_edits)]
+                for asset in assets
+            ),
+            "options": options
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def archive_path(cache_key: str) -> str:
+        """Archive path relative to the upload directory"""
+        return f"{settings.EXPORT_SUBDIR}/{cache_key}.zip"
+
+    @staticmethod
+    def full_path(storage_path: str) -> str:
+        return os.path.join(settings.UPLOAD_DIR, storage_path)
+
+    @staticmethod
+    def archive_exists(job: ExportJob) -> bool:
+        return bool(job.storage_path) and os.path.exists(ExportService.full_path(job.storage_path))
+
+    @staticmethod
+    def create_export(
+        db: Session, user: User, assets: List[GeneratedAsset], request: DownloadRequest
+    ) -> Tuple[ExportJob, bool]:
+        """
+        Return the export of this selection for the user: an existing one that
+        is queued, running or ready, otherwise a new job. Returns (job, created);
+        a new job is already completed when the archive exists in storage.
+        """
+        options = ExportService.build_options(request)
+        cache_key = ExportService.build_cache_key(assets, options)
+
+        # A pending job only counts once its task is queued or while it may still be
+        queued_since = datetime.now(timezone.utc) - timedelta(seconds=settings.ENQUEUE_GRACE_SECONDS)
+        existing = db.query(ExportJob).filter(
+            ExportJob.user_id == user.id,
+            ExportJob.cache_key == cache_key,
+            or_(
+                ExportJob.status.in_([JobStatus.PROCESSING, JobStatus.COMPLETED]),
+                (ExportJob.status == JobStatus.PENDING)
+                & (ExportJob.task_id.isnot(None) | (ExportJob.created_at >= queued_since))
+            )
+        ).order_by(ExportJob.created_at.desc()).first()
+        if existing and (existing.status != JobStatus.COMPLETED or ExportService.archive_exists(existing)):
+            logger.info(f"Reusing export {existing.id} ({existing.status.value}) for cache key {cache_key[:12]}")
+            return existing, False
+
+        job = ExportJob(
+            user_id=user.id,
+            cache_key=cache_key,
+            asset_ids=sorted(str(asset.id) for asset in assets),
+            options=options
+        )
+        storage_path = ExportService.archive_path(cache_key)
+        full_path = ExportService.full_path(storage_path)
+        if os.path.exists(full_path):
+            ExportService._mark_completed(job, storage_path, os.path.getsize(full_path))
+            logger.info(f"Export archive for cache key {cache_key[:12]} already in storage")
+
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job, True
+
+    @staticmethod
+    def get_export(db: Session, export_id: str, user: User) -> Optional[ExportJob]:
+        """Get an export job of the user"""
+        return db.query(ExportJob).filter(
+            ExportJob.id == export_id,
+            ExportJob.user_id == user.id
+        ).first()
+
+    @staticmethod
+    def set_task_id(db: Session, job: ExportJob, task_id: str) -> ExportJob:
+        job.task_id = task_id
+        db.commit()
+        return job
+
+    @staticmethod
+    def fail_unqueued_export(db: Session, job: ExportJob, error: Exception) -> ExportJob:
+        """Fail an export whose task could not be queued, so identical requests do not reuse it"""
+        db.rollback()
+        job.status = JobStatus.FAILED
+        job.error_message = f"Could not queue the export: {error}"
+        db.commit()
+        return job
+
+    @staticmethod
+    def _mark_completed(job: ExportJob, storage_path: str, file_size: int) -> None:
+        job.status = JobStatus.COMPLETED
+        job.progress = 100
+        job.storage_path = storage_path
+        job.file_size = file_size
+        job.completed_at = datetime.now(timezone.utc)
+
+    @staticmethod
+    def build_archive(
+        db: Session, job: ExportJob, on_progress: Optional[Callable[[int], None]] = None
+    ) -> str:
+        """
+        Write the archive of an export job to storage and mark it completed.
+        The archive is written to a temporary file and moved into place, so a
+        concurrent export of the same selection never sees a partial file.
+        """
+        storage_path = ExportService.archive_path(job.cache_key)
+        full_path = ExportService.full_path(storage_path)
+        if os.path.exists(full_path):
+            ExportService._mark_completed(job, storage_path, os.path.getsize(full_path))
+            db.commit()
+            return storage_path
+
+        assets = db.query(GeneratedAsset).options(
+            *GenerationService.generated_asset_load_options(with_source=job.options["grouping"] == "batch")
+        ).filter(GeneratedAsset.id.in_(job.asset_ids)).all()
+        entries, _ = ExportService.build_entries(assets, job.options)
+        if not entries:
+            raise ValueError("No asset files found for export")
+
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        temp_path = f"{full_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "wb") as archive:
+                for chunk in ExportService.stream_archive(entries, job.options, on_progress):
+                    archive.write(chunk)
+            os.replace(temp_path, full_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        ExportService._mark_completed(job, storage_path, os.path.getsize(full_path))
+        db.commit()
+        logger.info(f"Export {job.id}: wrote {len(entries)} entries ({job.file_size} bytes) to '{storage_path}'")
+        return storage_path
+
+    @staticmethod
+    def to_response(job: ExportJob) -> ExportResponse:
+        """Convert an export job to its API response"""
+        ready = job.status == JobStatus.COMPLETED
+        progress = job.progress or 0
+        if job.status == JobStatus.PROCESSING:
+            snapshot = ProgressService.get_snapshot("export", str(job.id))
+            if snapshot and snapshot.get("status") == JobStatus.PROCESSING.value:
+                progress = max(snapshot["progress"], progress)
+        return ExportResponse(
+            exportId=str(job.id),
+            status=job.status,
+            progress=progress,
+            assetCount=len(job.asset_ids or []),
+            fileSize=job.file_size if ready else None,
+            downloadUrl=f"/api/v1/generate/exports/{job.id}/download" if ready else None,
+            error=job.error_message
+        )
+
+    @staticmethod
+    def cleanup_expired(db: Session) -> int:
+        """Delete export jobs and archives older than EXPORT_TTL_HOURS; returns jobs removed"""
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.EXPORT_TTL_HOURS)
+        expired = db.query(ExportJob).filter(ExportJob.created_at < cutoff).all()
+        expired_ids = {job.id for job in expired}
+        for job in expired:
+            # Archives are shared by identical exports; keep those still referenced by a newer job
+            if job.storage_path and not db.query(ExportJob.id).filter(
+                ExportJob.storage_path == job.storage_path,
+                ExportJob.id.notin_(expired_ids)
+            ).first():
+                try:
+                    os.remove(ExportService.full_path(job.storage_path))
+                except FileNotFoundError:
+                    pass
+            db.delete(job)
+        db.commit()
+        return len(expired)
@@ -38,8 +38,12 @@ class FileService:
             )
     
     @staticmethod
-    async def save_file(file: UploadFile, project_id: str) -> Tuple[str, int, str]:
-        """Save uploaded file and return storage path, file size, and checksum"""
+    def save_file(file: UploadFile, project_id: str) -> Tuple[str, int, str]:
+        """
+        Save uploaded file and return storage path, file size, and checksum.
+        Blocking: the upload is copied in blocks from its spooled file, so call
+        it from a sync endpoint or a worker thread.
+        """
         # Create upload directory if it doesn't exist
         upload_dir = os.path.join(settings.UPLOAD_DIR, "projects", project_id)
         os.makedirs(upload_dir, exist_ok=True)
@@ -49,23 +53,26 @@ class FileService:
         unique_filename = f"{uuid.uuid4()}.{file_extension}"
         file_path = os.path.join(upload_dir, unique_filename)
         
-        # Read and save file
-        content = await file.read()
-        file_size = len(content)
-        
-        # Check actual file size
-        if file_size > settings.MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File size {file_size} exceeds maximum allowed size of {settings.MAX_FILE_SIZE} bytes"
-            )
-        
-        # Calculate checksum
-        checksum = hashlib.md5(content).hexdigest()
-        
-        # Save file
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Copy the file block by block, checking the actual size and computing the checksum on the way
+        digest = hashlib.md5()
+        file_size = 0
+        file.file.seek(0)
+        try:
+            with open(file_path, "wb") as f:
+                for chunk in iter(lambda: file.file.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                    file_size += len(chunk)
+                    if file_size > settings.MAX_FILE_SIZE:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE} bytes"
+                        )
+                    digest.update(chunk)
+                    f.write(chunk)
+        except Exception:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+        checksum = digest.hexdigest()
         
         # Return relative path for storage
         storage_path = os.path.join("projects", project_id, unique_filename)
@@ -0,0 +1,62 @@
+import logging
+from typing import Dict, Any, List
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationPlanner:
+    """Groups the requested output sizes of a generation job into render buckets"""
+
+    @staticmethod
+    def _aspect_matches(width: int, height: int, master_width: int, master_height: int, tolerance: float) -> bool:
+        """Check whether two sizes share an aspect ratio within a relative tolerance"""
+        ratio = width / height
+        master_ratio = master_width / master_height
+        return abs(ratio - master_ratio) / master_ratio <= tolerance
+
+    @staticmethod
+    def plan(targets: List[Dict[str, Any]], tolerance: float = None) -> List[Dict[str, Any]]:
+        """
+        Plan the renders needed for a list of targets.
+
+        Each target is a dict with at least "width" and "height". Targets of
+        identical size are merged into one size entry, and size entries whose
+        aspect ratios match are grouped into a bucket rendered once at its
+        largest size ("master"); the smaller sizes are derived by downscaling.
+
+        Returns a list of buckets:
+            [{"width": 1080, "height": 1920,
+              "sizes": [{"width": 1080, "height": 1920, "targets": [...]},
+                        {"width": 720, "height": 1280, "targets": [...]}]}]
+        """
+        if tolerance is None:
+            tolerance = settings.GENERATION_ASPECT_TOLERANCE
+
+        sizes: Dict[tuple, Dict[str, Any]] = {}
+        for target in targets:
+            key = (int(target["width"]), int(target["height"]))
+            if key not in sizes:
+                sizes[key] = {"width": key[0], "height": key[1], "targets": []}
+            sizes[key]["targets"].append(target)
+
+        # Largest sizes first so every bucket is seeded by its master
+        ordered = sorted(sizes.values(), key=lambda s: s["width"] * s["height"], reverse=True)
+
+        buckets: List[Dict[str, Any]] = []
+        for size in ordered:
+            for bucket in buckets:
+                if GenerationPlanner._aspect_matches(
+                    size["width"], size["height"], bucket["width"], bucket["height"], tolerance
+                ):
+                    bucket["sizes"].append(size)
+                    break
+            else:
+                buckets.append({"width": size["width"], "height": size["height"], "sizes": [size]})
+
+        logger.info(
+            f"Planned {len(buckets)} render bucket(s) covering {len(sizes)} unique size(s) "
+            f"for {len(targets)} target(s)"
+        )
+        return buckets
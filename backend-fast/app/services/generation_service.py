@@ -1,6 +1,8 @@
 import logging
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import List, Dict, Any, Optional, Tuple
 import uuid
 import os
 from PIL import Image
@@ -14,22 +16,65 @@ from app.models.user import User
 from app.schemas.generation import GenerationRequest, GeneratedAssetResponse, PromptEditRequest
 from app.services.file_service import FileService
 from app.services.ai_strategy_service import AIStrategyService
+from app.services.rendition_service import RenditionService
+from app.services.background_extension_service import BackgroundExtensionService
+from app.services.edit_render_service import EditRenderService, EditedSource
+from app.services.overlay_service import OverlayService
+from app.services.cancellation_service import CancellationService
+from app.services.celery_service import CeleryService
+from app.services.progress_service import ProgressService
+from app.services.idempotency_service import IdempotencyService
 from app.core.config import settings
+from app.core.redis_client import get_redis_client
 from app.ai.factory import get_ai_provider
 import asyncio
+import redis
 
 logger = logging.getLogger(__name__)
 
 class GenerationService:
     """Service for handling asset generation operations"""
     
+    @staticmethod
+    def build_request_fingerprint(request: GenerationRequest) -> str:
+        """Hash of what a generation request renders, independent of ordering and duplicates"""
+        return IdempotencyService.fingerprint({
+            "projectId": str(request.projectId),
+            "formatIds": sorted({str(format_id) for format_id in request.formatIds}),
+            "customResizes": sorted({(size.width, size.height) for size in request.customResizes or []}),
+            "prompt": (request.prompt or "").strip() or None,
+            "progressive": request.progressive
+        })
+
+    @staticmethod
+    def find_in_flight_job(db: Session, user: User, project_id: Any, fingerprint: str) -> Optional[GenerationJob]:
+        """
+        Queued or processing job of the user rendering exactly the same request.
+        A pending job counts once its task is queued, or while it may still be
+        queued (ENQUEUE_GRACE_SECONDS).
+        """
+        queued_since = datetime.now(timezone.utc) - timedelta(seconds=settings.ENQUEUE_GRACE_SECONDS)
+        return db.query(GenerationJob).filter(
+            GenerationJob.user_id == user.id,
+            GenerationJob.project_id == project_id,
+            GenerationJob.request_fingerprint == fingerprint,
+            or_(
+                GenerationJob.status == JobStatus.PROCESSING,
+                (GenerationJob.status == JobStatus.PENDING)
+                & (GenerationJob.task_id.isnot(None) | (GenerationJob.created_at >= queued_since))
+            )
+        ).order_by(GenerationJob.created_at.desc()).first()
+
     @staticmethod
     def create_generation_job(
         db: Session, 
         request: GenerationRequest, 
         user: User
-    ) -> GenerationJob:
-        """Create a new generation job"""
+    ) -> Tuple[GenerationJob, bool]:
+        """
+        Create a new generation job, or return the identical job already in
+        flight. Returns (job, created).
+        """
         project = db.query(Project).filter(
             Project.id == request.projectId,
             Project.user_id == user.id
@@ -38,16 +83,73 @@ class GenerationService:
         if not project:
             raise ValueError("Project not found or access denied")
         
-        job = GenerationJob(
-            project_id=project.id,
-            user_id=user.id,
-            status=JobStatus.PENDING
-        )
-        db.add(job)
+        fingerprint = GenerationService.build_request_fingerprint(request)
+        # Short lock so two simultaneous submissions cannot both miss each other
+        lock = None
+        try:
+            lock = get_redis_client().lock(
+                f"lock:generation:{user.id}:{fingerprint}", timeout=settings.GENERATION_DEDUPE_LOCK_SECONDS
+            )
+            if not lock.acquire(blocking_timeout=settings.GENERATION_DEDUPE_LOCK_SECONDS):
+                lock = None
+        except redis.RedisError as e:
+            logger.warning(f"Could not lock generation request {fingerprint}: {e}")
+            lock = None
+        
+        try:
+            existing = GenerationService.find_in_flight_job(db, user, project.id, fingerprint)
+            if existing:
+                logger.info(f"Identical generation request already in flight as job {existing.id}")
+                return existing, False
+            
+            job = GenerationJob(
+                project_id=project.id,
+                user_id=user.id,
+                status=JobStatus.PENDING,
+                request_fingerprint=fingerprint
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            return job, True
+        finally:
+            if lock is not None:
+                try:
+                    lock.release()
+                except (redis.RedisError, redis.exceptions.LockError):
+                    pass
+
+    @staticmethod
+    def set_job_task_id(db: Session, job: GenerationJob, task_id: str) -> GenerationJob:
+        """Record the Celery task processing a job (used for queue position lookups)"""
+        job.task_id = str(task_id)
+        db.commit()
+        return job
+
+    @staticmethod
+    def fail_unqueued_job(db: Session, job: GenerationJob) -> GenerationJob:
+        """Fail a job whose task could not be queued, so identical requests do not reuse it"""
+        db.rollback()
+        job.status = JobStatus.FAILED
         db.commit()
-        db.refresh(job)
         return job
 
+    @staticmethod
+    def get_live_progress(job: GenerationJob) -> int:
+        """Latest progress published by the worker, falling back to the stored value"""
+        if job.status == JobStatus.PROCESSING:
+            snapshot = ProgressService.get_snapshot("job", str(job.id))
+            if snapshot and snapshot.get("status") == JobStatus.PROCESSING.value:
+                return max(snapshot["progress"], job.progress or 0)
+        return job.progress or 0
+
+    @staticmethod
+    def get_queue_position(job: GenerationJob) -> Optional[int]:
+        """Position of a pending job in the bulk generation queue"""
+        if job.status != JobStatus.PENDING or not job.task_id:
+            return None
+        return CeleryService.get_queue_position("generation", job.task_id)
+
     @staticmethod
     def dispatch_prompt_edit_task(
         db: Session,
@@ -79,8 +181,11 @@ class GenerationService:
         return task_result.id
 
     @staticmethod
-    async def get_prompt_suggestions(db: Session, asset_id: str, user: User) -> List[str]:
-        """Generate prompt suggestions for a given asset."""
+    def get_prompt_suggestions(db: Session, asset_id: str, user: User) -> List[str]:
+        """
+        Generate prompt suggestions for a given asset. Blocking (the provider
+        call is synchronous under its coroutine), so call it from a sync endpoint.
+        """
         logger.info(f"Getting prompt suggestions for asset {asset_id}")
         asset = db.query(Asset).join(Project).filter(
             Asset.id == asset_id,
@@ -99,7 +204,7 @@ class GenerationService:
             return ["Make the background a solid color", "Add a festive border", "Convert to black and white"]
 
         ai_provider = get_ai_provider()
-        return await ai_provider.generate_prompt_suggestions(detected_elements)
+        return asyncio.run(ai_provider.generate_prompt_suggestions(detected_elements))
     
     @staticmethod
     def get_job_by_id(db: Session, job_id: str, user: User) -> Optional[GenerationJob]:
@@ -117,16 +222,134 @@ class GenerationService:
         progress: int
     ) -> GenerationJob:
         """Update job status and progress"""
+        job_id = str(job.id)
         job.status = status
         job.progress = progress
         db.commit()
-        db.refresh(job)
+        ProgressService.publish_progress("job", job_id, status.value, progress)
         return job
     
+    @staticmethod
+    def build_unit_key(asset_id: Any, asset_format_id: Any, width: int, height: int) -> str:
+        """Key of one unit of work in a generation job (asset, format or custom size)"""
+        return f"{asset_id}:{asset_format_id or 'custom'}:{width}x{height}"
+
+    @staticmethod
+    def get_completed_unit_keys(db: Session, job: GenerationJob) -> set:
+        """Unit keys already persisted for a job"""
+        rows = db.query(GeneratedAsset.unit_key).filter(
+            GeneratedAsset.job_id == job.id,
+            GeneratedAsset.unit_key.isnot(None)
+        ).all()
+        return {unit_key for (unit_key,) in rows}
+
+    @staticmethod
+    def cancel_job(db: Session, job: GenerationJob) -> GenerationJob:
+        """Request cooperative cancellation of a generation job"""
+        if job.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED):
+            return job
+
+        CancellationService.request_cancellation("job", str(job.id))
+        if job.status == JobStatus.PENDING:
+            # Not picked up yet: the worker will see the status and exit immediately
+            job.status = JobStatus.CANCELLED
+            db.commit()
+            db.refresh(job)
+            ProgressService.publish_progress("job", str(job.id), job.status.value, job.progress or 0)
+        return job
+
+    @staticmethod
+    def discard_generated_assets(db: Session, generated_assets: List[GeneratedAsset]) -> int:
+        """Delete generated asset rows and any of their files no other row still references"""
+        ids = [asset.id for asset in generated_assets]
+        paths = {asset.storage_path for asset in generated_assets}
+        for asset in generated_assets:
+            db.delete(asset)
+        db.flush()
+
+        still_referenced = {
+            path for (path,) in db.query(GeneratedAsset.storage_path).filter(
+                GeneratedAsset.storage_path.in_(paths),
+                GeneratedAsset.id.notin_(ids)
+            ).all()
+        } if paths else set()
+        for path in paths - still_referenced:
+            FileService.delete_file(path)
+        return len(ids)
+
+    @staticmethod
+    def finalize_cancelled_job(db: Session, job: GenerationJob) -> GenerationJob:
+        """Stop a cancelled job cleanly, keeping or discarding its outputs per CANCELLED_OUTPUT_POLICY"""
+        if settings.CANCELLED_OUTPUT_POLICY == "discard":
+            db.rollback()
+            discarded = GenerationService.discard_generated_assets(db, list(job.generated_assets))
+            logger.info(f"Discarded {discarded} generated assets of cancelled job {job.id}")
+        else:
+            # Keep whatever was rendered before the cancellation point
+            db.commit()
+
+        job.status = JobStatus.CANCELLED
+        db.commit()
+        db.refresh(job)
+        CancellationService.clear("job", str(job.id))
+        ProgressService.publish_progress("job", str(job.id), job.status.value, job.progress or 0)
+        logger.info(f"Generation job {job.id} cancelled.")
+        return job
+
+    @staticmethod
+    def has_results(db: Session, job: GenerationJob) -> bool:
+        """Check whether a job has persisted any (draft or final) generated assets yet"""
+        return db.query(GeneratedAsset.id).filter(GeneratedAsset.job_id == job.id).first() is not None
+
+    @staticmethod
+    def generated_asset_load_options(with_source: bool = False) -> list:
+        """
+        Loader options for everything a generated asset response or download
+        entry reads: its format and platform (joined), optionally its source asset.
+        """
+        options = [joinedload(GeneratedAsset.asset_format).joinedload(AssetFormat.platform)]
+        if with_source:
+            options.append(selectinload(GeneratedAsset.original_asset))
+        return options
+
+    @staticmethod
+    def get_generated_assets_with_owner(
+        db: Session, asset_ids: List[Any], with_source: bool = False
+    ) -> List[Tuple[GeneratedAsset, Any]]:
+        """
+        Load generated assets together with the id of the user owning their job,
+        in one query, so ownership of a whole selection is checked as a set.
+        """
+        return db.query(GeneratedAsset, GenerationJob.user_id).join(
+            GenerationJob, GeneratedAsset.job_id == GenerationJob.id
+        ).options(
+            *GenerationService.generated_asset_load_options(with_source)
+        ).filter(
+            GeneratedAsset.id.in_(asset_ids)
+        ).all()
+
+    @staticmethod
+    def get_generated_asset_owners(
+        db: Session, asset_ids: Optional[List[Any]] = None, job_id: Any = None
+    ) -> List[Tuple[Any, Any]]:
+        """
+        (asset id, owning user id) of the listed generated assets, or of every
+        output of a job, in one query and without loading the assets.
+        """
+        query = db.query(GeneratedAsset.id, GenerationJob.user_id).join(
+            GenerationJob, GeneratedAsset.job_id == GenerationJob.id
+        )
+        if job_id is not None:
+            return query.filter(GeneratedAsset.job_id == job_id).all()
+        return query.filter(GeneratedAsset.id.in_(asset_ids or [])).all()
+
     @staticmethod
     def get_job_results(db: Session, job: GenerationJob) -> Dict[str, List[GeneratedAssetResponse]]:
         """Get generation job results grouped by platform"""
-        generated_assets = db.query(GeneratedAsset).filter(
+        # Formats and platforms are loaded in the same query, not lazily per asset
+        generated_assets = db.query(GeneratedAsset).options(
+            *GenerationService.generated_asset_load_options()
+        ).filter(
             GeneratedAsset.job_id == job.id
         ).all()
         
@@ -145,6 +368,14 @@ class GenerationService:
             results[platform_name].append(asset_response)
         return results
     
+    @staticmethod
+    def get_display_path(asset: GeneratedAsset) -> str:
+        """Stored path shown for an asset: the preview render of its edit stack, if it has one"""
+        operations = EditRenderService.get_operations(asset.manual_edits)
+        if not operations:
+            return asset.storage_path
+        return EditRenderService.render_path(asset.storage_path, operations, "preview")
+
     @staticmethod
     def convert_to_response(asset: GeneratedAsset) -> GeneratedAssetResponse:
         """Convert generated asset to response format"""
@@ -152,11 +383,12 @@ class GenerationService:
             id=str(asset.id),
             originalAssetId=str(asset.original_asset_id),
             filename=os.path.basename(asset.storage_path),
-            assetUrl=FileService.get_file_url(asset.storage_path),
+            assetUrl=FileService.get_file_url(GenerationService.get_display_path(asset)),
             platformName=asset.asset_format.platform.name if asset.asset_format and asset.asset_format.platform else None,
             formatName=asset.asset_format.name if asset.asset_format else "Custom",
             dimensions=asset.dimensions,
             isNsfw=asset.is_nsfw,
+            isDraft=bool(asset.is_draft),
             manualEdits=asset.manual_edits
         )
     
@@ -164,37 +396,159 @@ class GenerationService:
     def apply_manual_edits(
         db: Session,
         asset: GeneratedAsset,
-        edits: Dict[str, Any]
+        edits: Dict[str, Any],
+        organization_id: Any = None
     ) -> GeneratedAsset:
-        """Apply manual edits to a generated asset"""
-        asset.manual_edits = edits
-        try:
-            original_path = os.path.join(settings.UPLOAD_DIR, asset.storage_path)
-            with Image.open(original_path) as img:
-                edited_img = img.copy()
-                if edits.get("crop"):
-                    crop_data = edits["crop"]
-                    width, height = img.size
-                    left = int(crop_data["x"] * width)
-                    top = int(crop_data["y"] * height)
-                    right = int((crop_data["x"] + crop_data["width"]) * width)
-                    bottom = int((crop_data["y"] + crop_data["height"]) * height)
-                    edited_img = edited_img.crop((left, top, right, bottom))
-                if edits.get("saturation") and edits["saturation"] != 1.0:
-                    from PIL import ImageEnhance
-                    enhancer = ImageEnhance.Color(edited_img)
-                    edited_img = enhancer.enhance(edits["saturation"])
-                edited_path = asset.storage_path.replace('.', '_edited.')
-                full_edited_path = os.path.join(settings.UPLOAD_DIR, edited_path)
-                edited_img.save(full_edited_path)
-                asset.storage_path = edited_path
-                asset.dimensions = {"width": edited_img.width, "height": edited_img.height}
-        except Exception as e:
-            print(f"Error applying manual edits: {e}")
+        """
+        Store manual edits as an operation stack on top of the unedited render.
+        Only the small preview is rendered now; the full-resolution render is
+        made lazily on download or export. Text overlays are styled from the
+        organization's text style sets. Raises ValueError for invalid edits.
+        """
+        operations = OverlayService.resolve_styles(
+            db, EditRenderService.normalize_operations(edits), organization_id
+        )
+        asset.manual_edits, asset.dimensions = GenerationService.render_manual_edits(
+            asset.storage_path, edits, operations
+        )
         db.commit()
         db.refresh(asset)
         return asset
+
+    @staticmethod
+    def render_manual_edits(
+        storage_path: str,
+        edits: Dict[str, Any],
+        operations: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """
+        Image work of applying validated edits: renders the preview and returns
+        the (manual_edits, dimensions) to store. Touches no database session,
+        so it can run in worker threads.
+        """
+        with Image.open(os.path.join(settings.UPLOAD_DIR, storage_path)) as img:
+            # Header only: the size is known without decoding the pixels
+            base_size = img.size
+
+        if operations:
+            EditRenderService.render(storage_path, operations, "preview")
+        width, height = EditRenderService.output_size(*base_size, operations)
+        return {**edits, "operations": operations}, {"width": width, "height": height}
+
+    @staticmethod
+    def get_download_source(asset: GeneratedAsset, file_on_disk: str) -> Any:
+        """Archive source of an asset: its file, or the file plus its edit stack to render at full resolution"""
+        operations = EditRenderService.get_operations(asset.manual_edits)
+        if not operations:
+            return file_on_disk
+        return EditedSource(asset.storage_path, EditRenderService.canonical_stack(operations))
     
+    @staticmethod
+    def derive_rendition(master_path: str, target_width: int, target_height: int) -> str:
+        """Derive a rendition of a smaller or equal size from an already rendered master"""
+        with Image.open(master_path) as master:
+            if master.size == (target_width, target_height):
+                return master_path
+
+            output_path = RenditionService.build_rendition_path(
+                master_path, "derived", target_width, target_height
+            )
+            if os.path.exists(output_path):
+                return output_path
+
+            master_width, master_height = master.size
+            target_ratio = target_width / target_height
+            if master_width / master_height > target_ratio:
+                crop_width = int(master_height * target_ratio)
+                left = (master_width - crop_width) // 2
+                crop_box = (left, 0, left + crop_width, master_height)
+            else:
+                crop_height = int(master_width / target_ratio)
+                top = (master_height - crop_height) // 2
+                crop_box = (0, top, master_width, top + crop_height)
+            cropped = RenditionService.crop_reduced(master, crop_box, target_width, target_height)
+            derived = cropped.resize((target_width, target_height), Image.Resampling.LANCZOS)
+            RenditionService.atomic_save(derived, output_path)
+            logger.info(f"Derived {target_width}x{target_height} rendition '{output_path}' from '{master_path}'")
+            return output_path
+
+    @staticmethod
+    def compute_master_canvas_size(
+        source_width: int,
+        source_height: int,
+        target_sizes: List[Tuple[int, int]]
+    ) -> Tuple[int, int]:
+        """Compute the smallest canvas around the source that covers every target aspect ratio"""
+        source_ratio = source_width / source_height
+        ratios = [width / height for width, height in target_sizes] + [source_ratio]
+        canvas_width = max(source_width, round(source_height * max(ratios)))
+        canvas_height = max(source_height, round(source_width / min(ratios)))
+        return canvas_width, canvas_height
+
+    @staticmethod
+    def create_master_canvas(
+        source_path: str,
+        target_sizes: List[Tuple[int, int]],
+        prompt: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Outpaint the source once into a master canvas covering all target aspect ratios.
+
+        Returns a dict with the canvas "path", its "width"/"height" and the
+        "source_box" (left, top, width, height) the original occupies on it,
+        or None if the canvas could not be generated.
+        """
+        with Image.open(source_path) as img:
+            source_width, source_height = img.size
+
+        canvas_width, canvas_height = GenerationService.compute_master_canvas_size(
+            source_width, source_height, target_sizes
+        )
+        scale = min(1.0, settings.GENERATION_CANVAS_MAX_EDGE / max(canvas_width, canvas_height))
+        canvas_width, canvas_height = round(canvas_width * scale), round(canvas_height * scale)
+        box_width, box_height = round(source_width * scale), round(source_height * scale)
+        source_box = ((canvas_width - box_width) // 2, (canvas_height - box_height) // 2, box_width, box_height)
+
+        logger.info(f"Outpainting master canvas {canvas_width}x{canvas_height} for '{source_path}'")
+        try:
+            ai_provider = get_ai_provider()
+            generated_path = asyncio.run(
+                ai_provider.resize_image_with_gemini(source_path, canvas_width, canvas_height, prompt)
+            )
+            canvas_path = GenerationService.derive_rendition(generated_path, canvas_width, canvas_height)
+        except Exception as e:
+            logger.warning(f"Master canvas generation failed: {e}. Falling back to per-format rendering.")
+            return None
+
+        return {
+            "path": canvas_path,
+            "width": canvas_width,
+            "height": canvas_height,
+            "source_box": source_box
+        }
+
+    @staticmethod
+    def crop_from_master_canvas(
+        db: Session,
+        user: User,
+        canvas: Dict[str, Any],
+        target_width: int,
+        target_height: int,
+        ai_metadata: Optional[Dict[str, Any]]
+    ) -> str:
+        """Cut a target size out of a master canvas around the source's focal point"""
+        focal_strategy = AIStrategyService.get_focal_point_strategy(db, user)
+        focal_x, focal_y = AIStrategyService.get_focal_point(ai_metadata or {}, focal_strategy) or (50.0, 50.0)
+
+        # Map the focal point from source percentages to canvas percentages
+        left, top, box_width, box_height = canvas["source_box"]
+        canvas_focal_x = (left + focal_x * box_width / 100) * 100 / canvas["width"]
+        canvas_focal_y = (top + focal_y * box_height / 100) * 100 / canvas["height"]
+
+        return AIStrategyService._crop_around_point(
+            canvas["path"], target_width, target_height, canvas_focal_x, canvas_focal_y
+        )
+
     @staticmethod
     def resize_image(
         db: Session,
@@ -203,12 +557,23 @@ class GenerationService:
         target_width: int, 
         target_height: int,
         ai_metadata: Optional[Dict[str, Any]],
-        prompt: Optional[str] = None
+        prompt: Optional[str] = None,
+        local_only: bool = False
     ) -> str:
-        """Resize image using the configured AI strategy with a fallback mechanism."""
+        """
+        Resize image using the configured AI strategy with a fallback mechanism.
+        `local_only` skips the Gemini Image Editor (used for progressive drafts).
+        """
         
+        use_gemini = settings.USE_GEMINI_IMAGE_EDITOR and not local_only
+        # Plain 'extend' renders don't need a remote call - the local engine handles them
+        if use_gemini and settings.PREFER_LOCAL_EXTEND and not prompt:
+            if AIStrategyService.get_adaptation_strategy(db, user) == "extend":
+                logger.info("Skipping Gemini Image Editor: using local background extension for 'extend'.")
+                use_gemini = False
+
         # Attempt to use the Gemini Image Editor first if enabled
-        if settings.USE_GEMINI_IMAGE_EDITOR:
+        if use_gemini:
             logger.info("Attempting to resize image with Gemini Image Editor...")
             try:
                 ai_provider = get_ai_provider()
@@ -236,15 +601,7 @@ class GenerationService:
                 )
             elif adaptation_strategy == "extend":
                 logger.info(f"Applying 'extend' strategy for target {target_width}x{target_height}")
-                with Image.open(source_path) as img:
-                    new_img = Image.new('RGB', (target_width, target_height), (255, 255, 255))
-                    x = (target_width - img.width) // 2
-                    y = (target_height - img.height) // 2
-                    new_img.paste(img, (x, y))
-                    output_path = source_path.replace('.', f'_{target_width}x{target_height}_extended.')
-                    new_img.save(output_path)
-                    logger.info(f"Saved extended image to '{output_path}'")
-                    return output_path
+                return BackgroundExtensionService.extend_file(source_path, target_width, target_height)
             else:
                 if adaptation_strategy == "crop" and not ai_metadata:
                     logger.warning("AI metadata not found for smart crop, falling back to center crop.")
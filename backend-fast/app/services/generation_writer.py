@@ -0,0 +1,118 @@
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.generated_asset import GeneratedAsset
+from app.models.generation_job import GenerationJob
+
+logger = logging.getLogger(__name__)
+
+
+class GeneratedAssetWriter:
+    """
+    Buffers GeneratedAsset rows of a generation job and writes them with one
+    multi-row INSERT ... RETURNING per batch.
+
+    Rows never enter the session's identity map, so memory stays flat on very
+    large jobs. Every flush commits, which makes it the job's checkpoint: on
+    PostgreSQL rows whose unit was already persisted by an earlier attempt are
+    skipped (ON CONFLICT DO NOTHING on the job/unit constraint).
+    """
+
+    def __init__(self, db: Session, batch_size: Optional[int] = None):
+        self.db = db
+        self.batch_size = max(1, batch_size or settings.GENERATION_INSERT_BATCH_SIZE)
+        self._rows: List[Dict[str, Any]] = []
+        self._callbacks: List[Callable[[Dict[str, str]], None]] = []
+        self.written = 0
+
+    def add(self, row: Dict[str, Any], on_flushed: Optional[Callable[[Dict[str, str]], None]] = None) -> None:
+        """
+        Queue a row (GeneratedAsset column values). `on_flushed` is called
+        after the batch is committed with a {unit_key: generated asset id} map.
+        """
+        self._rows.append(row)
+        if on_flushed:
+            self._callbacks.append(on_flushed)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def flush(self) -> Dict[str, str]:
+        """Insert and commit the buffered rows; returns {unit_key: id} of the rows written"""
+        if not self._rows:
+            return {}
+
+        rows, callbacks = self._rows, self._callbacks
+        self._rows, self._callbacks = [], []
+
+        if self.db.bind.dialect.name == "postgresql":
+            stmt = pg_insert(GeneratedAsset).on_conflict_do_nothing(constraint="_job_unit_uc")
+        else:
+            stmt = insert(GeneratedAsset)
+        result = self.db.execute(
+            stmt.returning(GeneratedAsset.id, GeneratedAsset.unit_key),
+            rows
+        )
+        written = {unit_key: str(asset_id) for asset_id, unit_key in result.all()}
+        self.db.commit()
+
+        self.written += len(written)
+        logger.info(f"Persisted {len(written)} generated asset(s) in one batch ({len(rows) - len(written)} already present)")
+        for callback in callbacks:
+            callback(written)
+        return written
+
+    def discard(self) -> None:
+        """Drop the buffered rows (after a rollback)"""
+        self._rows, self._callbacks = [], []
+
+
+class ProgressReporter:
+    """
+    Coalesces progress writes of a job: a report only goes out when enough
+    time has passed or progress moved enough since the last one (or forced).
+    Each report updates the Celery task state, the live progress channel and
+    the job row with a single UPDATE (no re-select of the job).
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        job_id: Any,
+        publish: Callable[[int], None],
+        min_interval: Optional[float] = None,
+        min_delta: Optional[int] = None
+    ):
+        self.db = db
+        self.job_id = job_id
+        self.publish = publish
+        self.min_interval = settings.GENERATION_PROGRESS_MIN_INTERVAL if min_interval is None else min_interval
+        self.min_delta = settings.GENERATION_PROGRESS_MIN_DELTA if min_delta is None else min_delta
+        self._last_progress: Optional[int] = None
+        self._last_time = 0.0
+
+    def report(self, progress: float, force: bool = False) -> bool:
+        """Report progress if due; returns whether it was written"""
+        progress = int(progress)
+        if progress == self._last_progress:
+            return False
+        now = time.monotonic()
+        if not force and self._last_progress is not None:
+            if now - self._last_time < self.min_interval and progress - self._last_progress < self.min_delta:
+                return False
+
+        self.publish(progress)
+        self.db.execute(
+            update(GenerationJob).where(GenerationJob.id == self.job_id).values(progress=progress)
+        )
+        self.db.commit()
+        self._last_progress = progress
+        self._last_time = now
+        return True
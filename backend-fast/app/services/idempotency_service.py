@@ -0,0 +1,109 @@
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+import redis
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyError(Exception):
+    """Base class for Idempotency-Key errors"""
+    pass
+
+
+class IdempotencyKeyReused(IdempotencyError):
+    """The key was already used for a request with a different payload"""
+    pass
+
+
+class IdempotencyRequestInProgress(IdempotencyError):
+    """The first request with this key has not finished yet"""
+    pass
+
+
+class IdempotencyService:
+    """
+    Idempotency-Key handling for POST endpoints that queue work.
+
+    The first request with a key claims it in Redis; once it succeeds its
+    response is stored under the key and replayed for retries with the same
+    key and payload. A failed request releases the key so it can be retried.
+    If Redis is unavailable requests are processed without the guarantee.
+    """
+
+    @staticmethod
+    def _key(scope: str, user_id: Any, idempotency_key: str) -> str:
+        return f"idempotency:{scope}:{user_id}:{idempotency_key}"
+
+    @staticmethod
+    def fingerprint(payload: Any) -> str:
+        """Stable hash of a request payload"""
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def begin(scope: str, user_id: Any, idempotency_key: Optional[str], payload: Any) -> Optional[Dict[str, Any]]:
+        """
+        Claim an idempotency key. Returns the stored response of a completed
+        earlier request (to be replayed), or None if this request should run.
+        """
+        if not idempotency_key:
+            return None
+
+        key = IdempotencyService._key(scope, user_id, idempotency_key)
+        fingerprint = IdempotencyService.fingerprint(payload)
+        try:
+            client = get_redis_client()
+            claimed = client.set(
+                key, json.dumps({"status": "in_progress", "fingerprint": fingerprint}),
+                nx=True, ex=settings.IDEMPOTENCY_IN_PROGRESS_TTL
+            )
+            if claimed:
+                return None
+            stored = client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Idempotency store unavailable, processing {scope} request without it: {e}")
+            return None
+
+        if stored is None:
+            # Expired between SET and GET: treat as a fresh request
+            return None
+        record = json.loads(stored)
+        if record["fingerprint"] != fingerprint:
+            raise IdempotencyKeyReused("Idempotency-Key was already used with a different request payload")
+        if record["status"] != "completed":
+            raise IdempotencyRequestInProgress("A request with this Idempotency-Key is still being processed")
+        logger.info(f"Replaying {scope} response for Idempotency-Key {idempotency_key}")
+        return record["response"]
+
+    @staticmethod
+    def complete(scope: str, user_id: Any, idempotency_key: Optional[str], payload: Any, response: Dict[str, Any]) -> None:
+        """Store the response of a successful request under its key"""
+        if not idempotency_key:
+            return
+        record = {
+            "status": "completed",
+            "fingerprint": IdempotencyService.fingerprint(payload),
+            "response": response
+        }
+        try:
+            get_redis_client().set(
+                IdempotencyService._key(scope, user_id, idempotency_key),
+                json.dumps(record, default=str),
+                ex=settings.IDEMPOTENCY_TTL
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Could not store {scope} response for Idempotency-Key {idempotency_key}: {e}")
+
+    @staticmethod
+    def release(scope: str, user_id: Any, idempotency_key: Optional[str]) -> None:
+        """Release a key after a failed request so the client can retry it"""
+        if not idempotency_key:
+            return
+        try:
+            get_redis_client().delete(IdempotencyService._key(scope, user_id, idempotency_key))
+        except redis.RedisError as e:
+            logger.warning(f"Could not release Idempotency-Key {idempotency_key}: {e}")
@@ -0,0 +1,215 @@
+import logging
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.asset import Asset
+from app.models.project import Project
+from app.models.text_style_set import TextStyleSet
+
+logger = logging.getLogger(__name__)
+
+# CSS-style weights -> font file suffix
+FONT_WEIGHTS = {
+    "100": "Thin", "thin": "Thin",
+    "200": "ExtraLight", "extralight": "ExtraLight",
+    "300": "Light", "light": "Light",
+    "400": "Regular", "normal": "Regular", "regular": "Regular",
+    "500": "Medium", "medium": "Medium",
+    "600": "SemiBold", "semibold": "SemiBold",
+    "700": "Bold", "bold": "Bold",
+    "800": "ExtraBold", "extrabold": "ExtraBold",
+    "900": "Black", "black": "Black",
+}
+
+
+@lru_cache(maxsize=settings.OVERLAY_FONT_CACHE_SIZE)
+def _load_font(family: str, size: int, weight: str) -> ImageFont.ImageFont:
+    """Load a font once per (family, size, weight); falls back to Pillow's default font"""
+    suffix = FONT_WEIGHTS.get(str(weight).lower(), "Regular")
+    compact = family.replace(" ", "")
+    candidates = [f"{compact}-{suffix}.ttf", f"{compact}-{suffix}.otf", f"{compact}.ttf", f"{compact}.otf"]
+    for name in candidates:
+        for path in (os.path.join(settings.FONT_DIR, name), name):
+            try:
+                # Bare names are also looked up in the system font directories
+                return ImageFont.truetype(path, size)
+            except OSError:
+                continue
+    logger.warning(f"Font '{family}' ({suffix}) not found, using the default font")
+    return ImageFont.load_default(size=size)
+
+
+@lru_cache(maxsize=settings.OVERLAY_LOGO_CACHE_SIZE)
+def _load_logo(path: str, mtime: float) -> Image.Image:
+    """Decode a logo once (RGBA); the mtime is part of the key so a replaced file is reloaded"""
+    with Image.open(path) as img:
+        return img.convert("RGBA")
+
+
+@lru_cache(maxsize=settings.OVERLAY_LOGO_CACHE_SIZE)
+def _scaled_logo(path: str, mtime: float, width: int) -> Image.Image:
+    """Logo pre-scaled to a width, cached per (logo, size)"""
+    logo = _load_logo(path, mtime)
+    height = max(1, round(logo.height * width / logo.width))
+    return logo.resize((width, height), Image.Resampling.LANCZOS)
+
+
+class OverlayService:
+    """
+    Composites text (styled from a TextStyleSet) and logos onto images, as
+    'text' and 'logo' operations of an edit stack.
+
+    Sizes are relative to the canvas (font sizes are defined for a canvas
+    OVERLAY_REFERENCE_WIDTH wide, logos as a percentage of the width), so a
+    stack looks the same on a preview and on the full-resolution render.
+    Fonts and decoded, pre-scaled logos are cached per process.
+    """
+
+    @staticmethod
+    def text_operation(overlay: Dict[str, Any]) -> Dict[str, Any]:
+        """Edit operation of a TextOverlay payload"""
+        return {"type": "text", "params": dict(overlay)}
+
+    @staticmethod
+    def logo_operation(overlay: Dict[str, Any]) -> Dict[str, Any]:
+        """Edit operation of a LogoOverlay payload"""
+        return {"type": "logo", "params": dict(overlay)}
+
+    @staticmethod
+    def validate(op: Dict[str, Any]) -> None:
+        """Validate a text or logo operation; raises ValueError"""
+        params = op["params"]
+        position = params.get("position") or {}
+        if not all(isinstance(position.get(k), (int, float)) and 0 <= position[k] <= 1 for k in ("x", "y")):
+            raise ValueError(f"{op['type']} position needs x and y between 0 and 1")
+        if op["type"] == "text":
+            if not isinstance(params.get("content"), str) or not params["content"].strip():
+                raise ValueError("text overlay needs content")
+            if not (params.get("textStyleSetId") and params.get("styleType")):
+                raise ValueError("text overlay needs a textStyleSetId and styleType")
+        else:
+            size = params.get("size")
+            if not isinstance(size, (int, float)) or not 0 < size <= 100:
+                raise ValueError("logo size must be a percentage of the canvas width (0-100]")
+            OverlayService.resolve_logo_path(params.get("logoUrl"))
+
+    @staticmethod
+    def resolve_logo_path(logo_url: Optional[str]) -> str:
+        """Local file of a logo URL (an uploaded file); raises ValueError"""
+        if not logo_url:
+            raise ValueError("logo overlay needs a logoUrl")
+        relative = logo_url[len("/uploads/"):] if logo_url.startswith("/uploads/") else logo_url
+        upload_dir = os.path.abspath(settings.UPLOAD_DIR)
+        path = os.path.abspath(os.path.join(upload_dir, relative))
+        if not path.startswith(upload_dir + os.sep) or not os.path.isfile(path):
+            raise ValueError("logo must be an uploaded file")
+        return path
+
+    @staticmethod
+    def check_logo_access(db: Session, operations: List[Dict[str, Any]], organization_id: Any) -> None:
+        """
+        Logos must be assets uploaded to a project of the organization: any
+        other file under UPLOAD_DIR (another user's upload or render) is
+        rejected with a ValueError. All logos are checked in one query.
+        """
+        upload_dir = os.path.abspath(settings.UPLOAD_DIR)
+        paths = {
+            os.path.relpath(OverlayService.resolve_logo_path(op["params"].get("logoUrl")), upload_dir)
+            for op in operations if op["type"] == "logo"
+        }
+        if not paths:
+            return
+        owned = {
+            storage_path for storage_path, in db.query(Asset.storage_path).join(
+                Project, Asset.project_id == Project.id
+            ).filter(
+                Asset.storage_path.in_(paths),
+                Project.organization_id == organization_id
+            ).all()
+        }
+        if paths - owned:
+            raise ValueError("logo must be an asset uploaded to one of your organization's projects")
+
+    @staticmethod
+    def resolve_styles(db: Session, operations: List[Dict[str, Any]], organization_id: Any) -> List[Dict[str, Any]]:
+        """
+        Embed the TextStyleSet style of every text operation, so the stack
+        renders without the database (in workers) and its hash changes when
+        the style does. All style sets are read in one query. Logos are
+        checked against the organization's uploads (check_logo_access).
+        """
+        OverlayService.check_logo_access(db, operations, organization_id)
+        set_ids = {
+            str(op["params"]["textStyleSetId"]) for op in operations
+            if op["type"] == "text" and op["params"].get("textStyleSetId")
+        }
+        if not set_ids:
+            return operations
+        style_sets = {
+            str(style_set.id): style_set for style_set in db.query(TextStyleSet).filter(
+                TextStyleSet.id.in_(set_ids),
+                TextStyleSet.organization_id == organization_id,
+                TextStyleSet.is_active == True
+            ).all()
+        }
+        for op in operations:
+            if op["type"] != "text" or not op["params"].get("textStyleSetId"):
+                continue
+            style_set = style_sets.get(str(op["params"]["textStyleSetId"]))
+            if not style_set:
+                raise ValueError("Text style set not found")
+            style = style_set.styles.get(op["params"]["styleType"])
+            if not style:
+                raise ValueError(f"Text style set '{style_set.name}' has no '{op['params']['styleType']}' style")
+            op["params"]["style"] = dict(style)
+        return operations
+
+    @staticmethod
+    def get_font(family: str, size: int, weight: str) -> ImageFont.ImageFont:
+        return _load_font(family, max(1, int(size)), str(weight))
+
+    @staticmethod
+    def get_logo(path: str, width: int) -> Image.Image:
+        return _scaled_logo(path, os.path.getmtime(path), max(1, int(width)))
+
+    @staticmethod
+    def _anchor_point(image: Image.Image, position: Dict[str, float]) -> Tuple[int, int]:
+        return round(position["x"] * image.width), round(position["y"] * image.height)
+
+    @staticmethod
+    def draw_text(image: Image.Image, params: Dict[str, Any]) -> Image.Image:
+        """Draw a text overlay centred on its position; returns a new image"""
+        style = params["style"]
+        scale = image.width / settings.OVERLAY_REFERENCE_WIDTH
+        font = OverlayService.get_font(
+            style.get("fontFamily") or style.get("font") or "Inter",
+            round((style.get("fontSize") or style.get("size") or 32) * scale),
+            style.get("fontWeight") or "normal"
+        )
+        color = style.get("color") or "#ffffff"
+        try:
+            ImageColor.getrgb(color)
+        except ValueError:
+            color = "#ffffff"
+
+        result = image.copy()
+        ImageDraw.Draw(result).multiline_text(
+            OverlayService._anchor_point(image, params["position"]), params["content"],
+            font=font, fill=color, anchor="mm", align="center"
+        )
+        return result
+
+    @staticmethod
+    def paste_logo(image: Image.Image, params: Dict[str, Any]) -> Image.Image:
+        """Composite a logo centred on its position; returns a new image"""
+        logo = OverlayService.get_logo(
+            OverlayService.resolve_logo_path(params["logoUrl"]), image.width * params["size"] / 100
+        )
+        x, y = OverlayService._anchor_point(image, params["position"])
+        result = image.copy()
+        result.paste(logo, (x - logo.width // 2, y - logo.height // 2), logo)
+        return result
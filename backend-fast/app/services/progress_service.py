@@ -0,0 +1,146 @@
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+import anyio.to_thread
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressService:
+    """
+    Live progress for generation jobs and project analysis.
+
+    Workers publish events to a Redis pub/sub channel per job/project and keep
+    the last progress event as a snapshot key, so status reads and newly
+    connected SSE clients never have to wait for the next event.
+    """
+
+    @staticmethod
+    def _channel(kind: str, object_id: str) -> str:
+        return f"progress:{kind}:{object_id}"
+
+    @staticmethod
+    def _snapshot_key(kind: str, object_id: str) -> str:
+        return f"progress:snapshot:{kind}:{object_id}"
+
+    @staticmethod
+    def publish_progress(kind: str, object_id: str, status: str, progress: int, **extra: Any) -> None:
+        """Publish a progress event and store it as the latest snapshot"""
+        event = {
+            "event": "progress",
+            "kind": kind,
+            "id": object_id,
+            "status": status,
+            "progress": int(progress),
+            "timestamp": time.time(),
+            **extra
+        }
+        payload = json.dumps(event, default=str)
+        try:
+            pipe = get_redis_client().pipeline()
+            pipe.set(ProgressService._snapshot_key(kind, object_id), payload, ex=settings.PROGRESS_SNAPSHOT_TTL)
+            pipe.publish(ProgressService._channel(kind, object_id), payload)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish progress for {kind} {object_id}: {e}")
+
+    @staticmethod
+    def publish_unit(kind: str, object_id: str, **unit: Any) -> None:
+        """Publish a per-unit completion event (an analysed asset, a generated size)"""
+        event = {"event": "unit", "kind": kind, "id": object_id, "timestamp": time.time(), **unit}
+        try:
+            get_redis_client().publish(ProgressService._channel(kind, object_id), json.dumps(event, default=str))
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish unit event for {kind} {object_id}: {e}")
+
+    @staticmethod
+    def get_snapshot(kind: str, object_id: str) -> Optional[Dict[str, Any]]:
+        """Return the last published progress event, or None"""
+        try:
+            payload = get_redis_client().get(ProgressService._snapshot_key(kind, object_id))
+        except redis.RedisError as e:
+            logger.warning(f"Could not read progress snapshot for {kind} {object_id}: {e}")
+            return None
+        return json.loads(payload) if payload else None
+
+    @staticmethod
+    def format_sse(event: Dict[str, Any]) -> str:
+        """Format an event as a Server-Sent Events message"""
+        return f"event: {event.get('event', 'progress')}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    @staticmethod
+    def _merge_snapshot(initial: Dict[str, Any], snapshot: Optional[Dict[str, Any]], terminal: set) -> Dict[str, Any]:
+        """Initial event of a stream: the database state, unless the worker has published something newer"""
+        if not snapshot or initial.get("status") in terminal:
+            return initial
+        if snapshot.get("status") in terminal or snapshot.get("status") == initial.get("status"):
+            return {**initial, **snapshot}
+        return initial
+
+    @staticmethod
+    async def stream(
+        kind: str,
+        object_id: str,
+        initial: Dict[str, Any],
+        terminal_statuses: Iterable[str],
+        refresh: Optional[Callable[[], Optional[Dict[str, Any]]]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream SSE messages for a job/project: the initial snapshot first, then
+        live events until a terminal status. The channel is subscribed before
+        the snapshot is read, so an event published in between is never lost.
+        While idle, `refresh` (a blocking database read, run in a thread)
+        re-checks the status, and the stream ends after
+        PROGRESS_STREAM_MAX_SECONDS; clients reconnect if still interested.
+        If Redis is unavailable the stream ends after the initial event and
+        the client falls back to the status endpoint.
+        """
+        terminal = set(terminal_statuses)
+        client = aioredis.from_url(settings.REDIS_URL, socket_connect_timeout=2)
+        pubsub = client.pubsub()
+        try:
+            try:
+                await pubsub.subscribe(ProgressService._channel(kind, object_id))
+                payload = await client.get(ProgressService._snapshot_key(kind, object_id))
+            except redis.RedisError as e:
+                logger.warning(f"Progress stream for {kind} {object_id} has no Redis: {e}")
+                yield ProgressService.format_sse(initial)
+                return
+
+            initial = ProgressService._merge_snapshot(initial, json.loads(payload) if payload else None, terminal)
+            yield ProgressService.format_sse(initial)
+            if initial.get("status") in terminal:
+                return
+
+            deadline = time.monotonic() + settings.PROGRESS_STREAM_MAX_SECONDS
+            while time.monotonic() < deadline:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=settings.PROGRESS_KEEPALIVE_SECONDS
+                )
+                if message is None:
+                    if refresh:
+                        current = await anyio.to_thread.run_sync(refresh)
+                        if current and current.get("status") in terminal:
+                            yield ProgressService.format_sse(current)
+                            return
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                event = json.loads(message["data"])
+                yield ProgressService.format_sse(event)
+                if event.get("event") == "progress" and event.get("status") in terminal:
+                    return
+        except redis.RedisError as e:
+            logger.warning(f"Progress stream for {kind} {object_id} lost Redis: {e}")
+        finally:
+            try:
+                await pubsub.aclose()
+                await client.aclose()
+            except redis.RedisError:
+                pass
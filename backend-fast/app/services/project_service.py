@@ -4,9 +4,12 @@ from typing import List, Optional, Dict, Any
 
 from app.models.project import Project, ProjectStatus
 from app.models.asset import Asset
+from app.models.generation_job import GenerationJob, JobStatus
 from app.models.user import User
 from app.schemas.project import ProjectCreate, ProjectResponse
 from app.services.file_service import FileService
+from app.services.cancellation_service import CancellationService
+from app.services.progress_service import ProgressService
 
 logger = logging.getLogger(__name__)
 
@@ -74,6 +77,30 @@ class ProjectService:
         db.refresh(project)
         return project
     
+    @staticmethod
+    def cancel_project(db: Session, project: Project) -> Project:
+        """Request cooperative cancellation of a project's analysis and its active generation jobs"""
+        from app.services.generation_service import GenerationService
+
+        # The project flag only stops a running analysis; set for a reviewed project
+        # it would also make prompt edits on it skip until the flag expires
+        analysing = project.status in (ProjectStatus.UPLOADING, ProjectStatus.PROCESSING)
+        if analysing:
+            CancellationService.request_cancellation("project", str(project.id))
+        active_jobs = db.query(GenerationJob).filter(
+            GenerationJob.project_id == project.id,
+            GenerationJob.status.in_([JobStatus.PENDING, JobStatus.PROCESSING])
+        ).all()
+        for job in active_jobs:
+            GenerationService.cancel_job(db, job)
+
+        if analysing:
+            project.status = ProjectStatus.CANCELLED
+            db.commit()
+            db.refresh(project)
+            ProgressService.publish_progress("project", str(project.id), project.status.value, 0)
+        return project
+
     @staticmethod
     def get_project_assets(db: Session, project: Project) -> List[Asset]:
         """Get all assets for a project"""
@@ -108,13 +135,21 @@ class ProjectService:
     
     @staticmethod
     def calculate_processing_progress(project: Project) -> int:
-        """Calculate processing progress based on project status"""
+        """
+        Progress of the project's analysis: the live value published by the
+        worker while processing, otherwise derived from the project status
+        """
+        if project.status == ProjectStatus.PROCESSING:
+            snapshot = ProgressService.get_snapshot("project", str(project.id))
+            if snapshot and snapshot.get("status") == ProjectStatus.PROCESSING.value:
+                return snapshot["progress"]
         status_progress = {
             ProjectStatus.UPLOADING: 10,
             ProjectStatus.PROCESSING: 50,
             ProjectStatus.READY_FOR_REVIEW: 80,
             ProjectStatus.GENERATING: 90,
             ProjectStatus.COMPLETED: 100,
-            ProjectStatus.FAILED: 0
+            ProjectStatus.FAILED: 0,
+            ProjectStatus.CANCELLED: 0
         }
         return status_progress.get(project.status, 0)
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import os
+import uuid
+from typing import Any, Optional, Tuple
+from PIL import Image
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RenditionService:
+    """Service for naming and writing generated renditions"""
+
+    @staticmethod
+    def rendition_key(source_path: str, strategy: str, **params: Any) -> str:
+        """Build a short, stable hash of the source and the render parameters"""
+        payload = json.dumps(
+            {"source": os.path.basename(source_path), "strategy": strategy, "params": params},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+    @staticmethod
+    def build_rendition_path(
+        source_path: str,
+        strategy: str,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        ext: Optional[str] = None,
+        **params: Any
+    ) -> str:
+        """
+        Build a deterministic output path for a rendition of `source_path`.
+
+        The name encodes the target size, the strategy and a hash of every
+        other render parameter, so two different renders never share a file
+        and the same render always maps to the same file.
+        """
+        base, source_ext = os.path.splitext(source_path)
+        key = RenditionService.rendition_key(source_path, strategy, width=width, height=height, **params)
+        size = f"_{width}x{height}" if width and height else ""
+        return f"{base}{size}_{strategy}_{key}{ext or source_ext}"
+
+    @staticmethod
+    def reduction_factor(crop_width: int, crop_height: int, target_width: int, target_height: int) -> int:
+        """
+        Largest power-of-two reduction (1, 2, 4 or 8) that still leaves the crop
+        at least RENDER_DECODE_OVERSAMPLE times the target size, so the final
+        LANCZOS resample always has enough source pixels to work with.
+        """
+        if not settings.RENDER_REDUCED_DECODE:
+            return 1
+        headroom = min(crop_width / target_width, crop_height / target_height) / settings.RENDER_DECODE_OVERSAMPLE
+        for factor in (8, 4, 2):
+            if headroom >= factor:
+                return factor
+        return 1
+
+    @staticmethod
+    def crop_reduced(
+        img: Image.Image,
+        crop_box: Tuple[int, int, int, int],
+        target_width: int,
+        target_height: int
+    ) -> Image.Image:
+        """
+        Crop `crop_box` (in full-resolution coordinates) out of a not yet loaded
+        image, decoding at a reduced scale where the target size allows it.
+
+        JPEGs are decoded in the DCT domain via `Image.draft`, which skips most
+        of the decode work; other formats are box-reduced after cropping. The
+        result still needs the final resample to the exact target size.
+        """
+        left, top, right, bottom = crop_box
+        factor = RenditionService.reduction_factor(right - left, bottom - top, target_width, target_height)
+        if factor == 1:
+            return img.crop(crop_box)
+
+        full_width, full_height = img.size
+        if img.format == "JPEG":
+            img.draft(img.mode, (full_width // factor, full_height // factor))
+            scale_x = img.width / full_width
+            scale_y = img.height / full_height
+            if scale_x < 1 or scale_y < 1:
+                logger.info(f"Decoding JPEG at reduced size {img.width}x{img.height} (from {full_width}x{full_height})")
+                return img.crop((
+                    int(left * scale_x), int(top * scale_y),
+                    int(right * scale_x), int(bottom * scale_y)
+                ))
+
+        return img.crop(crop_box).reduce(factor)
+
+    @staticmethod
+    def _image_format_for(path: str) -> Optional[str]:
+        """Resolve the Pillow format name from a file extension"""
+        ext = os.path.splitext(path)[1].lower()
+        return Image.registered_extensions().get(ext)
+
+    @staticmethod
+    def atomic_save(image: Image.Image, output_path: str, **save_kwargs: Any) -> str:
+        """Save an image to a temp file next to `output_path`, then rename it into place"""
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        image_format = save_kwargs.pop("format", None) or RenditionService._image_format_for(output_path)
+        tmp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            image.save(tmp_path, format=image_format, **save_kwargs)
+            os.replace(tmp_path, output_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return output_path
+
+    @staticmethod
+    def atomic_write_bytes(output_path: str, data: bytes) -> str:
+        """Write raw bytes to a temp file next to `output_path`, then rename it into place"""
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        tmp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, output_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return output_path
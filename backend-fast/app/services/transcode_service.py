@@ -0,0 +1,163 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+from PIL import Image, features
+
+from app.core.config import settings
+from app.services.edit_render_service import EditRenderService, EditedSource
+from app.services.rendition_service import RenditionService
+
+logger = logging.getLogger(__name__)
+
+
+class TranscodeService:
+    """
+    Converts generated assets to the format and quality requested for a
+    download or export.
+
+    Transcoded files are renditions like any other: named after the source,
+    format and quality, written atomically next to the source and reused by
+    every later download of the same asset with the same options.
+    """
+
+    # Requested format -> (Pillow format, file extension)
+    FORMATS = {
+        "jpeg": ("JPEG", ".jpg"),
+        "jpg": ("JPEG", ".jpg"),
+        "png": ("PNG", ".png"),
+        "webp": ("WEBP", ".webp"),
+    }
+    ORIGINAL = "original"
+    QUALITIES = ("high", "medium", "low")
+
+    @staticmethod
+    def normalize_format(image_format: str) -> str:
+        """Validate a requested format; returns 'jpeg', 'png', 'webp' or 'original'"""
+        image_format = (image_format or TranscodeService.ORIGINAL).lower()
+        if image_format == "jpg":
+            image_format = "jpeg"
+        if image_format == TranscodeService.ORIGINAL:
+            return image_format
+        if image_format not in TranscodeService.FORMATS:
+            raise ValueError(f"Unsupported download format '{image_format}'")
+        if image_format == "webp" and not (settings.TRANSCODE_ALLOW_WEBP and features.check("webp")):
+            raise ValueError("WebP downloads are not available")
+        return image_format
+
+    @staticmethod
+    def normalize_quality(quality: str) -> str:
+        quality = (quality or "high").lower()
+        if quality not in TranscodeService.QUALITIES:
+            raise ValueError(f"Unsupported download quality '{quality}'")
+        return quality
+
+    @staticmethod
+    def extension_for(image_format: str, source_path: str) -> str:
+        """File extension of an asset downloaded in `image_format`"""
+        if image_format == TranscodeService.ORIGINAL:
+            return os.path.splitext(source_path)[1]
+        return TranscodeService.FORMATS[image_format][1]
+
+    @staticmethod
+    def encoder_options(image_format: str, quality: str) -> Dict[str, Any]:
+        """Tuned Pillow save options per format and quality"""
+        if image_format == "jpeg":
+            return {
+                "quality": settings.TRANSCODE_QUALITY[quality],
+                "optimize": True,
+                "progressive": True,
+                # Keep full chroma resolution for high quality (text and logos stay crisp)
+                "subsampling": 0 if quality == "high" else 2,
+            }
+        if image_format == "webp":
+            return {
+                "quality": settings.TRANSCODE_QUALITY[quality],
+                "method": settings.TRANSCODE_WEBP_METHOD,
+            }
+        # PNG is lossless; the level only trades encode time for size
+        return {"compress_level": settings.TRANSCODE_PNG_COMPRESS_LEVEL}
+
+    @staticmethod
+    def needs_transcode(source_path: str, image_format: str, quality: str) -> bool:
+        """Whether the stored file can be shipped as-is"""
+        if image_format == TranscodeService.ORIGINAL:
+            return False
+        source_format = RenditionService._image_format_for(source_path)
+        if source_format != TranscodeService.FORMATS[image_format][0]:
+            return True
+        # Same format: re-encoding at high quality would only add generation loss.
+        # Low-quality PNGs are reduced to a palette, which does shrink them.
+        if image_format == "png":
+            return quality == "low"
+        return quality != "high"
+
+    @staticmethod
+    def transcode(source_path: str, image_format: str, quality: str) -> str:
+        """Return the path of `source_path` in the requested format and quality, transcoding once"""
+        if not TranscodeService.needs_transcode(source_path, image_format, quality):
+            return source_path
+
+        output_path = RenditionService.build_rendition_path(
+            source_path, "transcoded",
+            ext=TranscodeService.FORMATS[image_format][1], format=image_format, quality=quality
+        )
+        if os.path.exists(output_path):
+            return output_path
+
+        with Image.open(source_path) as img:
+            if image_format == "jpeg":
+                converted = TranscodeService._flatten(img)
+            elif image_format == "png" and quality == "low":
+                converted = img.convert("RGBA").quantize(256, method=Image.Quantize.FASTOCTREE)
+            else:
+                converted = img if img.mode in ("RGB", "RGBA") else img.convert("RGBA")
+            RenditionService.atomic_save(
+                converted, output_path, **TranscodeService.encoder_options(image_format, quality)
+            )
+        logger.info(f"Transcoded '{os.path.basename(source_path)}' to {image_format}/{quality}")
+        return output_path
+
+    @staticmethod
+    def _flatten(img: Image.Image) -> Image.Image:
+        """Composite transparency onto white for formats without alpha"""
+        if img.mode in ("RGBA", "LA", "P"):
+            rgba = img.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            return background
+        return img.convert("RGB")
+
+    @staticmethod
+    def _prepare(source: Union[str, EditedSource], image_format: str, quality: str) -> str:
+        if isinstance(source, EditedSource):
+            source = EditRenderService.resolve(source)
+        return TranscodeService.transcode(source, image_format, quality)
+
+    @staticmethod
+    def transcode_entries(
+        entries: Iterable[Tuple[str, Any]],
+        image_format: str,
+        quality: str,
+        max_workers: Optional[int] = None
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Render and transcode the file entries of an archive in a thread pool
+        (Pillow releases the GIL while decoding and encoding), yielding them in
+        order as soon as each is ready so the archive can be streamed meanwhile.
+        Sources are file paths or EditedSources (rendered at full resolution
+        first); each distinct source is processed once and in-memory entries
+        pass through untouched.
+        """
+        entries = list(entries)
+        sources = list(dict.fromkeys(source for _, source in entries if not isinstance(source, (bytes, bytearray))))
+        pool = ThreadPoolExecutor(max_workers=max_workers or settings.TRANSCODE_WORKERS)
+        try:
+            futures = {
+                source: pool.submit(TranscodeService._prepare, source, image_format, quality)
+                for source in sources
+            }
+            for name, source in entries:
+                yield name, source if isinstance(source, (bytes, bytearray)) else futures[source].result()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
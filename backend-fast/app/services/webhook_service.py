@@ -0,0 +1,219 @@
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import redis
+import requests
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+from app.models.user import User
+from app.models.webhook_endpoint import WebhookEndpoint
+from app.schemas.webhook import WebhookEndpointCreate
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_EVENTS = (
+    "analysis.completed",
+    "analysis.failed",
+    "generation.completed",
+    "generation.failed",
+    "prompt_edit.completed",
+)
+
+
+class WebhookService:
+    """Service for per-organization webhook registrations and signed deliveries"""
+
+    # Registrations
+    @staticmethod
+    def validate_events(events: List[str]) -> None:
+        """Raise ValueError for unknown event names"""
+        unknown = sorted(set(events) - set(WEBHOOK_EVENTS))
+        if unknown or not events:
+            raise ValueError(f"Unknown or missing webhook events {unknown}; valid events: {list(WEBHOOK_EVENTS)}")
+
+    @staticmethod
+    def create_endpoint(db: Session, endpoint_data: WebhookEndpointCreate, admin_user: User) -> WebhookEndpoint:
+        """Register a webhook endpoint for the admin's organization"""
+        WebhookService.validate_events(endpoint_data.events)
+        endpoint = WebhookEndpoint(
+            organization_id=admin_user.organization_id,
+            url=str(endpoint_data.url),
+            secret=endpoint_data.secret or secrets.token_hex(32),
+            events=sorted(set(endpoint_data.events)),
+            created_by_admin_id=admin_user.id
+        )
+        db.add(endpoint)
+        db.commit()
+        db.refresh(endpoint)
+        return endpoint
+
+    @staticmethod
+    def get_endpoints(db: Session, admin_user: User) -> List[WebhookEndpoint]:
+        """Get all webhook endpoints of the admin's organization"""
+        return db.query(WebhookEndpoint).filter(
+            WebhookEndpoint.organization_id == admin_user.organization_id
+        ).all()
+
+    @staticmethod
+    def get_endpoint_by_id(db: Session, endpoint_id: str, admin_user: User) -> Optional[WebhookEndpoint]:
+        """Get a webhook endpoint by ID from the admin's organization"""
+        return db.query(WebhookEndpoint).filter(
+            WebhookEndpoint.id == endpoint_id,
+            WebhookEndpoint.organization_id == admin_user.organization_id
+        ).first()
+
+    @staticmethod
+    def update_endpoint(db: Session, endpoint: WebhookEndpoint, update_data: dict) -> WebhookEndpoint:
+        """Update a webhook endpoint"""
+        if update_data.get("events") is not None:
+            WebhookService.validate_events(update_data["events"])
+            update_data["events"] = sorted(set(update_data["events"]))
+        if update_data.get("url") is not None:
+            update_data["url"] = str(update_data["url"])
+        for field, value in update_data.items():
+            if value is not None:
+                setattr(endpoint, field, value)
+        db.commit()
+        db.refresh(endpoint)
+        return endpoint
+
+    @staticmethod
+    def delete_endpoint(db: Session, endpoint: WebhookEndpoint) -> None:
+        """Delete a webhook endpoint"""
+        db.delete(endpoint)
+        db.commit()
+
+    # Payloads and signing
+    @staticmethod
+    def build_payload(event: str, organization_id: Any, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the JSON payload of a single event"""
+        return {
+            "id": uuid.uuid4().hex,
+            "event": event,
+            "organizationId": str(organization_id),
+            "createdAt": datetime.now(timezone.utc).isoformat(),
+            "data": data
+        }
+
+    @staticmethod
+    def build_batch_payload(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Wrap several event payloads into one batched delivery"""
+        return {
+            "id": uuid.uuid4().hex,
+            "event": "batch",
+            "createdAt": datetime.now(timezone.utc).isoformat(),
+            "events": events
+        }
+
+    @staticmethod
+    def sign(secret: str, timestamp: int, body: bytes) -> str:
+        """HMAC-SHA256 over "<timestamp>.<body>", hex encoded"""
+        message = f"{timestamp}.".encode("utf-8") + body
+        return hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def verify(secret: str, timestamp: str, body: bytes, signature: str, tolerance: int = 300) -> bool:
+        """Check a delivery signature (used by receivers and tests)"""
+        try:
+            if abs(time.time() - int(timestamp)) > tolerance:
+                return False
+        except (TypeError, ValueError):
+            return False
+        expected = "sha256=" + WebhookService.sign(secret, int(timestamp), body)
+        return hmac.compare_digest(expected, signature or "")
+
+    @staticmethod
+    def send(url: str, secret: str, payload: Dict[str, Any]) -> requests.Response:
+        """POST a signed payload to a webhook URL"""
+        body = json.dumps(payload, separators=(",", ":"), sort_keys=True, default=str).encode("utf-8")
+        timestamp = int(time.time())
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "AssetForgeAI-Webhooks/1.0",
+            "X-Webhook-Id": payload["id"],
+            "X-Webhook-Event": payload["event"],
+            "X-Webhook-Timestamp": str(timestamp),
+            "X-Webhook-Signature": "sha256=" + WebhookService.sign(secret, timestamp, body)
+        }
+        return requests.post(url, data=body, headers=headers, timeout=settings.WEBHOOK_TIMEOUT_SECONDS)
+
+    # Dispatch
+    @staticmethod
+    def batch_key(endpoint_id: str) -> str:
+        return f"webhooks:batch:{endpoint_id}"
+
+    @staticmethod
+    def _is_high_volume(organization_id: Any) -> bool:
+        """Count the organization's events per minute; above the threshold they are batched"""
+        if not settings.WEBHOOK_BATCH_THRESHOLD:
+            return False
+        key = f"webhooks:rate:{organization_id}:{int(time.time() // 60)}"
+        pipe = get_redis_client().pipeline()
+        pipe.incr(key)
+        pipe.expire(key, 120)
+        count, _ = pipe.execute()
+        return count > settings.WEBHOOK_BATCH_THRESHOLD
+
+    @staticmethod
+    def schedule_batch_flush(endpoint_id: str, countdown: float) -> None:
+        """Schedule one flush per endpoint and batch window"""
+        from app.tasks.webhook_tasks import flush_webhook_batch
+
+        scheduled = get_redis_client().set(
+            f"{WebhookService.batch_key(endpoint_id)}:scheduled", 1,
+            nx=True, ex=int(settings.WEBHOOK_BATCH_WINDOW_SECONDS * 10) + 60
+        )
+        if scheduled:
+            flush_webhook_batch.apply_async(args=[endpoint_id], countdown=countdown)
+
+    @staticmethod
+    def emit(db: Session, organization_id: Any, event: str, data: Dict[str, Any]) -> int:
+        """
+        Queue deliveries of an event to every active endpoint of the organization
+        subscribed to it. Never raises: a webhook problem must not fail the job
+        that emitted it. Returns the number of endpoints the event was queued for.
+        """
+        from app.tasks.webhook_tasks import deliver_webhook
+
+        try:
+            endpoints = [
+                endpoint for endpoint in db.query(WebhookEndpoint).filter(
+                    WebhookEndpoint.organization_id == organization_id,
+                    WebhookEndpoint.is_active == True
+                ).all()
+                if event in (endpoint.events or [])
+            ]
+            if not endpoints:
+                return 0
+
+            payload = WebhookService.build_payload(event, organization_id, data)
+            try:
+                batched = WebhookService._is_high_volume(organization_id)
+            except redis.RedisError as e:
+                logger.warning(f"Could not check webhook volume for organization {organization_id}: {e}")
+                batched = False
+
+            for endpoint in endpoints:
+                endpoint_id = str(endpoint.id)
+                if batched:
+                    try:
+                        get_redis_client().rpush(WebhookService.batch_key(endpoint_id), json.dumps(payload, default=str))
+                        WebhookService.schedule_batch_flush(endpoint_id, settings.WEBHOOK_BATCH_WINDOW_SECONDS)
+                        continue
+                    except redis.RedisError as e:
+                        logger.warning(f"Could not batch webhook for endpoint {endpoint_id}, delivering directly: {e}")
+                deliver_webhook.delay(endpoint_id, payload)
+
+            logger.info(f"Queued '{event}' webhook for {len(endpoints)} endpoint(s) (batched={batched})")
+            return len(endpoints)
+        except Exception as e:
+            logger.error(f"Failed to queue '{event}' webhook for organization {organization_id}: {e}", exc_info=True)
+            return 0
@@ -1,20 +1,114 @@
 from celery import current_task
+from celery.exceptions import Retry
 from sqlalchemy.orm import sessionmaker
 from app.celery_app import celery_app
 from app.core.database import engine
 from app.models.project import Project, ProjectStatus
 from app.models.asset import Asset
 from app.services.file_service import FileService
+from app.services.cancellation_service import CancellationService, TaskCancelled
+from app.services.progress_service import ProgressService
+from app.services.webhook_service import WebhookService
 from app.ai.factory import get_ai_provider
 from app.core.config import settings
 import os
 import time
 import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 logger = logging.getLogger(__name__)
 
+# Bump to force re-analysis of assets analysed by an older pipeline
+ANALYSIS_VERSION = 1
+
+
+# Detection -> (provider method, metadata key, value stored while it fails)
+DETECTIONS = {
+    "faces": ("detect_faces", "faces", []),
+    "objects": ("detect_objects", "objects", []),
+    "nsfw": ("detect_nsfw", "is_nsfw", False),
+}
+
+
+class AssetAnalysisError(Exception):
+    """One or more detections failed; carries which ones and the partial metadata gathered so far"""
+
+    def __init__(self, failed: List[str], errors: List[str], partial_metadata: Dict[str, Any]):
+        super().__init__("; ".join(errors))
+        self.failed = failed
+        self.errors = errors
+        self.partial_metadata = partial_metadata
+
+
+def _has_current_metadata(asset: Asset) -> bool:
+    """Whether the asset was already fully analysed by the current pipeline"""
+    return bool(asset.ai_metadata) and asset.ai_metadata.get("analysis_version") == ANALYSIS_VERSION
+
+
+def _analyse_asset(
+    ai_provider, asset_id, file_path: str, detections: List[str] = None, ai_metadata: Dict[str, Any] = None
+) -> Dict[str, Any]:
+    """
+    Run detections (all by default) for one asset, adding their results to
+    `ai_metadata`; raises AssetAnalysisError naming the ones that failed.
+    """
+    ai_metadata = {} if ai_metadata is None else ai_metadata
+    failed = []
+    errors = []
+
+    for name in detections or DETECTIONS:
+        method, key, fallback = DETECTIONS[name]
+        try:
+            logger.info(f"Running {name} detection for asset {asset_id}...")
+            ai_metadata[key] = asyncio.run(getattr(ai_provider, method)(file_path))
+            logger.info(f"{name} detection result for asset {asset_id}: {ai_metadata[key]}")
+        except Exception as e:
+            logger.error(f"Error during {name} detection for asset {asset_id}: {e}")
+            ai_metadata[key] = fallback
+            failed.append(name)
+            errors.append(f"{name}: {e}")
+
+    # Compile detected elements for UI
+    detected_elements = []
+    if ai_metadata.get("faces"):
+        detected_elements.append("faces")
+    if ai_metadata.get("objects"):
+        detected_elements.extend([obj.get("label", "object") for obj in ai_metadata["objects"]])
+    ai_metadata["detected_elements"] = detected_elements
+
+    if errors:
+        raise AssetAnalysisError(failed, errors, ai_metadata)
+    return ai_metadata
+
+
+def _analyse_asset_with_retries(ai_provider, asset_id, file_path: str) -> Dict[str, Any]:
+    """
+    Analyse one asset, retrying only the detections that failed, with
+    exponential backoff.
+
+    If every attempt fails, the partial metadata is returned without the
+    analysis version stamp so the asset is picked up again on the next run.
+    """
+    max_retries = settings.ANALYSIS_ASSET_MAX_RETRIES
+    ai_metadata: Dict[str, Any] = {}
+    pending = list(DETECTIONS)
+    for attempt in range(max_retries + 1):
+        try:
+            _analyse_asset(ai_provider, asset_id, file_path, pending, ai_metadata)
+            ai_metadata["analysis_version"] = ANALYSIS_VERSION
+            return ai_metadata
+        except AssetAnalysisError as e:
+            if attempt == max_retries:
+                logger.error(f"Giving up on analysis of asset {asset_id} after {attempt + 1} attempts: {e}")
+                return dict(e.partial_metadata, analysis_errors=e.errors)
+            pending = e.failed
+            countdown = settings.ANALYSIS_RETRY_BACKOFF_SECONDS * 2 ** attempt
+            logger.warning(f"Analysis of asset {asset_id} failed ({e}); retrying {pending} in {countdown:.1f}s")
+            time.sleep(countdown)
+
 
 @celery_app.task(bind=True)
 def process_uploaded_assets(self, project_id: str):
@@ -22,6 +116,8 @@ def process_uploaded_assets(self, project_id: str):
     db = SessionLocal()
     
     try:
+        CancellationService.raise_if_cancelled("project", project_id)
+
         # Get project
         project = db.query(Project).filter(Project.id == project_id).first()
         if not project:
@@ -40,87 +136,102 @@ def process_uploaded_assets(self, project_id: str):
         
         total_assets = len(assets)
         processed_assets = 0
+        skipped_assets = 0
+        to_analyse = []
+        
+        def report_progress():
+            progress = 10 + (processed_assets / total_assets) * 70  # 10-80% for processing
+            current_task.update_state(state='PROGRESS', meta={'progress': int(progress)})
+            ProgressService.publish_progress(
+                "project", project_id, ProjectStatus.PROCESSING.value, progress,
+                processedAssets=processed_assets, totalAssets=total_assets
+            )
         
         for asset in assets:
-            # Get full file path
-            file_path = os.path.join(settings.UPLOAD_DIR, asset.storage_path)
-            
-            # Skip PSD files for AI analysis (would need conversion first)
-            logger.info(f"Processing asset {asset.id} at path: {file_path}")
-
-            if asset.storage_path.lower().endswith('.psd'):
+            if _has_current_metadata(asset):
+                # Already analysed by an earlier attempt of this task
+                logger.info(f"Asset {asset.id} already has current AI metadata, skipping.")
+                skipped_assets += 1
+                processed_assets += 1
+            elif asset.storage_path.lower().endswith('.psd'):
+                # Skip PSD files for AI analysis (would need conversion first)
                 asset.ai_metadata = {
                     "detected_elements": ["psd_file"],
                     "analysis_skipped": True,
-                    "reason": "PSD files require conversion for AI analysis"
+                    "reason": "PSD files require conversion for AI analysis",
+                    "analysis_version": ANALYSIS_VERSION
                 }
-                logger.info("Skipping AI analysis for PSD file.")
+                logger.info(f"Skipping AI analysis for PSD asset {asset.id}.")
+                db.commit()
+                processed_assets += 1
             else:
-                ai_metadata = {}
+                to_analyse.append(asset)
+        report_progress()
+        
+        # Analyse the remaining assets concurrently; worker threads only talk to
+        # the AI provider; results are committed here, one asset at a time.
+        max_workers = max(1, min(settings.ANALYSIS_MAX_CONCURRENCY, len(to_analyse)))
+        logger.info(f"Analysing {len(to_analyse)} assets with up to {max_workers} concurrent workers")
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asset-analysis")
+        try:
+            futures = {}
+            for asset in to_analyse:
+                file_path = os.path.join(settings.UPLOAD_DIR, asset.storage_path)
+                logger.info(f"Queueing analysis of asset {asset.id} at path: {file_path}")
+                futures[executor.submit(_analyse_asset_with_retries, ai_provider, asset.id, file_path)] = asset
+            
+            for future in as_completed(futures):
+                CancellationService.raise_if_cancelled("project", project_id)
                 
-                # --- Face Detection ---
-                try:
-                    logger.info(f"Detecting faces for asset {asset.id}...")
-                    faces = asyncio.run(ai_provider.detect_faces(file_path))
-                    ai_metadata["faces"] = faces
-                    logger.info(f"Face detection result for asset {asset.id}: {faces}")
-                except Exception as e:
-                    logger.error(f"Error during face detection for asset {asset.id}: {e}")
-                    ai_metadata["faces"] = []
-
-                # --- Object Detection ---
-                try:
-                    logger.info(f"Detecting objects for asset {asset.id}...")
-                    objects = asyncio.run(ai_provider.detect_objects(file_path))
-                    ai_metadata["objects"] = objects
-                    logger.info(f"Object detection result for asset {asset.id}: {objects}")
-                except Exception as e:
-                    logger.error(f"Error during object detection for asset {asset.id}: {e}")
-                    ai_metadata["objects"] = []
-
-                # --- NSFW Detection ---
-                try:
-                    logger.info(f"Detecting NSFW content for asset {asset.id}...")
-                    is_nsfw = asyncio.run(ai_provider.detect_nsfw(file_path))
-                    ai_metadata["is_nsfw"] = is_nsfw
-                    logger.info(f"NSFW detection result for asset {asset.id}: {is_nsfw}")
-                except Exception as e:
-                    logger.error(f"Error during NSFW detection for asset {asset.id}: {e}")
-                    ai_metadata["is_nsfw"] = False
+                asset = futures[future]
+                asset.ai_metadata = future.result()
+                logger.info(f"Final AI metadata for asset {asset.id}: {asset.ai_metadata}")
                 
-                # Compile detected elements for UI
-                detected_elements = []
-                if ai_metadata.get("faces"):
-                    detected_elements.append("faces")
-                if ai_metadata.get("objects"):
-                    detected_elements.extend([obj.get("label", "object") for obj in ai_metadata["objects"]])
+                # Checkpoint each asset so a task-level retry does not redo it
+                db.commit()
+                ProgressService.publish_unit(
+                    "project", project_id, assetId=str(asset.id),
+                    analysisErrors=asset.ai_metadata.get("analysis_errors")
+                )
                 
-                ai_metadata["detected_elements"] = detected_elements
-                asset.ai_metadata = ai_metadata
-                logger.info(f"Final AI metadata for asset {asset.id}: {ai_metadata}")
-            
-            processed_assets += 1
-            progress = 10 + (processed_assets / total_assets) * 70  # 10-80% for processing
-            current_task.update_state(state='PROGRESS', meta={'progress': int(progress)})
-            
-            # Simulate processing time
-            time.sleep(1)
-        
-        # Save all changes
-        db.commit()
+                processed_assets += 1
+                report_progress()
+        finally:
+            # On cancellation or error, drop analyses that have not started yet
+            executor.shutdown(wait=True, cancel_futures=True)
         
         # Update project status to ready for review
         project.status = ProjectStatus.READY_FOR_REVIEW
         db.commit()
+        ProgressService.publish_progress("project", project_id, project.status.value, 100)
+        WebhookService.emit(db, project.organization_id, "analysis.completed", {
+            "projectId": project_id,
+            "status": project.status.value,
+            "processedAssets": processed_assets,
+            "skippedAssets": skipped_assets,
+            "totalAssets": total_assets
+        })
         
         current_task.update_state(state='SUCCESS', meta={'progress': 100})
         
         return {
             'status': 'completed',
             'processed_assets': processed_assets,
+            'skipped_assets': skipped_assets,
             'total_assets': total_assets
         }
         
+    except TaskCancelled:
+        logger.info(f"Analysis of project {project_id} cancelled")
+        db.rollback()
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if project:
+            project.status = ProjectStatus.CANCELLED
+            db.commit()
+        CancellationService.clear("project", project_id)
+        ProgressService.publish_progress("project", project_id, ProjectStatus.CANCELLED.value, 0)
+        return {'status': 'cancelled'}
+
     except Exception as e:
         try:
             # Retry with exponential backoff. Max retries: 5.
@@ -133,6 +244,14 @@ def process_uploaded_assets(self, project_id: str):
                 db.rollback()
                 project.status = ProjectStatus.FAILED
                 db.commit()
+                ProgressService.publish_progress("project", project_id, project.status.value, 0)
+                if not isinstance(retry_exc, Retry):
+                    # Retries exhausted
+                    WebhookService.emit(db, project.organization_id, "analysis.failed", {
+                        "projectId": project_id,
+                        "status": project.status.value,
+                        "error": str(e)
+                    })
             
             # Re-raise a new, simple exception with the stringified original error
             # to ensure it can be serialized by Celery.
@@ -0,0 +1,68 @@
+from celery import current_task
+from celery.exceptions import Retry
+from sqlalchemy.orm import sessionmaker
+from app.celery_app import celery_app
+from app.core.database import engine
+from app.models.edit_batch import EditBatch
+from app.models.generation_job import JobStatus
+from app.services.edit_batch_service import EditBatchService
+from app.services.progress_service import ProgressService
+import logging
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, acks_late=True)
+def process_edit_batch(self, batch_id: str):
+    """Apply the edit stack of a bulk edit to all of its assets"""
+    # The batch is committed after every asset and only written by this task:
+    # keep its loaded state instead of reloading it for each progress update
+    db = SessionLocal(expire_on_commit=False)
+    batch = None
+    try:
+        batch = db.query(EditBatch).filter(EditBatch.id == batch_id).first()
+        if not batch:
+            raise Exception(f"Edit batch {batch_id} not found")
+        if batch.status in (JobStatus.COMPLETED, JobStatus.FAILED):
+            return {'status': batch.status.value, 'cached': True}
+
+        batch.status = JobStatus.PROCESSING
+        batch.error_message = None
+        db.commit()
+        ProgressService.publish_progress("edit_batch", batch_id, JobStatus.PROCESSING.value, 0)
+
+        def on_asset(batch, asset_id, error):
+            current_task.update_state(state='PROGRESS', meta={'progress': batch.progress})
+            ProgressService.publish_unit("edit_batch", batch_id, assetId=asset_id, error=error)
+            ProgressService.publish_progress(
+                "edit_batch", batch_id, JobStatus.PROCESSING.value, batch.progress,
+                completedCount=batch.completed_count, failedCount=batch.failed_count
+            )
+
+        EditBatchService.apply_batch(db, batch, on_asset)
+        ProgressService.publish_progress(
+            "edit_batch", batch_id, batch.status.value, 100,
+            completedCount=batch.completed_count, failedCount=batch.failed_count
+        )
+        return {
+            'status': batch.status.value,
+            'completed': batch.completed_count,
+            'failed': batch.failed_count
+        }
+
+    except Exception as e:
+        logger.error(f"Celery task process_edit_batch failed: {e}", exc_info=True)
+        try:
+            self.retry(exc=e, countdown=2**self.request.retries, max_retries=3)
+        except Exception as retry_exc:
+            if batch and not isinstance(retry_exc, Retry):
+                # Retries exhausted
+                db.rollback()
+                batch.status = JobStatus.FAILED
+                batch.error_message = str(e)
+                db.commit()
+                ProgressService.publish_progress("edit_batch", batch_id, JobStatus.FAILED.value, batch.progress or 0)
+            raise
+    finally:
+        db.close()
@@ -0,0 +1,60 @@
+from celery import current_task
+from celery.exceptions import Retry
+from sqlalchemy.orm import sessionmaker
+from app.celery_app import celery_app
+from app.core.database import engine
+from app.models.export_job import ExportJob
+from app.models.generation_job import JobStatus
+from app.services.export_service import ExportService
+from app.services.progress_service import ProgressService
+import logging
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, acks_late=True)
+def process_export_job(self, export_id: str):
+    """Build the archive of an export job and store it for download"""
+    db = SessionLocal()
+    job = None
+    try:
+        job = db.query(ExportJob).filter(ExportJob.id == export_id).first()
+        if not job:
+            raise Exception(f"Export job {export_id} not found")
+        if job.status == JobStatus.COMPLETED and ExportService.archive_exists(job):
+            return {'status': 'completed', 'cached': True}
+
+        job.status = JobStatus.PROCESSING
+        job.error_message = None
+        db.commit()
+        ProgressService.publish_progress("export", export_id, JobStatus.PROCESSING.value, job.progress or 0)
+
+        last_reported = [job.progress or 0]
+
+        def on_progress(progress):
+            # Progress moves with every block written; only report whole steps
+            if progress - last_reported[0] >= 5:
+                last_reported[0] = progress
+                current_task.update_state(state='PROGRESS', meta={'progress': progress})
+                ProgressService.publish_progress("export", export_id, JobStatus.PROCESSING.value, progress)
+
+        storage_path = ExportService.build_archive(db, job, on_progress)
+        ProgressService.publish_progress("export", export_id, JobStatus.COMPLETED.value, 100, fileSize=job.file_size)
+        return {'status': 'completed', 'storage_path': storage_path, 'file_size': job.file_size}
+
+    except Exception as e:
+        logger.error(f"Celery task process_export_job failed: {e}", exc_info=True)
+        try:
+            self.retry(exc=e, countdown=2**self.request.retries, max_retries=3)
+        except Exception as retry_exc:
+            if job and not isinstance(retry_exc, Retry):
+                # Retries exhausted
+                db.rollback()
+                job.status = JobStatus.FAILED
+                job.error_message = str(e)
+                db.commit()
+                ProgressService.publish_progress("export", export_id, JobStatus.FAILED.value, job.progress or 0)
+            raise
+    finally:
+        db.close()
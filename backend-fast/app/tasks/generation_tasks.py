@@ -1,4 +1,6 @@
 from celery import current_task
+from celery.exceptions import Retry
+from sqlalchemy import update
 from sqlalchemy.orm import sessionmaker
 from app.celery_app import celery_app
 from app.core.database import engine
@@ -7,7 +9,13 @@ from app.models.generated_asset import GeneratedAsset
 from app.models.asset_format import AssetFormat
 from app.models.asset import Asset
 from app.models.user import User
+from app.models.project import Project
 from app.services.generation_service import GenerationService
+from app.services.generation_planner import GenerationPlanner
+from app.services.generation_writer import GeneratedAssetWriter, ProgressReporter
+from app.services.cancellation_service import CancellationService, TaskCancelled
+from app.services.progress_service import ProgressService
+from app.services.webhook_service import WebhookService
 from app.services.file_service import FileService
 from app.ai.factory import get_ai_provider
 from app.core.config import settings
@@ -21,16 +29,109 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 logger = logging.getLogger(__name__)
 
 
+def _report_progress(job, progress):
+    """Report job progress to the Celery result backend and to live subscribers"""
+    current_task.update_state(state='PROGRESS', meta={'progress': int(progress)})
+    ProgressService.publish_progress("job", str(job.id), JobStatus.PROCESSING.value, progress)
+
+
+def _render_master(db, user, asset, source_path, canvas, width, height, prompt, local_only=False):
+    """Render the master image of a bucket, from the master canvas when there is one"""
+    if canvas:
+        return GenerationService.crop_from_master_canvas(db, user, canvas, width, height, asset.ai_metadata)
+    return GenerationService.resize_image(
+        db, user, source_path, width, height, asset.ai_metadata, prompt, local_only=local_only
+    )
+
+
+def _refine_drafts(db, job, user, prompt, use_master_canvas, on_progress):
+    """
+    Second phase of progressive generation: re-render every draft of the job
+    with the AI editor and swap the refined file in, one size at a time.
+    """
+    # Plain column tuples keep the session free of ORM objects on large jobs
+    drafts = db.query(GeneratedAsset.id, GeneratedAsset.original_asset_id, GeneratedAsset.dimensions).filter(
+        GeneratedAsset.job_id == job.id,
+        GeneratedAsset.is_draft == True
+    ).all()
+    if not drafts:
+        return
+
+    drafts_by_asset = {}
+    for draft in drafts:
+        drafts_by_asset.setdefault(draft.original_asset_id, []).append(draft)
+
+    refined = 0
+    for asset_id, asset_drafts in drafts_by_asset.items():
+        asset = db.query(Asset).filter(Asset.id == asset_id).first()
+        source_path = os.path.join(settings.UPLOAD_DIR, asset.storage_path)
+        plan = GenerationPlanner.plan([
+            {"width": draft.dimensions["width"], "height": draft.dimensions["height"], "draft": draft}
+            for draft in asset_drafts
+        ])
+
+        canvas = None
+        if use_master_canvas:
+            canvas = GenerationService.create_master_canvas(
+                source_path, [(bucket["width"], bucket["height"]) for bucket in plan], prompt
+            )
+
+        for bucket in plan:
+            CancellationService.raise_if_cancelled("job", str(job.id))
+            bucket_targets = sum(len(size["targets"]) for size in bucket["sizes"])
+            try:
+                master_path = _render_master(
+                    db, user, asset, source_path, canvas, bucket["width"], bucket["height"], prompt
+                )
+            except Exception as e:
+                # The drafts stay in place (still flagged as drafts)
+                logger.error(f"Error refining {bucket['width']}x{bucket['height']} master for asset {asset.id}: {e}", exc_info=True)
+                refined += bucket_targets
+                on_progress(refined / len(drafts))
+                continue
+
+            for size in bucket["sizes"]:
+                try:
+                    refined_path = GenerationService.derive_rendition(master_path, size["width"], size["height"])
+                    draft_ids = [target["draft"].id for target in size["targets"]]
+                    db.execute(
+                        update(GeneratedAsset)
+                        .where(GeneratedAsset.id.in_(draft_ids))
+                        .values(storage_path=os.path.relpath(refined_path, settings.UPLOAD_DIR), is_draft=False),
+                        execution_options={"synchronize_session": False}
+                    )
+                    db.commit()
+                    ProgressService.publish_unit(
+                        "job", str(job.id), assetId=str(asset.id),
+                        generatedAssetIds=[str(draft_id) for draft_id in draft_ids],
+                        width=size["width"], height=size["height"], draft=False
+                    )
+                except Exception as e:
+                    logger.error(f"Error refining {size['width']}x{size['height']} for asset {asset.id}: {e}", exc_info=True)
+                    db.rollback()
+                refined += len(size["targets"])
+                on_progress(refined / len(drafts))
+
+    logger.info(f"Refined {refined} draft(s) of generation job {job.id}")
+
+
 @celery_app.task(bind=True)
 def process_generation_job(self, job_id: str, request_data: dict):
     """Background task to process generation job"""
     db = SessionLocal()
     job = None  # Ensure job is defined in case of early exception
+    writer = None
+    completed_operations = 0
     try:
         job = db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
         if not job:
             raise Exception(f"Generation job {job_id} not found")
 
+        if job.status == JobStatus.CANCELLED:
+            logger.info(f"Generation job {job.id} was cancelled before it started")
+            CancellationService.clear("job", str(job.id))
+            return {'status': 'cancelled', 'generated_assets': 0}
+
         logger.info(f"Starting generation job {job.id} for project {job.project_id}")
 
         user = db.query(User).filter(User.id == job.user_id).first()
@@ -51,8 +152,49 @@ def process_generation_job(self, job_id: str, request_data: dict):
         if format_ids:
             formats = db.query(AssetFormat).filter(AssetFormat.id.in_(format_ids)).all()
         
-        total_operations = len(assets) * (len(formats) + len(custom_resizes))
+        targets = [
+            {
+                "asset_format_id": format_obj.id,
+                "width": format_obj.width,
+                "height": format_obj.height
+            }
+            for format_obj in formats
+        ]
+        targets += [
+            {
+                "asset_format_id": None,
+                "width": custom_resize["width"],
+                "height": custom_resize["height"]
+            }
+            for custom_resize in {(c["width"], c["height"]): c for c in custom_resizes}.values()
+        ]
+        plan = GenerationPlanner.plan(targets)
+        
+        use_master_canvas = settings.USE_GEMINI_IMAGE_EDITOR and settings.GENERATION_MODE == "outpaint_once"
+        # Progressive jobs render local drafts first, then refine them with the AI editor
+        draft_mode = bool(request_data.get("progressive")) and settings.USE_GEMINI_IMAGE_EDITOR
+        # Share of the 10-90% progress range spent on the first phase
+        phase_span = 40 if draft_mode else 80
+        
+        # Units already persisted by an earlier attempt of this job are skipped
+        completed_units = GenerationService.get_completed_unit_keys(db, job)
+        if completed_units:
+            logger.info(f"Resuming generation job {job.id}: {len(completed_units)} unit(s) already completed")
+        
+        total_operations = len(assets) * len(targets)
         completed_operations = 0
+        writer = GeneratedAssetWriter(db)
+        reporter = ProgressReporter(db, job.id, lambda progress: _report_progress(job, progress))
+        
+        def on_unit_written(unit_key, asset_id, width, height):
+            def callback(written):
+                completed_units.add(unit_key)
+                if unit_key in written:
+                    ProgressService.publish_unit(
+                        "job", str(job.id), assetId=asset_id, unitKey=unit_key,
+                        generatedAssetId=written[unit_key], width=width, height=height, draft=draft_mode
+                    )
+            return callback
         
         for asset in assets:
             source_path = os.path.join(settings.UPLOAD_DIR, asset.storage_path)
@@ -60,84 +202,138 @@ def process_generation_job(self, job_id: str, request_data: dict):
             
             if asset.storage_path.lower().endswith('.psd'):
                 logger.warning(f"Skipping PSD asset {asset.id} as it cannot be resized directly.")
-                completed_operations += len(formats) + len(custom_resizes)
+                completed_operations += len(targets)
                 continue
             
-            for format_obj in formats:
-                logger.info(f"Generating format '{format_obj.name}' ({format_obj.width}x{format_obj.height}) for asset {asset.id}")
-                try:
-                    resized_path = GenerationService.resize_image(
-                        db, user, source_path, 
-                        format_obj.width, format_obj.height,
-                        asset.ai_metadata, prompt
-                    )
-                    logger.info(f"Asset {asset.id} resized to '{resized_path}' for format '{format_obj.name}'")
-                    
-                    generated_asset = GeneratedAsset(
-                        job_id=job.id,
-                        original_asset_id=asset.id,
-                        asset_format_id=format_obj.id,
-                        storage_path=os.path.relpath(resized_path, settings.UPLOAD_DIR),
-                        file_type=asset.file_type,
-                        dimensions={"width": format_obj.width, "height": format_obj.height},
-                        is_nsfw=False,
-                        manual_edits={"prompt": prompt} if prompt else None
-                    )
-                    db.add(generated_asset)
-                    completed_operations += 1
-                except Exception as e:
-                    logger.error(f"Error processing format {format_obj.name} for asset {asset.id}: {e}", exc_info=True)
-                    completed_operations += 1
+            # Keep only the targets of each size that have not been checkpointed yet
+            pending_plan = []
+            for bucket in plan:
+                pending_sizes = []
+                for size in bucket["sizes"]:
+                    pending_targets = []
+                    for target in size["targets"]:
+                        unit_key = GenerationService.build_unit_key(
+                            asset.id, target["asset_format_id"], size["width"], size["height"]
+                        )
+                        if unit_key in completed_units:
+                            completed_operations += 1
+                        else:
+                            pending_targets.append(dict(target, unit_key=unit_key))
+                    if pending_targets:
+                        pending_sizes.append(dict(size, targets=pending_targets))
+                if pending_sizes:
+                    pending_plan.append(dict(bucket, sizes=pending_sizes))
             
-            for custom_resize in custom_resizes:
-                logger.info(f"Generating custom resize {custom_resize['width']}x{custom_resize['height']} for asset {asset.id}")
+            canvas = None
+            if use_master_canvas and not draft_mode and pending_plan:
+                canvas = GenerationService.create_master_canvas(
+                    source_path, [(bucket["width"], bucket["height"]) for bucket in plan], prompt
+                )
+            
+            for bucket in pending_plan:
+                CancellationService.raise_if_cancelled("job", str(job.id))
+                bucket_targets = sum(len(size["targets"]) for size in bucket["sizes"])
+                logger.info(
+                    f"Rendering {bucket['width']}x{bucket['height']} master for asset {asset.id} "
+                    f"({len(bucket['sizes'])} size(s), {bucket_targets} target(s))"
+                )
                 try:
-                    resized_path = GenerationService.resize_image(
-                        db, user, source_path,
-                        custom_resize["width"], custom_resize["height"],
-                        asset.ai_metadata, prompt
-                    )
-                    logger.info(f"Asset {asset.id} resized to '{resized_path}' for custom size")
-
-                    generated_asset = GeneratedAsset(
-                        job_id=job.id,
-                        original_asset_id=asset.id,
-                        asset_format_id=None,
-                        storage_path=os.path.relpath(resized_path, settings.UPLOAD_DIR),
-                        file_type=asset.file_type,
-                        dimensions={"width": custom_resize["width"], "height": custom_resize["height"]},
-                        is_nsfw=False,
-                        manual_edits={"prompt": prompt} if prompt else None
+                    master_path = _render_master(
+                        db, user, asset, source_path, canvas,
+                        bucket["width"], bucket["height"], prompt,
+                        local_only=draft_mode
                     )
-                    db.add(generated_asset)
-                    completed_operations += 1
                 except Exception as e:
-                    logger.error(f"Error processing custom resize for asset {asset.id}: {e}", exc_info=True)
-                    completed_operations += 1
+                    logger.error(f"Error rendering {bucket['width']}x{bucket['height']} master for asset {asset.id}: {e}", exc_info=True)
+                    completed_operations += bucket_targets
+                    continue
+                
+                for size in bucket["sizes"]:
+                    completed_operations += len(size["targets"])
+                    try:
+                        resized_path = GenerationService.derive_rendition(master_path, size["width"], size["height"])
+                        logger.info(f"Asset {asset.id} resized to '{resized_path}' for {len(size['targets'])} target(s)")
+                    except Exception as e:
+                        logger.error(f"Error processing {size['width']}x{size['height']} for asset {asset.id}: {e}", exc_info=True)
+                        continue
+                    
+                    # Rows are written in batches; each batch commit is a checkpoint
+                    for target in size["targets"]:
+                        writer.add(
+                            {
+                                "job_id": job.id,
+                                "original_asset_id": asset.id,
+                                "asset_format_id": target["asset_format_id"],
+                                "unit_key": target["unit_key"],
+                                "storage_path": os.path.relpath(resized_path, settings.UPLOAD_DIR),
+                                "file_type": asset.file_type,
+                                "dimensions": {"width": size["width"], "height": size["height"]},
+                                "is_nsfw": False,
+                                "is_draft": draft_mode,
+                                "manual_edits": {"prompt": prompt} if prompt else None
+                            },
+                            on_unit_written(target["unit_key"], str(asset.id), size["width"], size["height"])
+                        )
+                    reporter.report(10 + (completed_operations / total_operations) * phase_span)
 
-            progress = 10 + (completed_operations / total_operations) * 80 if total_operations > 0 else 90
-            current_task.update_state(state='PROGRESS', meta={'progress': int(progress)})
+        writer.flush()
+
+        if draft_mode:
+            # Drafts are committed and visible through the results endpoint now
+            GenerationService.update_job_progress(db, job, JobStatus.PROCESSING, 10 + phase_span)
+            _refine_drafts(
+                db, job, user, prompt, use_master_canvas,
+                lambda done: _report_progress(job, 10 + phase_span + done * 40)
+            )
 
-        logger.info(f"Committing {completed_operations} generated assets to the database for job {job.id}")
-        db.commit()
-        
         GenerationService.update_job_progress(db, job, JobStatus.COMPLETED, 100)
         logger.info(f"Generation job {job.id} completed successfully.")
+        WebhookService.emit(db, job.project.organization_id, "generation.completed", {
+            "jobId": str(job.id),
+            "projectId": str(job.project_id),
+            "status": job.status.value,
+            "generatedAssets": completed_operations
+        })
         
         return {
             'status': 'completed',
             'generated_assets': completed_operations
         }
 
+    except TaskCancelled:
+        # Persist what was rendered before the cancellation point
+        if writer:
+            writer.flush()
+        GenerationService.finalize_cancelled_job(db, job)
+        return {
+            'status': 'cancelled',
+            'generated_assets': completed_operations
+        }
+
     except Exception as e:
         logger.error(f"Celery task process_generation_job failed: {e}", exc_info=True)
         try:
             if job:
+                # Checkpointed units stay committed; the retry resumes after them
                 db.rollback()
-                GenerationService.update_job_progress(db, job, JobStatus.FAILED, 0)
+                if writer:
+                    try:
+                        writer.flush()
+                    except Exception:
+                        db.rollback()
+                        writer.discard()
+                GenerationService.update_job_progress(db, job, JobStatus.FAILED, job.progress or 0)
             self.retry(exc=e, countdown=2**self.request.retries, max_retries=5)
         except Exception as retry_exc:
             logger.error(f"Celery task retry failed: {retry_exc}")
+            if job and not isinstance(retry_exc, Retry):
+                # Retries exhausted
+                WebhookService.emit(db, job.project.organization_id, "generation.failed", {
+                    "jobId": str(job.id),
+                    "projectId": str(job.project_id),
+                    "status": JobStatus.FAILED.value,
+                    "error": str(e)
+                })
             raise Exception(str(e))
     finally:
         db.close()
@@ -151,6 +347,10 @@ def process_prompt_edit_job(self, original_asset_id: str, storage_path: str, pro
     logger.info(f"Starting prompt edit for asset {original_asset_id} with prompt: '{prompt[:80]}...'")
     
     try:
+        if CancellationService.is_cancelled("project", project_id):
+            logger.info(f"Skipping prompt edit for asset {original_asset_id}: project {project_id} was cancelled")
+            return {"status": "cancelled"}
+
         ai_provider = get_ai_provider()
         source_path = os.path.join(settings.UPLOAD_DIR, storage_path)
 
@@ -187,6 +387,15 @@ def process_prompt_edit_job(self, original_asset_id: str, storage_path: str, pro
         db.refresh(generated_asset)
 
         logger.info(f"Successfully created new asset {generated_asset.id} from prompt edit.")
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if project:
+            WebhookService.emit(db, project.organization_id, "prompt_edit.completed", {
+                "jobId": str(job.id),
+                "projectId": project_id,
+                "originalAssetId": original_asset_id,
+                "newAssetId": str(generated_asset.id),
+                "prompt": prompt
+            })
         return {"status": "completed", "new_asset_id": str(generated_asset.id)}
 
     except Exception as e:
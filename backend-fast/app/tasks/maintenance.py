@@ -4,7 +4,10 @@ from app.celery_app import celery_app
 from app.core.database import engine
 from app.models.generation_job import GenerationJob, JobStatus
 from app.models.project import Project, ProjectStatus
-from app.services.file_service import FileService
+from app.services.generation_service import GenerationService
+from app.services.export_service import ExportService
+from app.services.edit_render_service import EditRenderService
+from app.core.config import settings
 import os
 import time
 from datetime import datetime, timedelta
@@ -28,9 +31,8 @@ def cleanup_failed_jobs(self):
         
         cleaned_count = 0
         for job in failed_jobs:
-            # Clean up any generated assets
-            for asset in job.generated_assets:
-                FileService.delete_file(asset.storage_path)
+            # Clean up generated assets (files shared with other jobs are kept)
+            GenerationService.discard_generated_assets(db, list(job.generated_assets))
             
             # Delete the job (cascade will handle generated assets)
             db.delete(job)
@@ -55,15 +57,27 @@ def cleanup_failed_jobs(self):
         db.close()
 
 
+DERIVED_RENDITION_MARKERS = ("_edited_", "_working_", "_transcoded_")
+
+
+def _derived_source_base(relative_path: str):
+    """Stored path (without extension) a cached rendition was derived from, or None"""
+    positions = [relative_path.find(marker) for marker in DERIVED_RENDITION_MARKERS if marker in relative_path]
+    return relative_path[:min(positions)] if positions else None
+
+
 @celery_app.task(bind=True)
 def cleanup_orphaned_files(self):
     """Clean up orphaned files in upload directory"""
     try:
-        upload_dir = FileService.UPLOAD_DIR
+        upload_dir = settings.UPLOAD_DIR
         cleaned_files = []
         
         # Get all files in upload directory
         for root, dirs, files in os.walk(upload_dir):
+            if root == upload_dir and settings.EXPORT_SUBDIR in dirs:
+                # Export archives are tracked by export jobs (see cleanup_expired_exports)
+                dirs.remove(settings.EXPORT_SUBDIR)
             for file in files:
                 file_path = os.path.join(root, file)
                 relative_path = os.path.relpath(file_path, upload_dir)
@@ -82,6 +96,20 @@ def cleanup_orphaned_files(self):
                         GeneratedAsset.storage_path == relative_path
                     ).first()
                     
+                    # Edit renders, working copies and transcodes live as long as their source
+                    source_base = _derived_source_base(relative_path)
+                    if not generated_asset_exists and source_base:
+                        sources = db.query(GeneratedAsset.storage_path, GeneratedAsset.manual_edits).filter(
+                            GeneratedAsset.storage_path.like(f"{source_base}.%")
+                        ).all()
+                        if "_edited_" in relative_path:
+                            # ...but edit renders only while their stack is an asset's current one
+                            sources = [
+                                source for source in sources
+                                if EditRenderService.is_current_render(relative_path, *source)
+                            ]
+                        generated_asset_exists = bool(sources)
+                    
                     # If file is not referenced and older than 1 hour, delete it
                     if not asset_exists and not generated_asset_exists:
                         file_age = time.time() - os.path.getctime(file_path)
@@ -106,6 +134,26 @@ def cleanup_orphaned_files(self):
         raise e
 
 
+@celery_app.task(bind=True)
+def cleanup_expired_exports(self):
+    """Delete export jobs and archives older than EXPORT_TTL_HOURS"""
+    db = SessionLocal()
+    try:
+        return {
+            'status': 'completed',
+            'cleaned_exports': ExportService.cleanup_expired(db)
+        }
+    except Exception as e:
+        db.rollback()
+        current_task.update_state(
+            state='FAILURE',
+            meta={'error': str(e)}
+        )
+        raise e
+    finally:
+        db.close()
+
+
 @celery_app.task(bind=True)
 def health_check(self):
     """Health check task for monitoring worker status"""
@@ -116,7 +164,7 @@ def health_check(self):
         db.close()
         
         # Test file system access
-        test_file = os.path.join(FileService.UPLOAD_DIR, '.health_check')
+        test_file = os.path.join(settings.UPLOAD_DIR, '.health_check')
         with open(test_file, 'w') as f:
             f.write('health_check')
         os.remove(test_file)
@@ -0,0 +1,95 @@
+from sqlalchemy.orm import sessionmaker
+import json
+import logging
+import redis
+import requests
+
+from app.celery_app import celery_app
+from app.core.database import engine
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+from app.models.webhook_endpoint import WebhookEndpoint
+from app.services.webhook_service import WebhookService
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+logger = logging.getLogger(__name__)
+
+
+class WebhookDeliveryError(Exception):
+    """Raised for a retryable webhook delivery failure"""
+    pass
+
+
+def _load_endpoint(endpoint_id: str):
+    """Read the endpoint's URL and secret without holding a session during the HTTP call"""
+    db = SessionLocal()
+    try:
+        endpoint = db.query(WebhookEndpoint).filter(WebhookEndpoint.id == endpoint_id).first()
+        if not endpoint or not endpoint.is_active:
+            return None
+        return endpoint.url, endpoint.secret
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, acks_late=True)
+def deliver_webhook(self, endpoint_id: str, payload: dict):
+    """Deliver one signed webhook payload, retrying with exponential backoff"""
+    endpoint = _load_endpoint(endpoint_id)
+    if not endpoint:
+        logger.info(f"Webhook endpoint {endpoint_id} is gone or inactive, dropping delivery {payload['id']}")
+        return {'status': 'skipped'}
+    url, secret = endpoint
+
+    try:
+        response = WebhookService.send(url, secret, payload)
+    except requests.RequestException as e:
+        error, retryable = str(e), True
+    else:
+        if response.status_code < 300:
+            logger.info(f"Delivered webhook {payload['id']} ({payload['event']}) to {url}")
+            return {'status': 'delivered', 'status_code': response.status_code}
+        error = f"HTTP {response.status_code}"
+        # Client errors other than timeouts/throttling will not succeed on retry
+        retryable = response.status_code >= 500 or response.status_code in (408, 429)
+
+    if not retryable:
+        logger.warning(f"Webhook {payload['id']} rejected by {url}: {error}")
+        return {'status': 'rejected', 'error': error}
+
+    if self.request.retries >= settings.WEBHOOK_MAX_RETRIES:
+        logger.error(f"Giving up on webhook {payload['id']} to {url} after {self.request.retries} retries: {error}")
+        raise WebhookDeliveryError(error)
+
+    countdown = settings.WEBHOOK_RETRY_BACKOFF_SECONDS * 2 ** self.request.retries
+    logger.warning(
+        f"Webhook {payload['id']} to {url} failed ({error}); "
+        f"retry {self.request.retries + 1}/{settings.WEBHOOK_MAX_RETRIES} in {countdown}s"
+    )
+    raise self.retry(exc=WebhookDeliveryError(error), countdown=countdown, max_retries=settings.WEBHOOK_MAX_RETRIES)
+
+
+@celery_app.task
+def flush_webhook_batch(endpoint_id: str):
+    """Deliver the events buffered for a high-volume endpoint as one batched payload"""
+    key = WebhookService.batch_key(endpoint_id)
+    try:
+        client = get_redis_client()
+        pipe = client.pipeline()
+        pipe.lrange(key, 0, settings.WEBHOOK_BATCH_MAX_SIZE - 1)
+        pipe.ltrim(key, settings.WEBHOOK_BATCH_MAX_SIZE, -1)
+        pipe.delete(f"{key}:scheduled")
+        pipe.llen(key)
+        raw_events, _, _, remaining = pipe.execute()
+    except redis.RedisError as e:
+        logger.error(f"Could not read webhook batch for endpoint {endpoint_id}: {e}")
+        raise
+
+    if raw_events:
+        events = [json.loads(raw) for raw in raw_events]
+        deliver_webhook.delay(endpoint_id, WebhookService.build_batch_payload(events))
+        logger.info(f"Flushed {len(events)} batched webhook event(s) for endpoint {endpoint_id}")
+    if remaining:
+        WebhookService.schedule_batch_flush(endpoint_id, 0)
+
+    return {'status': 'flushed', 'events': len(raw_events), 'remaining': remaining}
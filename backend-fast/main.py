@@ -5,6 +5,7 @@ from fastapi.staticfiles import StaticFiles
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import anyio.to_thread
 import uvicorn
 
 from app.core.config import settings
@@ -12,12 +13,29 @@ from app.api.v1.api import api_router
 from app.core.database import engine
 from app.models import Base
 
+if settings.LOOP_MONITOR_ENABLED:
+    from app.core.loop_monitor import LoopMonitorMiddleware, loop_monitor
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Sync endpoints, sync dependencies and streamed file bodies all run in
+    # anyio's default thread pool; bound it so blocking work cannot grow unchecked
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.API_THREADPOOL_SIZE
+    if settings.API_THREADPOOL_SIZE > settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW:
+        logging.getLogger(__name__).warning(
+            f"API_THREADPOOL_SIZE ({settings.API_THREADPOOL_SIZE}) exceeds the DB connection pool "
+            f"({settings.DB_POOL_SIZE} + {settings.DB_MAX_OVERFLOW}); busy threads will wait for connections"
+        )
+    
     # Create database tables
     Base.metadata.create_all(bind=engine)
+    
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
     yield
+    if settings.LOOP_MONITOR_ENABLED:
+        await loop_monitor.stop()
 
 
 app = FastAPI(
@@ -36,6 +54,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.LOOP_MONITOR_ENABLED:
+    app.add_middleware(LoopMonitorMiddleware, monitor=loop_monitor)
+
 # Mount the uploads directory to serve static files
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
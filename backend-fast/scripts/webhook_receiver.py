@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Local webhook receiver for testing deliveries end to end.
+
+Register http://<host>:<port>/ as a webhook endpoint (POST /api/v1/admin/webhooks),
+then run this script with the secret returned on registration.
+"""
+import os
+import sys
+import json
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.webhook_service import WebhookService
+
+
+def make_handler(secret, response_status):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            timestamp = self.headers.get("X-Webhook-Timestamp")
+            signature = self.headers.get("X-Webhook-Signature")
+            valid = WebhookService.verify(secret, timestamp, body, signature) if secret else None
+
+            payload = json.loads(body or b"{}")
+            events = payload.get("events", [payload])
+            print(f"\n[{datetime.now().strftime('%H:%M:%S')}] {self.headers.get('X-Webhook-Event')} "
+                  f"delivery {self.headers.get('X-Webhook-Id')} - signature "
+                  f"{'not checked' if valid is None else 'valid' if valid else 'INVALID'}")
+            for event in events:
+                print(f"  {event.get('event')}: {json.dumps(event.get('data', {}))}")
+
+            status = response_status if valid is not False else 401
+            self.send_response(status)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return WebhookHandler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Receive and verify webhook deliveries locally')
+    parser.add_argument('--host', default='0.0.0.0', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=9000, help='Port to listen on')
+    parser.add_argument('--secret', help='Endpoint secret used to verify signatures')
+    parser.add_argument('--status', type=int, default=200, help='HTTP status to answer with (e.g. 500 to exercise retries)')
+
+    args = parser.parse_args()
+    server = HTTPServer((args.host, args.port), make_handler(args.secret, args.status))
+    print(f"Listening for webhooks on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped")
@@ -0,0 +1,48 @@
+"""
+In-memory SQLite sessions for tests that run real queries without PostgreSQL.
+
+The models use PostgreSQL UUID and JSONB columns: on SQLite they are stored as
+CHAR(32) and JSON, and string ids are accepted in filters as PostgreSQL does.
+"""
+import uuid
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import sqltypes
+from app.core.database import Base
+import app.models  # noqa: F401  (registers every mapper)
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid(type_, compiler, **kw):
+    return "CHAR(32)"
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb(type_, compiler, **kw):
+    return "JSON"
+
+_uuid_bind_processor = sqltypes.Uuid.bind_processor
+
+def _bind_uuid_or_string(self, dialect):
+    process = _uuid_bind_processor(self, dialect)
+    if process is None:
+        return None
+    return lambda value: process(uuid.UUID(value) if isinstance(value, str) else value)
+
+sqltypes.Uuid.bind_processor = _bind_uuid_or_string
+
+
+def sqlite_session(*models) -> Session:
+    """Session on a fresh in-memory database holding the tables of `models`"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[model.__table__ for model in models])
+    return sessionmaker(bind=engine)()
+
+
+
+def count_statements(session: Session) -> list:
+    """List collecting the SQL statements the session's engine runs from now on"""
+    statements = []
+    event.listen(session.get_bind(), "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+    return statements
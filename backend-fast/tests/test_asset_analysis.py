@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from PIL import Image
+from app.ai.gemini_provider import GeminiProvider
+from app.core.config import settings
+from app.tasks.asset_processing import ANALYSIS_VERSION, _analyse_asset_with_retries
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "photo.jpg"
+    Image.new("RGB", (64, 64), (200, 40, 40)).save(path)
+    with patch.object(settings, "ANALYSIS_RETRY_BACKOFF_SECONDS", 0):
+        yield str(path)
+
+def fake_gemini(failures):
+    """GeminiProvider whose model answers by prompt; `failures[kind]` calls of a kind raise first"""
+    provider = GeminiProvider(api_key="test")
+    calls = []
+
+    def generate(model, contents):
+        prompt = contents[0]
+        kind = "faces" if "human faces" in prompt else "objects" if "physical objects" in prompt else "nsfw"
+        calls.append(kind)
+        if failures.get(kind, 0) > 0:
+            failures[kind] -= 1
+            raise ConnectionError("503 Service Unavailable")
+        return SimpleNamespace(text={
+            "faces": '{"faces": [{"x": 10, "y": 10, "width": 20, "height": 20, "confidence": 0.9}]}',
+            "objects": '{"objects": [{"label": "bottle", "confidence": 0.8, "x": 50, "y": 50, "width": 10, "height": 30}]}',
+            "nsfw": "NO",
+        }[kind])
+
+    provider._generate_content = generate
+    return provider, calls
+
+def test_transient_failure_retries_only_the_failed_detection(image_path):
+    provider, calls = fake_gemini({"faces": 1})
+    metadata = _analyse_asset_with_retries(provider, "a1", image_path)
+
+    assert sorted(calls) == ["faces", "faces", "nsfw", "objects"]
+    assert metadata["analysis_version"] == ANALYSIS_VERSION
+    assert len(metadata["faces"]) == 1
+    assert metadata["detected_elements"] == ["faces", "bottle"]
+    assert metadata["is_nsfw"] is False
+
+def test_persistent_failure_is_not_stamped_as_analysed(image_path):
+    provider, calls = fake_gemini({"nsfw": 99})
+    with patch.object(settings, "ANALYSIS_ASSET_MAX_RETRIES", 2):
+        metadata = _analyse_asset_with_retries(provider, "a1", image_path)
+
+    assert calls.count("nsfw") == 3 and calls.count("faces") == 1
+    assert "analysis_version" not in metadata
+    assert metadata["analysis_errors"] == ["nsfw: 503 Service Unavailable"]
+    assert metadata["objects"][0]["label"] == "bottle"
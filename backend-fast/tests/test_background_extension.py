@@ -0,0 +1,38 @@
+import os
+from PIL import Image
+from app.services.background_extension_service import BackgroundExtensionService
+
+
+def _source():
+    img = Image.new("RGB", (200, 100), (200, 120, 40))
+    img.paste((20, 60, 180), (80, 30, 120, 70))
+    return img
+
+def test_extend_methods_fill_target_and_keep_source():
+    source = _source()
+    for method in BackgroundExtensionService.METHODS:
+        extended = BackgroundExtensionService.extend(source, 200, 300, method)
+        assert extended.size == (200, 300)
+        # Source is pasted unchanged in the middle
+        assert extended.crop((0, 100, 200, 200)).tobytes() == source.tobytes()
+        # Bands are filled from the image, not left white
+        r, g, b = extended.getpixel((100, 5))
+        assert (r, g, b) != (255, 255, 255)
+        assert abs(r - 200) < 40 and abs(b - 40) < 40
+
+def test_extend_scales_source_to_fit():
+    extended = BackgroundExtensionService.extend(_source(), 100, 100, "gradient")
+    assert extended.size == (100, 100)
+
+def test_extend_file_reuses_rendition(tmp_path):
+    source = os.path.join(tmp_path, "source.png")
+    _source().save(source)
+
+    first = BackgroundExtensionService.extend_file(source, 300, 100, "mirror")
+    second = BackgroundExtensionService.extend_file(source, 300, 100, "mirror")
+    other = BackgroundExtensionService.extend_file(source, 300, 100, "edge_blur")
+
+    assert first == second
+    assert first != other
+    with Image.open(first) as img:
+        assert img.size == (300, 100)
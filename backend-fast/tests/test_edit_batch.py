@@ -0,0 +1,73 @@
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+from sqlite_db import sqlite_session
+from app.api.v1.endpoints.generation import create_edit_batch
+from app.core.config import settings
+from app.models.edit_batch import EditBatch
+from app.models.generated_asset import GeneratedAsset
+from app.models.generation_job import GenerationJob, JobStatus
+from app.schemas.generation import BulkEditRequest
+from app.services.edit_batch_service import EditBatchService
+from app.services.edit_render_service import EditRenderService
+
+
+@pytest.fixture
+def upload_dir(tmp_path):
+    Image.new("RGB", (400, 200), (200, 40, 40)).save(tmp_path / "ok.jpg")
+    (tmp_path / "broken.jpg").write_bytes(b"not an image")
+    with patch.object(settings, "UPLOAD_DIR", str(tmp_path)):
+        yield tmp_path
+
+def test_batch_records_edited_and_failed_assets(upload_dir):
+    edits = {"operations": EditRenderService.normalize_operations({"operations": [
+        {"type": "crop", "params": {"x": 0, "y": 0, "width": 0.5, "height": 1}},
+    ]})}
+    batch = SimpleNamespace(id="b1", asset_ids=["a1", "a2", "a3"], edits=edits, errors={}, error_message=None)
+    db = MagicMock()
+    query = db.query.return_value.filter.return_value
+    query.all.return_value = [("a1", "ok.jpg"), ("a2", "broken.jpg")]  # a3 was deleted
+    progress = []
+
+    EditBatchService.apply_batch(db, batch, lambda b, asset_id, error: progress.append((asset_id, error is None)))
+
+    assert batch.status == JobStatus.COMPLETED
+    assert (batch.completed_count, batch.failed_count, batch.progress) == (1, 2, 100)
+    assert set(batch.errors) == {"a2", "a3"}
+    assert batch.errors["a3"] == "Generated asset not found"
+    assert sorted(progress) == [("a1", True), ("a2", False)]
+    # Only the edited asset is written, as a plain UPDATE
+    values = query.update.call_args[0][0]
+    assert query.update.call_count == 1
+    assert values["dimensions"] == {"width": 200, "height": 200}
+    assert values["manual_edits"]["operations"] == edits["operations"]
+
+def test_bulk_edit_of_a_job_is_queued():
+    db = sqlite_session(GenerationJob, GeneratedAsset, EditBatch)
+    user, other = SimpleNamespace(id=uuid.uuid4(), organization_id=uuid.uuid4()), SimpleNamespace(id=uuid.uuid4())
+    job = GenerationJob(project_id=uuid.uuid4(), user_id=user.id, status=JobStatus.COMPLETED)
+    db.add(job)
+    db.flush()
+    db.add_all([
+        GeneratedAsset(job_id=job.id, original_asset_id=uuid.uuid4(), unit_key=f"u{i}", storage_path=f"g{i}.jpg", file_type="jpeg", dimensions={"width": 100, "height": 100})
+        for i in range(3)
+    ])
+    db.commit()
+
+    def bulk_edit(current_user, edits):
+        request = BulkEditRequest(jobId=str(job.id), edits=edits)
+        return create_edit_batch(request, db=db, current_user=current_user)
+
+    with patch("app.api.v1.endpoints.generation.process_edit_batch.delay") as delay:
+        delay.return_value.id = "task-1"
+        response = bulk_edit(user, {"saturation": 1.5})
+        for current_user, edits, status_code in [(other, {"saturation": 1.5}, 403), (user, {"saturation": 10}, 400)]:
+            with pytest.raises(HTTPException) as error:
+                bulk_edit(current_user, edits)
+            assert error.value.status_code == status_code
+    assert response.assetCount == 3 and response.status == JobStatus.PENDING
+    delay.assert_called_once_with(response.batchId)
+    assert db.query(EditBatch).one().task_id == "task-1"
@@ -0,0 +1,102 @@
+import io
+import os
+import time
+import uuid
+from unittest.mock import patch
+import pytest
+from PIL import Image
+from sqlalchemy.orm import sessionmaker
+from sqlite_db import sqlite_session
+from app.core.config import settings
+from app.models.asset import Asset
+from app.models.generated_asset import GeneratedAsset
+from app.services.edit_render_service import EditRenderService, EditedSource
+from app.tasks.maintenance import cleanup_orphaned_files
+
+
+@pytest.fixture
+def upload_dir(tmp_path):
+    Image.new("RGB", (2400, 1600), (200, 40, 40)).save(tmp_path / "render.jpg", quality=95)
+    with patch.object(settings, "UPLOAD_DIR", str(tmp_path)):
+        yield tmp_path
+
+def test_legacy_fields_become_operations():
+    operations = EditRenderService.normalize_operations({"crop": {"x": 0, "y": 0, "width": 0.5, "height": 1}, "saturation": 1.2})
+    assert [op["type"] for op in operations] == ["crop", "saturation"]
+    assert EditRenderService.normalize_operations({"saturation": 1.0}) == []
+
+@pytest.mark.parametrize("operation", [
+    {"type": "crop", "params": {"x": 0.6, "y": 0, "width": 0.6, "height": 1}},
+    {"type": "saturation", "params": {"value": 10}},
+    {"type": "rotate", "params": {"degrees": 45}},
+    {"type": "sharpen", "params": {}},
+])
+def test_invalid_operations_are_rejected(operation):
+    with pytest.raises(ValueError):
+        EditRenderService.normalize_operations({"operations": [operation]})
+
+def test_renders_are_cached_per_stack_and_resolution(upload_dir):
+    operations = EditRenderService.normalize_operations({"operations": [
+        {"type": "crop", "params": {"x": 0.25, "y": 0, "width": 0.5, "height": 1}},
+        {"type": "rotate", "params": {"degrees": 90}},
+        {"type": "saturation", "params": {"value": 0}},
+    ]})
+    preview = EditRenderService.render("render.jpg", operations, "preview")
+    with Image.open(upload_dir / preview) as img:
+        assert max(img.size) <= settings.EDIT_PREVIEW_MAX_EDGE
+        assert img.width > img.height  # rotated portrait crop
+    full = EditRenderService.render("render.jpg", operations, "full")
+    with Image.open(upload_dir / full) as img:
+        assert img.size == EditRenderService.output_size(2400, 1600, operations) == (1600, 1200)
+        r, g, b = img.getpixel((10, 10))
+        assert abs(r - g) < 4 and abs(g - b) < 4  # desaturated
+
+    # The source is never modified, and a repeated render is served from the cache
+    with Image.open(upload_dir / "render.jpg") as img:
+        assert img.size == (2400, 1600)
+    with patch("app.services.edit_render_service.Image.open") as open_mock:
+        assert EditRenderService.render("render.jpg", operations, "preview") == preview
+        open_mock.assert_not_called()
+
+    other = EditRenderService.render("render.jpg", operations[:1], "preview")
+    assert other != preview
+
+def test_edited_source_resolves_to_full_render(upload_dir):
+    operations = [{"type": "flip", "params": {"direction": "horizontal"}}]
+    path = EditRenderService.resolve(EditedSource("render.jpg", EditRenderService.canonical_stack(operations)))
+    assert os.path.isabs(path) and os.path.exists(path)
+    assert EditRenderService.render("render.jpg", [], "full") == "render.jpg"
+
+def test_live_preview_is_small_and_commits_nothing(upload_dir):
+    operations = EditRenderService.normalize_operations({"saturation": 1.5})
+    files_before = set(os.listdir(upload_dir))
+    content = EditRenderService.render_live_preview("render.jpg", operations, 320)
+    with Image.open(io.BytesIO(content)) as img:
+        assert img.format == "JPEG" and max(img.size) == 320
+    # Only the reusable working copy is written, never an edit render
+    assert all("_edited_" not in name for name in set(os.listdir(upload_dir)) - files_before)
+    with Image.open(io.BytesIO(EditRenderService.render_live_preview("render.jpg", [], 320, "webp"))) as img:
+        assert img.format == "WEBP"
+
+def test_maintenance_evicts_renders_of_earlier_edit_stacks(upload_dir):
+    db = sqlite_session(Asset, GeneratedAsset)
+    old_stack = EditRenderService.normalize_operations({"operations": [{"type": "rotate", "params": {"degrees": 90}}]})
+    new_stack = EditRenderService.normalize_operations({"operations": [{"type": "rotate", "params": {"degrees": 180}}]})
+    old_preview = EditRenderService.render("render.jpg", old_stack, "preview")
+    new_preview = EditRenderService.render("render.jpg", new_stack, "preview")
+    new_full = EditRenderService.render("render.jpg", new_stack, "full")
+    db.add(GeneratedAsset(
+        job_id=uuid.uuid4(), original_asset_id=uuid.uuid4(), storage_path="render.jpg", file_type="jpeg",
+        dimensions={"width": 1600, "height": 2400}, manual_edits={"operations": new_stack}
+    ))
+    db.commit()
+
+    with patch("app.tasks.maintenance.SessionLocal", sessionmaker(bind=db.get_bind())), \
+            patch("app.tasks.maintenance.time.time", return_value=time.time() + 7200):
+        result = cleanup_orphaned_files()
+
+    assert result["cleaned_files"] == 1
+    assert not (upload_dir / old_preview).exists()
+    assert (upload_dir / new_preview).exists() and (upload_dir / new_full).exists()
+    assert (upload_dir / "render.jpg").exists()
+    assert (upload_dir / EditRenderService.working_copy_path("render.jpg")).exists()
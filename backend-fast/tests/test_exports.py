@@ -0,0 +1,109 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import pytest
+import redis
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.testclient import TestClient
+from sqlite_db import sqlite_session
+from app.api.responses import parse_byte_range, ranged_file_response
+from app.api.v1.endpoints.generation import create_export
+from app.core.config import settings
+from app.models.export_job import ExportJob
+from app.models.generation_job import JobStatus
+from app.schemas.generation import DownloadRequest
+from app.services.export_service import ExportService
+
+
+def test_parse_byte_range():
+    assert parse_byte_range(None, 100) is None
+    assert parse_byte_range("bytes=10-19", 100) == (10, 19)
+    assert parse_byte_range("bytes=90-", 100) == (90, 99)
+    assert parse_byte_range("bytes=-10", 100) == (90, 99)
+    assert parse_byte_range("bytes=50-500", 100) == (50, 99)
+    # Multi-range and malformed headers fall back to the full file
+    assert parse_byte_range("bytes=0-1,5-6", 100) is None
+    assert parse_byte_range("items=0-1", 100) is None
+    with pytest.raises(ValueError):
+        parse_byte_range("bytes=100-", 100)
+
+def test_ranged_file_response_resumes(tmp_path):
+    path = tmp_path / "export.zip"
+    path.write_bytes(bytes(range(256)) * 40)
+    app = FastAPI()
+
+    @app.get("/file")
+    def serve(range_header: str = Header(None, alias="Range"), if_range: str = Header(None, alias="If-Range")):
+        return ranged_file_response(str(path), "export.zip", "application/zip", range_header, if_range, etag="abc")
+
+    client = TestClient(app)
+    full = client.get("/file")
+    assert full.status_code == 200
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.content == path.read_bytes()
+
+    partial = client.get("/file", headers={"Range": "bytes=1000-", "If-Range": '"abc"'})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 1000-10239/10240"
+    assert partial.content == path.read_bytes()[1000:]
+
+    # A stale validator gets the whole (new) file
+    assert client.get("/file", headers={"Range": "bytes=1000-", "If-Range": '"old"'}).status_code == 200
+    assert client.get("/file", headers={"Range": "bytes=20000-"}).status_code == 416
+
+def test_cache_key_ignores_selection_order():
+    a = SimpleNamespace(id="a", storage_path="a.png", manual_edits=None)
+    b = SimpleNamespace(id="b", storage_path="b.png", manual_edits=None)
+    options = {"format": "png", "quality": "high", "grouping": "batch"}
+    assert ExportService.build_cache_key([a, b], options) == ExportService.build_cache_key([b, a], options)
+    assert ExportService.build_cache_key([a, b], options) != ExportService.build_cache_key([a, b], {**options, "format": "jpeg"})
+    # An edited asset (new storage path) gets a new archive
+    edited = SimpleNamespace(id="a", storage_path="a_edited.png", manual_edits=None)
+    assert ExportService.build_cache_key([a, b], options) != ExportService.build_cache_key([edited, b], options)
+    stacked = SimpleNamespace(id="a", storage_path="a.png", manual_edits={"operations": [{"type": "flip", "params": {"direction": "vertical"}}]})
+    assert ExportService.build_cache_key([a, b], options) != ExportService.build_cache_key([stacked, b], options)
+
+def test_entry_names_follow_grouping():
+    platform = SimpleNamespace(name="Instagram")
+    asset = SimpleNamespace(
+        id="1234567890", original_asset_id="abcdef0123",
+        asset_format=SimpleNamespace(name="Story", platform=platform, category=None),
+        original_asset=SimpleNamespace(original_filename="summer sale.png")
+    )
+    assert ExportService.build_entry_name(asset, "individual", ".jpg") == "Instagram/Story_12345678.jpg"
+    assert ExportService.build_entry_name(asset, "batch", ".jpg") == "summer sale_abcdef01/Instagram_Story_12345678.jpg"
+    assert ExportService.build_entry_name(asset, "category", ".jpg") == "Instagram/Instagram_Story_12345678.jpg"
+    asset.asset_format = SimpleNamespace(name="Banner", platform=None, category="Web")
+    assert ExportService.build_entry_name(asset, "category", ".png") == "Web/Unknown_Platform_Banner_12345678.png"
+
+def test_failed_enqueue_does_not_leave_a_reusable_export(tmp_path):
+    db = sqlite_session(ExportJob)
+    user = SimpleNamespace(id=uuid.uuid4())
+    assets = [SimpleNamespace(id=uuid.uuid4(), storage_path="a.png", manual_edits=None)]
+    request = DownloadRequest(assetIds=[assets[0].id], format="png", quality="high", grouping="individual")
+
+    def export(delay):
+        with patch("app.api.v1.endpoints.generation._load_owned_assets", return_value=assets), \
+                patch("app.api.v1.endpoints.generation.process_export_job.delay", delay), \
+                patch.object(settings, "UPLOAD_DIR", str(tmp_path)):
+            return create_export(request, db=db, current_user=user)
+
+    with pytest.raises(HTTPException) as error:
+        export(MagicMock(side_effect=redis.ConnectionError("broker down")))
+    assert error.value.status_code == 503
+    failed = db.query(ExportJob).one()
+    assert failed.status == JobStatus.FAILED and failed.task_id is None
+
+    queued = export(MagicMock(return_value=SimpleNamespace(id="task-1")))
+    assert queued.exportId != str(failed.id)
+    assert db.get(ExportJob, uuid.UUID(queued.exportId)).task_id == "task-1"
+
+    # An unqueued pending export (worker died before enqueueing) is only reused briefly
+    orphan = db.get(ExportJob, uuid.UUID(queued.exportId))
+    orphan.task_id = None
+    db.commit()
+    assert export(MagicMock(return_value=SimpleNamespace(id="task-2"))).exportId == str(orphan.id)
+    orphan.created_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+    db.commit()
+    assert export(MagicMock(return_value=SimpleNamespace(id="task-2"))).exportId != str(orphan.id)
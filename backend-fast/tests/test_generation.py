@@ -1,7 +1,7 @@
 from fastapi.testclient import TestClient
 from unittest.mock import patch
 import pytest
-from app.models import Project, Asset, AssetFormat, GenerationJob
+from app.models import Project, Asset, AssetFormat, GenerationJob, GeneratedAsset
 from app.models.asset_format import FormatType
 from app.models.project import ProjectStatus
 
@@ -0,0 +1,72 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+import redis
+from fastapi import HTTPException
+from sqlite_db import sqlite_session
+from app.api.v1.endpoints.generation import start_generation
+from app.models.generation_job import GenerationJob, JobStatus
+from app.models.project import Project, ProjectStatus
+from app.schemas.generation import GenerationRequest
+
+
+@pytest.fixture
+def db():
+    session = sqlite_session(Project, GenerationJob)
+    with patch("app.services.generation_service.get_redis_client", side_effect=redis.ConnectionError("down")):
+        yield session
+    session.close()
+
+@pytest.fixture
+def user():
+    return SimpleNamespace(id=uuid.uuid4(), organization_id=uuid.uuid4())
+
+@pytest.fixture
+def request_body(db, user):
+    project = Project(name="P", user_id=user.id, organization_id=user.organization_id, status=ProjectStatus.READY_FOR_REVIEW)
+    db.add(project)
+    db.commit()
+    return GenerationRequest(projectId=project.id, formatIds=[uuid.uuid4()], customResizes=[{"width": 300, "height": 200}])
+
+def submit(db, user, request_body):
+    return start_generation(request_body, idempotency_key=None, db=db, current_user=user).jobId
+
+def test_identical_in_flight_request_reuses_the_job(db, user, request_body):
+    with patch("app.api.v1.endpoints.generation.process_generation_job.delay") as delay:
+        delay.return_value.id = "task-1"
+        first = submit(db, user, request_body)
+        second = submit(db, user, request_body)
+    assert first == second
+    delay.assert_called_once()
+    assert db.query(GenerationJob).one().task_id == "task-1"
+
+def test_failed_enqueue_does_not_leave_a_reusable_job(db, user, request_body):
+    with patch("app.api.v1.endpoints.generation.process_generation_job.delay", side_effect=redis.ConnectionError("broker down")):
+        with pytest.raises(HTTPException) as error:
+            submit(db, user, request_body)
+    assert error.value.status_code == 500
+    assert db.query(GenerationJob).one().status == JobStatus.FAILED
+
+    with patch("app.api.v1.endpoints.generation.process_generation_job.delay") as delay:
+        delay.return_value.id = "task-2"
+        job_id = submit(db, user, request_body)
+    delay.assert_called_once()
+    assert db.get(GenerationJob, uuid.UUID(job_id)).task_id == "task-2"
+
+def test_unqueued_pending_job_is_only_reused_during_the_grace_period(db, user, request_body):
+    with patch("app.api.v1.endpoints.generation.process_generation_job.delay") as delay:
+        delay.return_value.id = "task-1"
+        orphan = submit(db, user, request_body)
+    job = db.get(GenerationJob, uuid.UUID(orphan))
+    job.task_id = None  # The worker died between commit and enqueue
+    db.commit()
+
+    with patch("app.api.v1.endpoints.generation.process_generation_job.delay") as delay:
+        delay.return_value.id = "task-2"
+        assert submit(db, user, request_body) == orphan
+        job.created_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+        db.commit()
+        assert submit(db, user, request_body) != orphan
+    delay.assert_called_once()
@@ -0,0 +1,41 @@
+from app.services.generation_planner import GenerationPlanner
+
+
+def test_plan_merges_identical_sizes():
+    targets = [
+        {"asset_format_id": "instagram-square", "width": 1080, "height": 1080},
+        {"asset_format_id": "facebook-square", "width": 1080, "height": 1080},
+    ]
+    plan = GenerationPlanner.plan(targets)
+    assert len(plan) == 1
+    assert len(plan[0]["sizes"]) == 1
+    assert len(plan[0]["sizes"][0]["targets"]) == 2
+
+def test_plan_buckets_by_aspect_ratio_with_largest_master():
+    targets = [
+        {"asset_format_id": "small-story", "width": 720, "height": 1280},
+        {"asset_format_id": "story", "width": 1080, "height": 1920},
+        {"asset_format_id": "square", "width": 1080, "height": 1080},
+        {"asset_format_id": "thumb", "width": 200, "height": 200},
+    ]
+    plan = GenerationPlanner.plan(targets)
+    assert len(plan) == 2
+    masters = {(bucket["width"], bucket["height"]) for bucket in plan}
+    assert masters == {(1080, 1920), (1080, 1080)}
+    story_bucket = next(bucket for bucket in plan if bucket["height"] == 1920)
+    assert [(s["width"], s["height"]) for s in story_bucket["sizes"]] == [(1080, 1920), (720, 1280)]
+
+def test_plan_keeps_distinct_ratios_apart():
+    targets = [
+        {"asset_format_id": "a", "width": 1200, "height": 628},
+        {"asset_format_id": "b", "width": 1280, "height": 720},
+    ]
+    assert len(GenerationPlanner.plan(targets)) == 2
+
+def test_master_canvas_covers_every_aspect_ratio():
+    from app.services.generation_service import GenerationService
+
+    width, height = GenerationService.compute_master_canvas_size(1000, 1000, [(1920, 1080), (1080, 1920)])
+    assert (width, height) == (1778, 1778)
+    # A landscape source only needs vertical extension for a story format
+    assert GenerationService.compute_master_canvas_size(1600, 900, [(1080, 1920)]) == (1600, 2844)
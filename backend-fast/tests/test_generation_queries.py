@@ -0,0 +1,73 @@
+import uuid
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from sqlite_db import count_statements, sqlite_session
+from app.api.v1.endpoints.generation import _load_owned_assets
+from app.models.asset import Asset
+from app.models.asset_format import AssetFormat, FormatType
+from app.models.generated_asset import GeneratedAsset
+from app.models.generation_job import GenerationJob, JobStatus
+from app.models.repurposing_platform import RepurposingPlatform
+from app.services.generation_service import GenerationService
+
+
+@pytest.fixture
+def db():
+    return sqlite_session(Asset, AssetFormat, RepurposingPlatform, GenerationJob, GeneratedAsset)
+
+def add_job(db, user_id, count):
+    """Completed job of `user_id` with `count` outputs, each in its own format and platform"""
+    org_id = uuid.uuid4()
+    source = Asset(project_id=uuid.uuid4(), original_filename="sale.png", storage_path="sale.png", file_type="png", file_size_bytes=1)
+    job = GenerationJob(project_id=uuid.uuid4(), user_id=user_id, status=JobStatus.COMPLETED)
+    db.add_all([source, job])
+    db.flush()
+    for i in range(count):
+        platform = RepurposingPlatform(name=f"Platform {i}", organization_id=org_id)
+        asset_format = AssetFormat(name=f"Format {i}", type=FormatType.RESIZING, width=100, height=100, organization_id=org_id, platform=platform)
+        db.add_all([platform, asset_format])
+        db.flush()
+        db.add(GeneratedAsset(
+            job_id=job.id, original_asset_id=source.id, asset_format_id=asset_format.id, unit_key=f"u{i}",
+            storage_path=f"{job.id}_{i}.jpg", file_type="jpeg", dimensions={"width": 100, "height": 100}
+        ))
+    db.commit()
+    return job
+
+@pytest.mark.parametrize("count", [1, 8])
+def test_job_results_are_loaded_in_one_query(db, count):
+    job = add_job(db, uuid.uuid4(), count)
+    db.refresh(job)
+    statements = count_statements(db)
+    results = GenerationService.get_job_results(db, job)
+    assert sum(len(assets) for assets in results.values()) == count
+    assert len(statements) == 1
+
+@pytest.mark.parametrize("count", [1, 8])
+def test_selection_with_owners_and_sources_is_loaded_in_constant_queries(db, count):
+    user_id = uuid.uuid4()
+    job = add_job(db, user_id, count)
+    asset_ids = [asset.id for asset in job.generated_assets]
+    db.expire_all()
+
+    statements = count_statements(db)
+    rows = GenerationService.get_generated_assets_with_owner(db, asset_ids, with_source=True)
+    names = [(asset.asset_format.platform.name, asset.original_asset.original_filename) for asset, _ in rows]
+    assert len(names) == count and {owner for _, owner in rows} == {user_id}
+    # Assets with their format and platform joined, sources in one selectin query
+    assert len(statements) == 2
+
+def test_selection_is_rejected_unless_the_user_owns_all_of_it(db):
+    user_id, other_id = uuid.uuid4(), uuid.uuid4()
+    own = [asset.id for asset in add_job(db, user_id, 2).generated_assets]
+    other = [asset.id for asset in add_job(db, other_id, 1).generated_assets]
+    user = SimpleNamespace(id=user_id)
+
+    assert len(_load_owned_assets(db, own, user)) == 2
+    with pytest.raises(HTTPException) as error:
+        _load_owned_assets(db, own + other, user)
+    assert error.value.status_code == 403
+    with pytest.raises(HTTPException) as error:
+        _load_owned_assets(db, [uuid.uuid4()], user)
+    assert error.value.status_code == 404
@@ -0,0 +1,42 @@
+from unittest.mock import MagicMock, patch
+from app.services.generation_writer import GeneratedAssetWriter, ProgressReporter
+
+
+def _db(returned):
+    db = MagicMock()
+    db.bind.dialect.name = "postgresql"
+    db.execute.side_effect = lambda stmt, rows=None: MagicMock(all=lambda: [r for r in returned if rows and r[1] in {row["unit_key"] for row in rows}])
+    return db
+
+def test_writer_inserts_in_batches_and_reports_written_units():
+    db = _db([("id-a", "a"), ("id-b", "b"), ("id-c", "c")])
+    writer = GeneratedAssetWriter(db, batch_size=2)
+    seen = {}
+    for key in ("a", "b", "c"):
+        writer.add({"unit_key": key}, lambda written, key=key: seen.update({key: written.get(key)}))
+
+    # First batch flushed automatically when it filled up
+    assert db.execute.call_count == 1
+    assert seen == {"a": "id-a", "b": "id-b"}
+
+    writer.flush()
+    assert db.execute.call_count == 2
+    assert db.commit.call_count == 2
+    assert seen["c"] == "id-c"
+    assert writer.written == 3
+    assert len(writer) == 0
+
+def test_progress_reports_are_coalesced():
+    db = MagicMock()
+    published = []
+    reporter = ProgressReporter(db, "job", published.append, min_interval=60, min_delta=5)
+    with patch("app.services.generation_writer.time.monotonic", return_value=100.0):
+        for progress in (10, 11, 12, 14, 15, 16, 20):
+            reporter.report(progress)
+    assert published == [10, 15, 20]
+
+    with patch("app.services.generation_writer.time.monotonic", return_value=200.0):
+        reporter.report(21)
+        reporter.report(22, force=True)
+    assert published == [10, 15, 20, 21, 22]
+    assert db.commit.call_count == 5
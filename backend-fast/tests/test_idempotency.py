@@ -0,0 +1,52 @@
+from unittest.mock import MagicMock, patch
+import pytest
+import redis
+from app.services.idempotency_service import (
+    IdempotencyService, IdempotencyKeyReused, IdempotencyRequestInProgress
+)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+
+def test_completed_request_is_replayed():
+    fake = FakeRedis()
+    with patch("app.services.idempotency_service.get_redis_client", return_value=fake):
+        assert IdempotencyService.begin("generate", "u1", "key-1", {"a": 1}) is None
+        with pytest.raises(IdempotencyRequestInProgress):
+            IdempotencyService.begin("generate", "u1", "key-1", {"a": 1})
+
+        IdempotencyService.complete("generate", "u1", "key-1", {"a": 1}, {"jobId": "j1"})
+        assert IdempotencyService.begin("generate", "u1", "key-1", {"a": 1}) == {"jobId": "j1"}
+        with pytest.raises(IdempotencyKeyReused):
+            IdempotencyService.begin("generate", "u1", "key-1", {"a": 2})
+        # Keys are scoped per user
+        assert IdempotencyService.begin("generate", "u2", "key-1", {"a": 1}) is None
+
+def test_released_key_can_be_retried():
+    fake = FakeRedis()
+    with patch("app.services.idempotency_service.get_redis_client", return_value=fake):
+        assert IdempotencyService.begin("upload", "u1", "key-1", {}) is None
+        IdempotencyService.release("upload", "u1", "key-1")
+        assert IdempotencyService.begin("upload", "u1", "key-1", {}) is None
+
+def test_requests_proceed_without_redis():
+    client = MagicMock()
+    client.set.side_effect = redis.ConnectionError("down")
+    with patch("app.services.idempotency_service.get_redis_client", return_value=client):
+        assert IdempotencyService.begin("generate", "u1", "key-1", {}) is None
+    assert IdempotencyService.begin("generate", "u1", None, {}) is None
@@ -0,0 +1,39 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from app.core.loop_monitor import Histogram, LoopMonitor
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(10, 100))
+    for value in (5, 50, 500):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"10": 1, "100": 2, "+Inf": 3}
+    assert snapshot["maxMs"] == 500
+
+def test_blocking_call_is_recorded_with_route_and_stack():
+    monitor = LoopMonitor(interval=0.02, threshold=0.05)
+
+    def slow_handler():
+        time.sleep(0.3)
+
+    async def request():
+        monitor.track_request(asyncio.current_task(), {"method": "POST", "route": SimpleNamespace(path="/api/v1/slow/{id}")})
+        slow_handler()
+
+    async def main():
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await asyncio.create_task(request())
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    asyncio.run(main())
+    snapshot = monitor.snapshot()
+    assert snapshot["blocks"]["count"] == 1
+    assert snapshot["blocksByRoute"] == {"POST /api/v1/slow/{id}": 1}
+    event = snapshot["recentBlocks"][0]
+    assert event["durationMs"] >= 200
+    assert any("slow_handler" in line for line in event["stack"])
+    assert snapshot["lag"]["count"] > 5
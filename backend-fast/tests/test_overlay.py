@@ -0,0 +1,92 @@
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import pytest
+from PIL import Image
+from sqlite_db import sqlite_session
+from app.core.config import settings
+from app.models.asset import Asset
+from app.models.project import Project
+from app.services.edit_render_service import EditRenderService
+from app.services.overlay_service import OverlayService
+
+
+@pytest.fixture
+def upload_dir(tmp_path):
+    Image.new("RGBA", (200, 100), (0, 0, 255, 255)).save(tmp_path / "logo.png")
+    with patch.object(settings, "UPLOAD_DIR", str(tmp_path)):
+        yield tmp_path
+
+STYLE = {"fontFamily": "Inter", "fontSize": 120, "fontWeight": "bold", "color": "#ff0000"}
+
+def text_op(**params):
+    return {"type": "text", "params": {
+        "content": "SALE", "textStyleSetId": "set-1", "styleType": "title",
+        "position": {"x": 0.5, "y": 0.5}, "style": STYLE, **params
+    }}
+
+def test_overlay_fields_become_operations(upload_dir):
+    operations = EditRenderService.normalize_operations({
+        "saturation": 1.2,
+        "textOverlays": [{"content": "Hi", "textStyleSetId": "set-1", "styleType": "title", "position": {"x": 0.5, "y": 0.1}}],
+        "logoOverlay": {"logoUrl": "/uploads/logo.png", "position": {"x": 0.9, "y": 0.9}, "size": 10},
+    })
+    assert [op["type"] for op in operations] == ["saturation", "text", "logo"]
+
+@pytest.mark.parametrize("overlay", [
+    {"logoUrl": "/uploads/../../etc/passwd", "position": {"x": 0.5, "y": 0.5}, "size": 10},
+    {"logoUrl": "https://example.com/logo.png", "position": {"x": 0.5, "y": 0.5}, "size": 10},
+    {"logoUrl": "/uploads/logo.png", "position": {"x": 1.5, "y": 0.5}, "size": 10},
+    {"logoUrl": "/uploads/logo.png", "position": {"x": 0.5, "y": 0.5}, "size": 0},
+])
+def test_invalid_logo_overlays_are_rejected(upload_dir, overlay):
+    with pytest.raises(ValueError):
+        EditRenderService.normalize_operations({"logoOverlay": overlay})
+
+def test_styles_are_embedded_from_the_style_set():
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [
+        SimpleNamespace(id="set-1", name="Brand", styles={"title": STYLE})
+    ]
+    operations = OverlayService.resolve_styles(db, [text_op(style=None)], "org-1")
+    assert operations[0]["params"]["style"] == STYLE
+
+    with pytest.raises(ValueError):
+        OverlayService.resolve_styles(db, [text_op(styleType="caption")], "org-1")
+
+def test_text_and_logo_are_composited(upload_dir):
+    base = Image.new("RGB", (1080, 1080), (255, 255, 255))
+    logo = {"type": "logo", "params": {"logoUrl": "/uploads/logo.png", "position": {"x": 0.25, "y": 0.25}, "size": 20}}
+    result = EditRenderService.apply_operations(base, [text_op(), logo])
+
+    assert base.getpixel((270, 270)) == (255, 255, 255)  # input untouched
+    assert result.getpixel((270, 270)) == (0, 0, 255)  # logo centred on its position
+    colors = result.crop((340, 440, 740, 640)).getcolors(1 << 20)
+    red = [c for _, c in colors if c[0] > 200 and c[1] < 80 and c[2] < 80]
+    assert red  # text drawn in the style colour around the centre
+
+def test_fonts_and_scaled_logos_are_cached(upload_dir):
+    assert OverlayService.get_font("Inter", 48, "bold") is OverlayService.get_font("Inter", 48, "bold")
+    path = OverlayService.resolve_logo_path("/uploads/logo.png")
+    logo = OverlayService.get_logo(path, 100)
+    assert logo.size == (100, 50)
+    assert OverlayService.get_logo(path, 100) is logo
+
+def test_logos_must_be_uploads_of_the_organization(upload_dir):
+    Image.new("RGBA", (50, 50)).save(upload_dir / "other.png")
+    db = sqlite_session(Project, Asset)
+    org_id, other_org_id = uuid.uuid4(), uuid.uuid4()
+    project = Project(name="P", user_id=uuid.uuid4(), organization_id=org_id)
+    db.add(project)
+    db.commit()
+    db.add(Asset(project_id=project.id, original_filename="logo.png", storage_path="logo.png", file_type="png", file_size_bytes=1))
+    db.commit()
+
+    def logo(url):
+        return [{"type": "logo", "params": {"logoUrl": url, "position": {"x": 0.5, "y": 0.5}, "size": 10}}]
+
+    assert OverlayService.resolve_styles(db, logo("/uploads/logo.png"), org_id)
+    with pytest.raises(ValueError):
+        OverlayService.resolve_styles(db, logo("/uploads/logo.png"), other_org_id)
+    with pytest.raises(ValueError):
+        OverlayService.resolve_styles(db, logo("/uploads/other.png"), org_id)  # on disk, but no asset
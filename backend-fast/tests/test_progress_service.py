@@ -0,0 +1,83 @@
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+import redis
+from app.services.progress_service import ProgressService
+
+
+async def _collect(generator):
+    return [message async for message in generator]
+
+def test_stream_ends_after_terminal_snapshot():
+    initial = {"event": "progress", "kind": "job", "id": "j1", "status": "completed", "progress": 100}
+    messages = asyncio.run(_collect(ProgressService.stream("job", "j1", initial, ["completed"])))
+    assert len(messages) == 1
+    assert messages[0].startswith("event: progress\n")
+    assert json.loads(messages[0].split("data: ", 1)[1])["progress"] == 100
+
+def test_publish_progress_stores_snapshot_and_publishes():
+    client = MagicMock()
+    with patch("app.services.progress_service.get_redis_client", return_value=client):
+        ProgressService.publish_progress("project", "p1", "processing", 42.7, processedAssets=3)
+    pipe = client.pipeline.return_value
+    key, payload = pipe.set.call_args[0]
+    assert key == "progress:snapshot:project:p1"
+    assert json.loads(payload)["progress"] == 42
+    assert pipe.publish.call_args[0][0] == "progress:project:p1"
+
+def test_progress_degrades_without_redis():
+    client = MagicMock()
+    client.get.side_effect = redis.ConnectionError("down")
+    client.pipeline.return_value.execute.side_effect = redis.ConnectionError("down")
+    with patch("app.services.progress_service.get_redis_client", return_value=client):
+        ProgressService.publish_progress("job", "j1", "processing", 10)
+        assert ProgressService.get_snapshot("job", "j1") is None
+
+class _FakePubSub:
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def subscribe(self, channel):
+        self.calls.append("subscribe")
+
+    async def get_message(self, ignore_subscribe_messages, timeout):
+        return None
+
+    async def aclose(self):
+        pass
+
+class _FakeRedis:
+    def __init__(self, snapshot=None):
+        self.calls = []
+        self.snapshot = snapshot
+
+    def pubsub(self):
+        return _FakePubSub(self.calls)
+
+    async def get(self, key):
+        self.calls.append("get")
+        return json.dumps(self.snapshot) if self.snapshot else None
+
+    async def aclose(self):
+        pass
+
+def test_stream_subscribes_before_reading_the_snapshot():
+    client = _FakeRedis({"event": "progress", "status": "completed", "progress": 100})
+    initial = {"event": "progress", "kind": "job", "id": "j1", "status": "processing", "progress": 40}
+    with patch("app.services.progress_service.aioredis.from_url", return_value=client):
+        messages = asyncio.run(_collect(ProgressService.stream("job", "j1", initial, ["completed"])))
+    assert client.calls == ["subscribe", "get"]
+    assert len(messages) == 1
+    assert json.loads(messages[0].split("data: ", 1)[1])["status"] == "completed"
+
+def test_idle_stream_rechecks_status_and_has_a_maximum_lifetime():
+    initial = {"event": "progress", "kind": "job", "id": "j1", "status": "processing", "progress": 40}
+    refreshed = {"event": "progress", "kind": "job", "id": "j1", "status": "failed", "progress": 40}
+    with patch("app.services.progress_service.aioredis.from_url", return_value=_FakeRedis()):
+        messages = asyncio.run(_collect(ProgressService.stream("job", "j1", initial, ["failed"], refresh=lambda: refreshed)))
+    assert [json.loads(m.split("data: ", 1)[1])["status"] for m in messages] == ["processing", "failed"]
+
+    with patch("app.services.progress_service.aioredis.from_url", return_value=_FakeRedis()), \
+            patch("app.services.progress_service.settings.PROGRESS_STREAM_MAX_SECONDS", 0.05):
+        messages = asyncio.run(_collect(ProgressService.stream("job", "j1", initial, ["failed"], refresh=lambda: initial)))
+    assert messages[0].startswith("event: progress") and all(m == ": keepalive\n\n" for m in messages[1:])
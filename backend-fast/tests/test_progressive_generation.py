@@ -0,0 +1,71 @@
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+from sqlite_db import sqlite_session
+from app.api.v1.endpoints.generation import get_generation_results
+from app.core.config import settings
+from app.models.asset import Asset
+from app.models.asset_format import AssetFormat
+from app.models.generated_asset import GeneratedAsset
+from app.models.generation_job import GenerationJob, JobStatus
+from app.models.repurposing_platform import RepurposingPlatform
+from app.tasks.generation_tasks import _refine_drafts
+
+
+def test_refine_replaces_drafts_and_keeps_those_whose_master_failed(tmp_path):
+    Image.new("RGB", (400, 400), (200, 40, 40)).save(tmp_path / "source.jpg")
+    db = sqlite_session(Asset, GenerationJob, GeneratedAsset)
+    source = Asset(project_id=uuid.uuid4(), original_filename="source.jpg", storage_path="source.jpg", file_type="jpeg", file_size_bytes=1)
+    job = GenerationJob(project_id=uuid.uuid4(), user_id=uuid.uuid4(), status=JobStatus.PROCESSING)
+    db.add_all([source, job])
+    db.flush()
+    drafts = {
+        (width, height): GeneratedAsset(
+            job_id=job.id, original_asset_id=source.id, unit_key=f"{width}x{height}", storage_path=f"draft_{width}x{height}.jpg",
+            file_type="jpeg", dimensions={"width": width, "height": height}, is_draft=True
+        )
+        for width, height in [(200, 100), (100, 200)]
+    }
+    db.add_all(drafts.values())
+    db.commit()
+
+    def render_master(db, user, asset, source_path, canvas, width, height, prompt):
+        if width > height:
+            raise RuntimeError("AI editor unavailable")
+        path = tmp_path / f"master_{width}x{height}.jpg"
+        Image.new("RGB", (width, height)).save(path)
+        return str(path)
+
+    progress = []
+    with patch.object(settings, "UPLOAD_DIR", str(tmp_path)), \
+            patch("app.tasks.generation_tasks._render_master", side_effect=render_master), \
+            patch("app.tasks.generation_tasks.CancellationService.raise_if_cancelled"), \
+            patch("app.tasks.generation_tasks.ProgressService.publish_unit"):
+        _refine_drafts(db, job, SimpleNamespace(id=job.user_id), None, False, progress.append)
+
+    db.expire_all()
+    failed, refined = drafts[(200, 100)], drafts[(100, 200)]
+    assert failed.is_draft is True and failed.storage_path == "draft_200x100.jpg"
+    assert refined.is_draft is False and refined.storage_path == "master_100x200.jpg"
+    assert progress[-1] == 1
+
+def test_results_expose_drafts_while_the_job_is_processing():
+    db = sqlite_session(AssetFormat, RepurposingPlatform, GenerationJob, GeneratedAsset)
+    user = SimpleNamespace(id=uuid.uuid4())
+    job = GenerationJob(project_id=uuid.uuid4(), user_id=user.id, status=JobStatus.PROCESSING)
+    db.add(job)
+    db.commit()
+    with pytest.raises(HTTPException) as error:
+        get_generation_results(str(job.id), db=db, current_user=user)
+    assert error.value.status_code == 400
+
+    db.add(GeneratedAsset(
+        job_id=job.id, original_asset_id=uuid.uuid4(), unit_key="u1", storage_path="draft.jpg",
+        file_type="jpeg", dimensions={"width": 100, "height": 100}, is_draft=True
+    ))
+    db.commit()
+    results = get_generation_results(str(job.id), db=db, current_user=user)
+    assert results["Custom"][0].isDraft is True
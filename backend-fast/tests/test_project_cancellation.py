@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from app.models.project import ProjectStatus
+from app.services.project_service import ProjectService
+
+
+def test_cancelling_a_reviewed_project_leaves_prompt_edits_running():
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = []
+    project = SimpleNamespace(id="p1", status=ProjectStatus.READY_FOR_REVIEW)
+    with patch("app.services.project_service.CancellationService.request_cancellation") as request_cancellation:
+        ProjectService.cancel_project(db, project)
+    request_cancellation.assert_not_called()
+    assert project.status == ProjectStatus.READY_FOR_REVIEW
+
+def test_cancelling_an_analysing_project_flags_and_cancels_it():
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = []
+    project = SimpleNamespace(id="p1", status=ProjectStatus.PROCESSING)
+    with patch("app.services.project_service.CancellationService.request_cancellation") as request_cancellation, \
+            patch("app.services.project_service.ProgressService.publish_progress"):
+        ProjectService.cancel_project(db, project)
+    request_cancellation.assert_called_once_with("project", "p1")
+    assert project.status == ProjectStatus.CANCELLED
@@ -0,0 +1,50 @@
+import os
+from PIL import Image, ImageChops, ImageStat
+from app.services.rendition_service import RenditionService
+from app.services.ai_strategy_service import AIStrategyService
+
+
+def test_rendition_paths_differ_per_size():
+    square = RenditionService.build_rendition_path("uploads/a.jpg", "center_crop", 1080, 1080)
+    story = RenditionService.build_rendition_path("uploads/a.jpg", "center_crop", 1080, 1920)
+    assert square != story
+    assert square.endswith(".jpg")
+    assert "_1080x1080_center_crop_" in square
+
+def test_rendition_path_is_deterministic():
+    first = RenditionService.build_rendition_path("uploads/a.jpg", "gemini_edited", 100, 100, ext=".png", prompt="sunset")
+    second = RenditionService.build_rendition_path("uploads/a.jpg", "gemini_edited", 100, 100, ext=".png", prompt="sunset")
+    other = RenditionService.build_rendition_path("uploads/a.jpg", "gemini_edited", 100, 100, ext=".png", prompt="snow")
+    assert first == second
+    assert first != other
+    assert first.endswith(".png")
+
+def test_center_crops_do_not_overwrite_each_other(tmp_path):
+    source = os.path.join(tmp_path, "source.jpg")
+    Image.new("RGB", (400, 300), (10, 20, 30)).save(source)
+
+    square = AIStrategyService._center_crop(source, 100, 100)
+    wide = AIStrategyService._center_crop(source, 160, 90)
+
+    assert square != wide
+    with Image.open(square) as img:
+        assert img.size == (100, 100)
+    with Image.open(wide) as img:
+        assert img.size == (160, 90)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+def test_center_crop_uses_reduced_jpeg_decode(tmp_path):
+    source = os.path.join(tmp_path, "large.jpg")
+    gradient = Image.linear_gradient("L").resize((2400, 1600)).convert("RGB")
+    gradient.save(source, quality=95)
+
+    with Image.open(source) as img:
+        reduced = RenditionService.crop_reduced(img, (400, 0, 2000, 1600), 200, 200)
+        assert reduced.size == (400, 400)
+
+    output = AIStrategyService._center_crop(source, 200, 200)
+    with Image.open(output) as img:
+        assert img.size == (200, 200)
+        expected = gradient.crop((400, 0, 2000, 1600)).resize((200, 200), Image.Resampling.LANCZOS)
+        diff = ImageStat.Stat(ImageChops.difference(img.convert("L"), expected.convert("L")))
+        assert diff.mean[0] < 3
@@ -0,0 +1,45 @@
+import hashlib
+import inspect
+import io
+import os
+from unittest.mock import patch
+import pytest
+from fastapi import HTTPException, UploadFile
+from fastapi.routing import APIRoute
+from app.api.v1.api import api_router
+from app.core.config import settings
+from app.services.file_service import FileService
+
+
+def test_api_handlers_do_not_block_the_event_loop():
+    # Sync handlers are dispatched to the threadpool; async ones must only await
+    blocking = [
+        route.path for route in api_router.routes
+        if isinstance(route, APIRoute)
+        and inspect.iscoroutinefunction(route.endpoint)
+        and "await " not in inspect.getsource(route.endpoint)
+    ]
+    assert blocking == []
+
+def test_upload_is_saved_in_blocks_with_its_checksum(tmp_path):
+    content = os.urandom(300_000)
+    upload = UploadFile(io.BytesIO(content), filename="a.png", headers={"content-type": "image/png"})
+    with patch.object(settings, "UPLOAD_DIR", str(tmp_path)), patch.object(settings, "UPLOAD_CHUNK_SIZE", 64 * 1024):
+        storage_path, size, checksum = FileService.save_file(upload, "p1")
+    assert size == len(content)
+    assert checksum == hashlib.md5(content).hexdigest()
+    assert (tmp_path / storage_path).read_bytes() == content
+
+def test_oversized_upload_is_rejected_without_leaving_a_file(tmp_path):
+    upload = UploadFile(io.BytesIO(b"x" * 5000), filename="a.png", headers={"content-type": "image/png"})
+    with patch.object(settings, "UPLOAD_DIR", str(tmp_path)), patch.object(settings, "MAX_FILE_SIZE", 4096), \
+            patch.object(settings, "UPLOAD_CHUNK_SIZE", 1024):
+        with pytest.raises(HTTPException) as error:
+            FileService.save_file(upload, "p1")
+    assert error.value.status_code == 413
+    assert os.listdir(tmp_path / "projects" / "p1") == []
+
+def test_db_pool_covers_the_api_threadpool():
+    from app.core.database import engine
+    assert engine.pool.size() == settings.DB_POOL_SIZE
+    assert settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW >= settings.API_THREADPOOL_SIZE
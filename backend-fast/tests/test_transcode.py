@@ -0,0 +1,52 @@
+import os
+from unittest.mock import patch
+import pytest
+from PIL import Image
+from app.services.transcode_service import TranscodeService
+
+
+@pytest.fixture
+def sources(tmp_path):
+    png = tmp_path / "a.png"
+    Image.new("RGBA", (64, 48), (255, 0, 0, 128)).save(png)
+    jpeg = tmp_path / "b.jpeg"
+    Image.new("RGB", (64, 48), (0, 0, 255)).save(jpeg, quality=95)
+    return str(png), str(jpeg)
+
+def test_transcode_converts_and_caches(sources):
+    png, _ = sources
+    output = TranscodeService.transcode(png, "jpeg", "medium")
+    assert output.endswith(".jpg") and output != png
+    with Image.open(output) as img:
+        assert img.format == "JPEG" and img.mode == "RGB"
+        assert img.info.get("progressive") or img.info.get("progression")
+
+    # Second request for the same (asset, format, quality) reuses the file
+    with patch("app.services.transcode_service.Image.open") as open_mock:
+        assert TranscodeService.transcode(png, "jpeg", "medium") == output
+        open_mock.assert_not_called()
+
+def test_same_format_high_quality_is_shipped_as_is(sources):
+    png, jpeg = sources
+    assert TranscodeService.transcode(jpeg, "jpeg", "high") == jpeg
+    assert TranscodeService.transcode(png, "png", "high") == png
+    assert TranscodeService.transcode(png, "original", "low") == png
+    with Image.open(TranscodeService.transcode(png, "png", "low")) as img:
+        assert img.mode == "P"
+
+def test_transcode_entries_keeps_order_and_reads_each_source_once(sources):
+    png, jpeg = sources
+    entries = [("x/1.jpg", png), ("y/2.jpg", jpeg), ("z/3.jpg", png), ("manifest.json", b"{}")]
+    with patch.object(TranscodeService, "transcode", wraps=TranscodeService.transcode) as transcode:
+        result = list(TranscodeService.transcode_entries(entries, "jpeg", "low", max_workers=2))
+    assert [name for name, _ in result] == ["x/1.jpg", "y/2.jpg", "z/3.jpg", "manifest.json"]
+    assert transcode.call_count == 2
+    assert result[0][1] == result[2][1] and os.path.exists(result[0][1])
+    assert result[3][1] == b"{}"
+
+def test_normalize_rejects_unknown_options():
+    assert TranscodeService.normalize_format("JPG") == "jpeg"
+    with pytest.raises(ValueError):
+        TranscodeService.normalize_format("tiff")
+    with pytest.raises(ValueError):
+        TranscodeService.normalize_quality("ultra")
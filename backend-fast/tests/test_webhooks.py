@@ -0,0 +1,31 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+import pytest
+from app.services.webhook_service import WebhookService
+from app.tasks.webhook_tasks import deliver_webhook
+
+
+def test_signature_roundtrip():
+    body = json.dumps({"event": "generation.completed"}).encode()
+    timestamp = int(time.time())
+    signature = "sha256=" + WebhookService.sign("secret", timestamp, body)
+    assert WebhookService.verify("secret", str(timestamp), body, signature)
+    assert not WebhookService.verify("other", str(timestamp), body, signature)
+    assert not WebhookService.verify("secret", str(timestamp - 3600), body, signature)
+
+def test_unknown_events_are_rejected():
+    WebhookService.validate_events(["generation.completed", "analysis.completed"])
+    with pytest.raises(ValueError):
+        WebhookService.validate_events(["generation.exploded"])
+
+def test_client_errors_are_not_retried():
+    payload = WebhookService.build_payload("generation.completed", "org", {"jobId": "j1"})
+    with patch("app.tasks.webhook_tasks._load_endpoint", return_value=("http://hooks.test/", "secret")), \
+         patch("app.services.webhook_service.requests.post", return_value=MagicMock(status_code=410)) as post:
+        result = deliver_webhook.apply(args=["e1", payload]).get()
+    assert result["status"] == "rejected"
+    assert post.call_count == 1
+    headers = post.call_args.kwargs["headers"]
+    assert headers["X-Webhook-Event"] == "generation.completed"
+    assert WebhookService.verify("secret", headers["X-Webhook-Timestamp"], post.call_args.kwargs["data"], headers["X-Webhook-Signature"])
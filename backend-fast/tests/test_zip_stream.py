@@ -0,0 +1,34 @@
+import io
+import os
+import zipfile
+from app.services.zip_stream_service import ZipStreamService
+
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+def test_stream_builds_valid_archive(tmp_path):
+    image = _write(tmp_path / "a.jpg", os.urandom(300_000))
+    notes = _write(tmp_path / "notes.txt", b"hello " * 1000)
+    chunks = list(ZipStreamService.stream(
+        [("Instagram/Post_a.jpg", image), ("notes.txt", notes), ("manifest.json", b'{"assets": []}')],
+        chunk_size=64 * 1024
+    ))
+    # Entries are emitted while the image is read, not in one block at the end
+    assert len(chunks) > 3
+
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.testzip() is None
+        infos = {info.filename: info for info in archive.infolist()}
+        assert infos["Instagram/Post_a.jpg"].compress_type == zipfile.ZIP_STORED
+        assert infos["notes.txt"].compress_type == zipfile.ZIP_DEFLATED
+        assert infos["manifest.json"].compress_type == zipfile.ZIP_DEFLATED
+        with open(image, "rb") as f:
+            assert archive.read("Instagram/Post_a.jpg") == f.read()
+        assert archive.read("manifest.json") == b'{"assets": []}'
+
+def test_compress_type_for_large_metadata_is_stored():
+    assert ZipStreamService.compress_type_for("a.PNG", 10) == zipfile.ZIP_STORED
+    assert ZipStreamService.compress_type_for("big.json", 50 * 1024 * 1024) == zipfile.ZIP_STORED